@@ -0,0 +1,29 @@
+"""adding id_blocks table for client-side id allocation
+
+Revision ID: 5e8d2b7c1a90
+Revises: 7a3c9e1f4b2d
+Create Date: 2026-10-18 19:32:07.114825
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "5e8d2b7c1a90"
+down_revision = "7a3c9e1f4b2d"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "id_blocks",
+        sa.Column("table_name", sa.String(length=30), nullable=False),
+        sa.Column("next_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("id_blocks")
@@ -0,0 +1,91 @@
+"""adding indexes on foreign keys and unique pairs on assoc tables
+
+Revision ID: 7a3c9e1f4b2d
+Revises: 2c1e77e56907, 3db5cfedcebd
+Create Date: 2026-10-18 13:20:41.518203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "7a3c9e1f4b2d"
+# Also merges the two heads that branched off 654f2756cbc7
+down_revision = ("2c1e77e56907", "3db5cfedcebd")
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_addresses_customer_id", "addresses", ["customer_id"], unique=False
+    )
+    op.create_index(
+        "ix_orderes_customer_id_id", "orderes", ["customer_id", "id"], unique=False
+    )
+    op.create_index(
+        "ix_orderes_created_at_id", "orderes", ["created_at", "id"], unique=False
+    )
+    op.create_unique_constraint(
+        "uq_product_tag_assoc", "product_tag_assoc", ["product_id", "tag_id"]
+    )
+    op.create_index(
+        "ix_product_tag_assoc_tag_id", "product_tag_assoc", ["tag_id"], unique=False
+    )
+    op.create_unique_constraint(
+        "uq_product_category_assoc",
+        "product_category_assoc",
+        ["product_id", "category_id"],
+    )
+    op.create_index(
+        "ix_product_category_assoc_category_id",
+        "product_category_assoc",
+        ["category_id"],
+        unique=False,
+    )
+    op.create_unique_constraint(
+        "uq_product_order_assoc", "product_order_assoc", ["order_id", "product_id"]
+    )
+    op.create_index(
+        "ix_product_order_assoc_product_id",
+        "product_order_assoc",
+        ["product_id"],
+        unique=False,
+    )
+    op.create_unique_constraint(
+        "uq_product_order_quantities",
+        "product_order_quantities",
+        ["order_id", "product_id"],
+    )
+    op.create_index(
+        "ix_product_order_quantities_product_id",
+        "product_order_quantities",
+        ["product_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_product_order_quantities_product_id",
+        table_name="product_order_quantities",
+    )
+    op.drop_constraint(
+        "uq_product_order_quantities", "product_order_quantities", type_="unique"
+    )
+    op.drop_index(
+        "ix_product_order_assoc_product_id", table_name="product_order_assoc"
+    )
+    op.drop_constraint("uq_product_order_assoc", "product_order_assoc", type_="unique")
+    op.drop_index(
+        "ix_product_category_assoc_category_id", table_name="product_category_assoc"
+    )
+    op.drop_constraint(
+        "uq_product_category_assoc", "product_category_assoc", type_="unique"
+    )
+    op.drop_index("ix_product_tag_assoc_tag_id", table_name="product_tag_assoc")
+    op.drop_constraint("uq_product_tag_assoc", "product_tag_assoc", type_="unique")
+    op.drop_index("ix_orderes_created_at_id", table_name="orderes")
+    op.drop_index("ix_orderes_customer_id_id", table_name="orderes")
+    op.drop_index("ix_addresses_customer_id", table_name="addresses")
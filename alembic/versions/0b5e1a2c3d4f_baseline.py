@@ -0,0 +1,278 @@
+"""baseline: full schema as of 5e8d2b7c1a90
+
+Squashes the revisions from ca511454e492 through 5e8d2b7c1a90 (kept under
+alembic/archive/) into a single one equal to `myapp.models.Base.metadata`.
+`python -m myapp.bootstrap check` fails when the two drift apart.
+
+Databases already at 5e8d2b7c1a90 are moved over with
+`alembic stamp --purge 0b5e1a2c3d4f`; older ones are upgraded to
+5e8d2b7c1a90 from a checkout of the archived revisions first.
+
+Revision ID: 0b5e1a2c3d4f
+Revises:
+Create Date: 2026-10-18 19:48:12.306518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "0b5e1a2c3d4f"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "categories",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("title", sa.String(length=30), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "customers",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(length=30), nullable=False),
+        sa.Column("contact_number", sa.String(length=60), nullable=False),
+        sa.Column("is_active", sa.Boolean(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "id_blocks",
+        sa.Column("table_name", sa.String(length=30), nullable=False),
+        sa.Column("next_id", sa.BigInteger(), nullable=False),
+        sa.PrimaryKeyConstraint("table_name"),
+    )
+    op.create_table(
+        "products",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("code", sa.String(length=30), nullable=False),
+        sa.Column("name", sa.String(length=80), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "tags",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("name", sa.String(length=30), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_table(
+        "addresses",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("present_address", sa.String(length=255), nullable=False),
+        sa.Column("permenent_address", sa.String(length=255), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["customer_id"],
+            ["customers.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        op.f("ix_addresses_customer_id"), "addresses", ["customer_id"], unique=False
+    )
+    op.create_table(
+        "orderes",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("invoice_no", sa.String(length=30), nullable=False),
+        sa.Column("customer_id", sa.Integer(), nullable=False),
+        sa.Column("created_at", sa.DateTime(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["customer_id"],
+            ["customers.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "ix_orderes_created_at_id", "orderes", ["created_at", "id"], unique=False
+    )
+    op.create_index(
+        "ix_orderes_customer_id_id", "orderes", ["customer_id", "id"], unique=False
+    )
+    op.create_table(
+        "product_category_assoc",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("category_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["category_id"],
+            ["categories.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "product_id", "category_id", name="uq_product_category_assoc"
+        ),
+    )
+    op.create_index(
+        "ix_product_category_assoc_category_id",
+        "product_category_assoc",
+        ["category_id"],
+        unique=False,
+    )
+    op.create_table(
+        "product_tag_assoc",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("tag_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["tag_id"],
+            ["tags.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("product_id", "tag_id", name="uq_product_tag_assoc"),
+    )
+    op.create_index(
+        "ix_product_tag_assoc_tag_id", "product_tag_assoc", ["tag_id"], unique=False
+    )
+    op.create_table(
+        "product_order_assoc",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["orderes.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("order_id", "product_id", name="uq_product_order_assoc"),
+    )
+    op.create_index(
+        "ix_product_order_assoc_product_id",
+        "product_order_assoc",
+        ["product_id"],
+        unique=False,
+    )
+    op.create_table(
+        "product_order_quantities",
+        sa.Column(
+            "id",
+            sa.Integer(),
+            sa.Identity(
+                always=False, start=1, maxvalue=999999999999999999999999999, cycle=True
+            ),
+            nullable=False,
+        ),
+        sa.Column("qty", sa.Integer(), nullable=False),
+        sa.Column("order_id", sa.Integer(), nullable=False),
+        sa.Column("product_id", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["orderes.id"],
+        ),
+        sa.ForeignKeyConstraint(
+            ["product_id"],
+            ["products.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint(
+            "order_id", "product_id", name="uq_product_order_quantities"
+        ),
+    )
+    op.create_index(
+        "ix_product_order_quantities_product_id",
+        "product_order_quantities",
+        ["product_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_product_order_quantities_product_id", table_name="product_order_quantities"
+    )
+    op.drop_table("product_order_quantities")
+    op.drop_index("ix_product_order_assoc_product_id", table_name="product_order_assoc")
+    op.drop_table("product_order_assoc")
+    op.drop_index("ix_product_tag_assoc_tag_id", table_name="product_tag_assoc")
+    op.drop_table("product_tag_assoc")
+    op.drop_index(
+        "ix_product_category_assoc_category_id", table_name="product_category_assoc"
+    )
+    op.drop_table("product_category_assoc")
+    op.drop_index("ix_orderes_customer_id_id", table_name="orderes")
+    op.drop_index("ix_orderes_created_at_id", table_name="orderes")
+    op.drop_table("orderes")
+    op.drop_index(op.f("ix_addresses_customer_id"), table_name="addresses")
+    op.drop_table("addresses")
+    op.drop_table("tags")
+    op.drop_table("products")
+    op.drop_table("id_blocks")
+    op.drop_table("customers")
+    op.drop_table("categories")
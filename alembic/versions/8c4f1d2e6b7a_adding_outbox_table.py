@@ -0,0 +1,39 @@
+"""adding outbox table for change records
+
+Revision ID: 8c4f1d2e6b7a
+Revises: 0b5e1a2c3d4f
+Create Date: 2026-10-18 21:04:51.527310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = "8c4f1d2e6b7a"
+down_revision = "0b5e1a2c3d4f"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "outbox",
+        sa.Column(
+            "id",
+            sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+            sa.Identity(always=False, start=1),
+            nullable=False,
+        ),
+        sa.Column("table_name", sa.String(length=30), nullable=False),
+        sa.Column("pk", sa.String(length=60), nullable=False),
+        sa.Column("op", sa.String(length=6), nullable=False),
+        sa.Column("columns", sa.JSON(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sqlite_autoincrement=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("outbox")
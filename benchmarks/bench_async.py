@@ -0,0 +1,91 @@
+"""Requests/sec of the async access paths at increasing concurrency.
+
+A "request" loads one customer with its address and one order with its
+products and quantities, each in its own session.
+
+    python -m benchmarks.bench_async --customers 20000 --concurrency 1 10 100 200
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+from typing import Optional, Sequence
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from benchmarks.common import seeded_engine
+from myapp.db import (
+    create_async_engine,
+    create_session_factory,
+    get_customer,
+    get_order,
+)
+
+
+async def request(
+    sessions: async_sessionmaker[AsyncSession], customer_id: int, order_id: int
+) -> None:
+    async with sessions() as session:
+        customer = await get_customer(session, customer_id)
+        order = await get_order(session, order_id)
+        assert customer is not None and order is not None
+        # Touch the loaded graph, a lazy load here would raise
+        customer.addresses
+        for product in order.products:
+            product.tags
+        order.quantities
+
+
+async def run(
+    sessions: async_sessionmaker[AsyncSession],
+    concurrency: int,
+    requests: int,
+    customers: int,
+) -> float:
+    rng = random.Random(concurrency)
+    queue: asyncio.Queue[tuple[int, int]] = asyncio.Queue()
+    for _ in range(requests):
+        customer_id = rng.randint(1, customers)
+        queue.put_nowait((customer_id, customer_id * 2))
+
+    async def worker() -> None:
+        while not queue.empty():
+            await request(sessions, *queue.get_nowait())
+
+    began = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - began)
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    path = seeded_engine(args.customers).url.database
+    for concurrency in args.concurrency:
+        engine = create_async_engine(
+            f"sqlite+aiosqlite:///{path}",
+            pool_size=args.pool_size,
+            max_overflow=0,
+            pool_timeout=60,
+        )
+        sessions = create_session_factory(engine)
+        rate = await run(sessions, concurrency, args.requests, args.customers)
+        print(f"concurrency {concurrency:>4}: {rate:>9,.0f} requests/s")
+        await engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=2_000)
+    parser.add_argument("--pool-size", type=int, default=20)
+    parser.add_argument(
+        "--concurrency", type=int, nargs="+", default=[1, 10, 100, 200]
+    )
+    args = parser.parse_args(argv)
+    asyncio.run(main_async(args))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,116 @@
+"""Import time of the ``myapp`` modules against a budget.
+
+Every module is imported in a fresh interpreter under ``python -X importtime``
+and the best cumulative time of ``--runs`` is compared with its budget. Heavy
+dependencies a module must not pull in (Faker for the seed CLI, pydantic for
+the engine factory, ...) are checked as well, as those regressions are easy
+to miss in noisy timings. Exits with status 1 when anything is over.
+
+    python -m benchmarks.bench_import --runs 7
+    python -m benchmarks.bench_import myapp.seed --top 15
+    python -m benchmarks.bench_import --scale 2  # slow machine
+"""
+from __future__ import annotations
+
+import argparse
+import subprocess
+import sys
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+# Cumulative import time in ms. Most of it is SQLAlchemy itself (~300 ms here),
+# the budgets leave headroom for a noisy machine
+BUDGET_MS = {
+    "myapp": 25,
+    "myapp.settings": 120,
+    "myapp.models": 550,
+    "myapp.engine": 550,
+    "myapp.orders": 600,
+    "myapp.seed": 600,
+    "myapp.export": 650,
+    "myapp.product_import": 700,
+}
+
+# module -> packages its import must not load
+MUST_NOT_IMPORT = {
+    "myapp": ("sqlalchemy", "pydantic"),
+    "myapp.models": ("pytz", "pydantic", "faker"),
+    "myapp.engine": ("pydantic",),
+    "myapp.seed": ("faker", "pydantic"),
+}
+
+
+@dataclass
+class Timing:
+    module: str
+    # Cumulative microseconds, per imported module, of the fastest run
+    modules: dict[str, int]
+    self_us: dict[str, int]
+
+    @property
+    def total_ms(self) -> float:
+        return self.modules[self.module] / 1_000
+
+
+def import_time(module: str, runs: int) -> Timing:
+    best: Optional[Timing] = None
+    for _ in range(runs):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        cumulative, self_us = {}, {}
+        for line in completed.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if not line.startswith("import time:") or "[us]" in line:
+                continue
+            own, total, name = line[len("import time:") :].split("|")
+            cumulative[name.strip()] = int(total)
+            self_us[name.strip()] = int(own)
+        timing = Timing(module, cumulative, self_us)
+        if best is None or timing.total_ms < best.total_ms:
+            best = timing
+    assert best is not None
+    return best
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("modules", nargs="*", default=list(BUDGET_MS))
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="multiplier of every budget"
+    )
+    parser.add_argument(
+        "--top", type=int, default=0, help="also list the slowest imports by self time"
+    )
+    args = parser.parse_args(argv)
+
+    over = []
+    print(f"{'module':<24} {'import ms':>10} {'budget ms':>10}")
+    for module in args.modules:
+        timing = import_time(module, args.runs)
+        budget = BUDGET_MS.get(module)
+        limit = budget * args.scale if budget is not None else None
+        shown = f"{limit:>10.0f}" if limit is not None else f"{'-':>10}"
+        flag = "  OVER" if limit is not None and timing.total_ms > limit else ""
+        print(f"{module:<24} {timing.total_ms:>10.1f} {shown}{flag}")
+        if flag:
+            over.append(f"{module}: {timing.total_ms:.0f} ms > {limit:.0f} ms")
+        for package in MUST_NOT_IMPORT.get(module, ()):
+            if package in timing.modules:
+                over.append(f"{module}: imports {package}")
+        if args.top:
+            slowest = sorted(timing.self_us.items(), key=lambda item: -item[1])
+            for name, own in slowest[: args.top]:
+                print(f"{'':<4}{name:<40} {own / 1_000:>8.1f} ms self")
+
+    for line in over:
+        print(f"OVER BUDGET {line}", file=sys.stderr)
+    return 1 if over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Relationship loads with and without the FK/association indexes.
+
+Two SQLite files are seeded with the same rows, one from the current models
+and one from a copy of ``Base.metadata`` stripped of every secondary index and
+unique constraint (the schema before revision 7a3c9e1f4b2d).
+
+    python -m benchmarks.bench_indexes --customers 20000 --samples 300
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.common import seeded_engine, timed
+from myapp.models import Base, CustomerOrm, OrderOrm, ProductOrm, TagOrm
+
+
+def without_indexes(metadata: sa.MetaData) -> sa.MetaData:
+    stripped = sa.MetaData()
+    for table in metadata.sorted_tables:
+        copy = table.to_metadata(stripped)
+        copy.indexes.clear()
+        for constraint in list(copy.constraints):
+            if isinstance(constraint, sa.UniqueConstraint):
+                copy.constraints.discard(constraint)
+        for column in copy.columns:
+            column.index = None
+    return stripped
+
+
+def loads(
+    session: Session, ids: dict[str, list[int]]
+) -> dict[str, Callable[[], Any]]:
+    def customer_orders() -> None:
+        for id_ in ids["customers"]:
+            session.get(CustomerOrm, id_).orders  # type: ignore[union-attr]
+
+    def customer_addresses() -> None:
+        for id_ in ids["customers"]:
+            session.get(CustomerOrm, id_).addresses  # type: ignore[union-attr]
+
+    def order_products() -> None:
+        for id_ in ids["orders"]:
+            session.get(OrderOrm, id_).products  # type: ignore[union-attr]
+
+    def product_tags() -> None:
+        for id_ in ids["products"]:
+            session.get(ProductOrm, id_).tags  # type: ignore[union-attr]
+
+    def tag_products() -> None:
+        for id_ in ids["tags"]:
+            session.get(TagOrm, id_).products  # type: ignore[union-attr]
+
+    def order_history() -> None:
+        statement = (
+            sa.select(CustomerOrm)
+            .where(CustomerOrm.id.in_(ids["customers"]))
+            .options(*CustomerOrm.load_profile("order_history"))
+        )
+        session.scalars(statement).unique().all()
+
+    return dict(
+        zip(
+            LOADS,
+            (
+                customer_orders,
+                customer_addresses,
+                order_products,
+                product_tags,
+                tag_products,
+                order_history,
+            ),
+        )
+    )
+
+
+LOADS = (
+    "customer.orders",
+    "customer.addresses",
+    "order.products",
+    "product.tags",
+    "tag.products",
+    "order_history profile",
+)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--samples", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    engines = {
+        "before": seeded_engine(
+            args.customers, metadata=without_indexes(Base.metadata)
+        ),
+        "after": seeded_engine(args.customers),
+    }
+
+    rng = random.Random(0)
+    with engines["after"].connect() as connection:
+        ids = {}
+        for name, model in (
+            ("customers", CustomerOrm),
+            ("orders", OrderOrm),
+            ("products", ProductOrm),
+            ("tags", TagOrm),
+        ):
+            population = connection.execute(sa.select(model.id)).scalars().all()
+            ids[name] = rng.sample(population, min(args.samples, len(population)))
+
+    timings: dict[str, dict[str, float]] = {}
+    for label, engine in engines.items():
+        for name in LOADS:
+            best = float("inf")
+            # One warm-up run, then the best of --repeat
+            for _ in range(args.repeat + 1):
+                # Fresh session per run so the identity map does not help
+                with Session(engine) as session, timed() as timer:
+                    loads(session, ids)[name]()
+                best = min(best, timer.seconds * 1_000)
+            timings.setdefault(name, {})[label] = best
+
+    print(f"{'load':<24} {'before ms':>12} {'after ms':>12} {'speedup':>9}")
+    for name, result in timings.items():
+        speedup = result["before"] / result["after"] if result["after"] else 0.0
+        print(
+            f"{name:<24} {result['before']:>12.1f} {result['after']:>12.1f} "
+            f"{speedup:>8.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""Orders/sec of ``place_orders`` against the ORM-per-object path.
+
+Runs against a copy of the seeded database, so the cached file is untouched.
+
+    python -m benchmarks.bench_orders --orders 5000 --batch-size 500
+"""
+from __future__ import annotations
+
+import argparse
+import random
+from datetime import datetime
+from typing import Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.common import report, scratch_copy, seeded_engine, timed
+from myapp.idblocks import IdAllocator
+from myapp.instrumentation import capture
+from myapp.models import TIMEZONE, OrderOrm, ProductOrm, QuantityOrm
+from myapp.orders import NewOrder, OrderLine, invoice_number, place_orders
+
+
+def make_batch(
+    orders: int, customers: int, products: int, lines: int, seed: int = 0
+) -> list[NewOrder]:
+    rng = random.Random(seed)
+    return [
+        NewOrder(
+            customer_id=rng.randint(1, customers),
+            lines=[
+                OrderLine(product_id, rng.randint(1, 5))
+                for product_id in rng.sample(range(1, products + 1), lines)
+            ],
+        )
+        for _ in range(orders)
+    ]
+
+
+def orm_per_object(session: Session, batch: Sequence[NewOrder]) -> None:
+    """The notebook's way: order + products set, flush, quantities, commit."""
+    for new in batch:
+        order = OrderOrm(
+            customer_id=new.customer_id,
+            invoice_no=invoice_number(datetime.now(tz=TIMEZONE)),
+        )
+        # Loading a product must not flush the order it is being added to
+        with session.no_autoflush:
+            for line in new.lines:
+                order.products.add(session.get_one(ProductOrm, line.product_id))
+        session.add(order)
+        session.flush()
+        for line in new.lines:
+            session.add(
+                QuantityOrm(qty=line.qty, product_id=line.product_id, order_id=order.id)
+            )
+        session.commit()
+
+
+def orm_one_commit(session: Session, batch: Sequence[NewOrder]) -> None:
+    """ORM objects for the whole batch with relationships, one commit."""
+    with session.no_autoflush:
+        for new in batch:
+            order = OrderOrm(
+                customer_id=new.customer_id,
+                invoice_no=invoice_number(datetime.now(tz=TIMEZONE)),
+            )
+            for line in new.lines:
+                order.products.add(session.get_one(ProductOrm, line.product_id))
+                order.quantities.append(
+                    QuantityOrm(qty=line.qty, product_id=line.product_id)
+                )
+            session.add(order)
+    session.commit()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=5_000)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args(argv)
+
+    source = seeded_engine(args.customers)
+    with source.connect() as connection:
+        products = connection.scalar(sa.select(sa.func.count()).select_from(ProductOrm))
+
+    batch = make_batch(args.orders, args.customers, products or 1, args.lines)
+
+    def placed_in_batches(session: Session, batch: Sequence[NewOrder]) -> None:
+        for start in range(0, len(batch), args.batch_size):
+            place_orders(session, batch[start : start + args.batch_size])
+            session.commit()
+
+    def placed_with_ids(session: Session, batch: Sequence[NewOrder]) -> None:
+        engine = session.get_bind()
+        assert isinstance(engine, sa.Engine)
+        ids = IdAllocator(engine, block_size=args.batch_size)
+        for start in range(0, len(batch), args.batch_size):
+            place_orders(session, batch[start : start + args.batch_size], ids)
+            session.commit()
+
+    paths: dict[str, Callable[[Session, Sequence[NewOrder]], None]] = {
+        "orm per object": orm_per_object,
+        "orm, one commit": orm_one_commit,
+        f"place_orders ({args.batch_size}/batch)": placed_in_batches,
+        "place_orders, client-side ids": placed_with_ids,
+    }
+    with scratch_copy(source) as engine:
+        for name, place in paths.items():
+            with Session(engine) as session, capture(session) as stats:
+                with timed() as timer:
+                    place(session, batch)
+            report(name, len(batch), timer.seconds, unit="orders")
+            print(f"{'':<36} {stats.count:>10,} statements")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,75 @@
+"""Cost of the outbox on writes, and throughput and lag of its relay.
+
+Places the same orders with and without change records (ORM flushes with
+``outbox.install()``, ``place_orders(..., outbox=True)``), then drains the
+records with a relay per batch size. Runs against a copy of the seeded
+database, so the cached file is untouched.
+
+    python -m benchmarks.bench_outbox --orders 2000 --relay-batch 100 --relay-batch 1000
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.bench_orders import make_batch, orm_one_commit
+from benchmarks.common import report, scratch_copy, seeded_engine, timed
+from myapp import outbox
+from myapp.models import ProductOrm, outbox_tbl
+from myapp.orders import place_orders
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--orders", type=int, default=2_000)
+    parser.add_argument("--lines", type=int, default=3)
+    parser.add_argument(
+        "--relay-batch", type=int, action="append", help="repeatable, default 500"
+    )
+    args = parser.parse_args(argv)
+
+    source = seeded_engine(args.customers)
+    with source.connect() as connection:
+        products = connection.scalar(sa.select(sa.func.count()).select_from(ProductOrm))
+    batch = make_batch(args.orders, args.customers, products or 1, args.lines)
+
+    with scratch_copy(source) as engine:
+        for recorded in (False, True):
+            suffix = ", outbox" if recorded else ""
+            if recorded:
+                outbox.install()
+            try:
+                with Session(engine) as session, timed() as timer:
+                    orm_one_commit(session, batch)
+                report(f"orm, one commit{suffix}", len(batch), timer.seconds, "orders")
+            finally:
+                outbox.uninstall()
+            with Session(engine) as session, timed() as timer:
+                place_orders(session, batch, outbox=recorded)
+                session.commit()
+            report(f"place_orders{suffix}", len(batch), timer.seconds, "orders")
+
+        # Every run drains a full outbox: put the records back each time. The
+        # lags shown are then the records' age since the placing above
+        with engine.connect() as connection:
+            records = [
+                row._asdict() for row in connection.execute(sa.select(outbox_tbl))
+            ]
+        for size in args.relay_batch or [outbox.DEFAULT_BATCH_SIZE]:
+            with engine.begin() as connection:
+                connection.execute(sa.delete(outbox_tbl))
+                connection.execute(sa.insert(outbox_tbl), records)
+            relay = outbox.Relay(engine, lambda changes: None, batch_size=size)
+            with timed() as timer:
+                delivered = relay.drain()
+            report(f"relay, {size}/batch", delivered, timer.seconds, "records")
+            print(f"{'':<36} {relay.metrics.summary()}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
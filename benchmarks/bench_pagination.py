@@ -0,0 +1,88 @@
+"""Per-page latency of OFFSET versus keyset pagination at increasing depth.
+
+    python -m benchmarks.bench_pagination --customers 100000 --pages 1 100 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import statistics
+import time
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.common import seeded_engine
+from myapp.models import OrderOrm
+from myapp.pagination import encode_cursor, paginate
+
+
+def median_ms(run: Callable[[], Any], repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        began = time.perf_counter()
+        run()
+        timings.append((time.perf_counter() - began) * 1_000)
+    return statistics.median(timings)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=100_000)
+    parser.add_argument("--db", default=None, help="sqlite file to seed/reuse")
+    parser.add_argument("--page-size", type=int, default=20)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 100, 1_000, 10_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    engine = seeded_engine(args.customers, args.db)
+    orderings = {
+        "id": [sa.desc(OrderOrm.id)],
+        "created_at, id": [sa.desc(OrderOrm.created_at), sa.desc(OrderOrm.id)],
+    }
+
+    with Session(engine) as session:
+        for name, order_by in orderings.items():
+            print(f"order by {name}")
+            for page in args.pages:
+                offset = (page - 1) * args.page_size
+                key_columns = [clause.element for clause in order_by]
+                previous = session.execute(
+                    sa.select(*key_columns)
+                    .order_by(*order_by)
+                    .offset(max(offset - 1, 0))
+                    .limit(1)
+                ).first()
+                if previous is None:
+                    print(f"  page {page:>7,}: beyond the seeded data")
+                    continue
+                cursor = encode_cursor(list(previous)) if offset else None
+
+                def by_offset() -> Any:
+                    statement = (
+                        sa.select(OrderOrm)
+                        .order_by(*order_by)
+                        .offset(offset)
+                        .limit(args.page_size)
+                    )
+                    return session.scalars(statement).all()
+
+                def by_keyset() -> Any:
+                    return paginate(
+                        session,
+                        sa.select(OrderOrm),
+                        order_by=order_by,
+                        limit=args.page_size,
+                        cursor=cursor,
+                    )
+
+                print(
+                    f"  page {page:>7,}: offset {median_ms(by_offset, args.repeat):>9.2f} ms"
+                    f"   keyset {median_ms(by_keyset, args.repeat):>9.2f} ms"
+                )
+                session.expunge_all()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,82 @@
+"""Time and memory to materialize rows as ORM instances versus read models.
+
+Rows come from ``product_order_quantities`` (the largest table: customers x
+orders x lines), so 1M rows needs a database of ~170k customers:
+
+    python -m benchmarks.bench_read_models --customers 170000 --rows 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import tracemalloc
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.common import report, seeded_engine, timed
+from myapp.models import QuantityOrm
+from myapp.readmodels import QuantityRead, load_read, read_select
+
+
+def retained_bytes(load: Callable[[], list[Any]]) -> tuple[int, list[Any]]:
+    """Bytes still allocated once ``load`` returned, i.e. held by its result."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        items = load()
+        gc.collect()
+        return tracemalloc.get_traced_memory()[0] - before, items
+    finally:
+        tracemalloc.stop()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument("--db", default=None, help="sqlite file to seed/reuse")
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args(argv)
+
+    engine = seeded_engine(args.customers, args.db)
+
+    def orm() -> list[Any]:
+        # The session has to outlive the load, the identity map is part of the cost
+        statement = sa.select(QuantityOrm).order_by(QuantityOrm.id).limit(args.rows)
+        return list(session.scalars(statement))
+
+    def rows() -> list[Any]:
+        statement = read_select(QuantityRead).order_by(QuantityOrm.id).limit(args.rows)
+        return list(connection.execute(statement))
+
+    def read_models() -> list[Any]:
+        statement = read_select(QuantityRead).order_by(QuantityOrm.id).limit(args.rows)
+        return load_read(connection, QuantityRead, statement)
+
+    results = {}
+    loads = {"orm instances": orm, "core rows": rows, "read models": read_models}
+    for name, load in loads.items():
+        with Session(engine) as session, engine.connect() as connection:
+            with timed() as timer:
+                items = load()
+            del items
+            session.expunge_all()
+            size, items = retained_bytes(load)
+        results[name] = (timer.seconds, size / max(len(items), 1))
+        report(name, len(items), timer.seconds)
+
+    print()
+    print(f"{'':<16} {'bytes/row':>10} {'time vs orm':>12} {'memory vs orm':>14}")
+    orm_time, orm_bytes = results["orm instances"]
+    for name, (seconds, per_row) in results.items():
+        print(
+            f"{name:<16} {per_row:>10,.0f} {orm_time / seconds:>11.1f}x "
+            f"{orm_bytes / per_row:>13.1f}x"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,51 @@
+"""CustomerFull serialization: ``from_orm`` versus the Core row paths.
+
+    python -m benchmarks.bench_serialization --customers 20000
+"""
+from __future__ import annotations
+
+import argparse
+from typing import Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.common import report, seeded_engine, timed
+from myapp.models import CustomerOrm
+from myapp.schemas import CustomerFull
+from myapp.serializers import iter_customers_full
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--customers", type=int, default=10_000)
+    parser.add_argument("--db", default=None, help="sqlite file to seed/reuse")
+    args = parser.parse_args(argv)
+
+    engine = seeded_engine(args.customers, args.db)
+
+    with Session(engine) as session, timed() as timer:
+        customers = session.scalars(sa.select(CustomerOrm)).all()
+        items = [CustomerFull.from_orm(customer) for customer in customers]
+    report("from_orm (lazy addresses)", len(items), timer.seconds)
+
+    with Session(engine) as session, timed() as timer:
+        statement = sa.select(CustomerOrm).options(
+            *CustomerOrm.load_profile("with_addresses")
+        )
+        customers = session.scalars(statement).all()
+        items = [CustomerFull.from_orm(customer) for customer in customers]
+    report("from_orm (joinedload)", len(items), timer.seconds)
+
+    with engine.connect() as connection, timed() as timer:
+        items = list(iter_customers_full(connection, validate=True))
+    report("core rows, validated", len(items), timer.seconds)
+
+    with engine.connect() as connection, timed() as timer:
+        items = list(iter_customers_full(connection))
+    report("core rows, construct", len(items), timer.seconds)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,95 @@
+"""Helpers shared by the benchmark scripts."""
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.dialects import sqlite
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from myapp.models import TIMEZONE, Base
+from myapp.seed import SeedPlan, seed
+
+# Fixed so every cached benchmark database holds the same rows
+SEED_ANCHOR = datetime(2026, 1, 1, tzinfo=TIMEZONE)
+
+
+def schema_tag(metadata: sa.MetaData = Base.metadata) -> str:
+    """Short hash of the SQLite DDL of ``metadata``, so a cached database is
+    not reused once the models change."""
+    dialect = sqlite.dialect()
+    ddl = [
+        str(statement.compile(dialect=dialect))
+        for table in metadata.sorted_tables
+        for statement in (
+            CreateTable(table),
+            *(CreateIndex(index) for index in sorted(table.indexes, key=str)),
+        )
+    ]
+    return hashlib.sha1("\n".join(ddl).encode()).hexdigest()[:10]
+
+
+def seeded_engine(
+    customers: int = 10_000,
+    path: Optional[str] = None,
+    metadata: sa.MetaData = Base.metadata,
+) -> sa.Engine:
+    """Engine on a seeded SQLite file, reused between runs of the same size
+    and schema. The same seed is used every time so files are comparable."""
+    path = path or os.path.join(
+        tempfile.gettempdir(),
+        f"myapp_bench_{customers}_{schema_tag(metadata)}.sqlite",
+    )
+    engine = sa.create_engine(f"sqlite:///{path}")
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        metadata.create_all(engine)
+        seed(
+            engine,
+            SeedPlan(customers=customers),
+            seed=0,
+            chunk_size=10_000,
+            anchor=SEED_ANCHOR,
+        )
+    return engine
+
+
+@contextmanager
+def scratch_copy(engine: sa.Engine) -> Iterator[sa.Engine]:
+    """Engine on a throwaway copy of ``engine``'s SQLite file, for benchmarks
+    that write and must leave the cached database untouched."""
+    assert engine.url.database, "scratch_copy needs a file database"
+    directory = tempfile.mkdtemp()
+    copy = os.path.join(directory, os.path.basename(engine.url.database))
+    shutil.copyfile(engine.url.database, copy)
+    scratch = sa.create_engine(f"sqlite:///{copy}")
+    try:
+        yield scratch
+    finally:
+        scratch.dispose()
+        shutil.rmtree(directory)
+
+
+class Timer:
+    seconds: float = 0.0
+
+
+@contextmanager
+def timed() -> Iterator[Timer]:
+    timer = Timer()
+    began = time.perf_counter()
+    try:
+        yield timer
+    finally:
+        timer.seconds = time.perf_counter() - began
+
+
+def report(name: str, items: int, seconds: float, unit: str = "rows") -> None:
+    rate = items / seconds if seconds else 0.0
+    print(f"{name:<36} {items:>10,} {unit} {seconds:>8.3f}s {rate:>12,.0f} {unit}/s")
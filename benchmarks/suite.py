@@ -0,0 +1,345 @@
+"""Benchmark suite of the data layer's hot paths.
+
+Every case repeats one operation (a batch insert, one graph load, ...) on a
+scratch copy of the seeded SQLite database and reports throughput and the
+p50/p95/p99 latency of the operation. Results can be saved as a JSON
+baseline and later runs compared against it; a case whose throughput drops,
+or whose p95 rises, by more than ``--threshold`` is flagged and the run
+exits with status 1.
+
+    python -m benchmarks.suite --save baseline.json
+    python -m benchmarks.suite --compare baseline.json --threshold 0.3
+    python -m benchmarks.suite -k graph -k filter --ops 3
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from datetime import timedelta
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from benchmarks.common import SEED_ANCHOR, scratch_copy, seeded_engine
+from myapp.filters import apply_filters
+from myapp.idblocks import IdAllocator
+from myapp.instrumentation import percentile
+from myapp.models import AddressOrm, CustomerOrm, OrderOrm
+from myapp.orders import NewOrder, OrderLine, place_orders
+from myapp.product_import import upsert_products, validate_batch
+from myapp.serializers import iter_customers_full, select_customers_full
+
+DEFAULT_THRESHOLD = 0.2
+DATA_JSON = "data.json"
+
+Operation = Callable[[int], None]
+
+
+@dataclass
+class Env:
+    engine: sa.Engine
+    customers: int
+    products: int
+    rng: random.Random
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    unit: str
+    # Items one operation handles, e.g. rows inserted
+    items: int
+    # Default number of timed operations
+    ops: int
+    setup: Callable[[Env], Operation]
+
+
+CASES: list[Case] = []
+
+
+def case(name: str, unit: str, items: int, ops: int) -> Callable[..., Any]:
+    def register(setup: Callable[[Env], Operation]) -> Callable[[Env], Operation]:
+        CASES.append(Case(name, unit, items, ops, setup))
+        return setup
+
+    return register
+
+
+@case("bulk_insert_customers", "customers", items=500, ops=20)
+def bulk_insert(env: Env) -> Operation:
+    """Customers with their address, client-side ids, two executemany."""
+    ids = IdAllocator(env.engine, block_size=5_000)
+    customers_tbl, addresses_tbl = CustomerOrm.__table__, AddressOrm.__table__
+
+    def run(i: int) -> None:
+        customer_ids = ids.take("customers", 500)
+        address_ids = ids.take("addresses", 500)
+        with env.engine.begin() as connection:
+            connection.execute(
+                sa.insert(customers_tbl),
+                [
+                    {
+                        "id": id_,
+                        "name": f"Bench {id_}",
+                        "contact_number": f"+880 17{id_:08d}",
+                        "is_active": True,
+                    }
+                    for id_ in customer_ids
+                ],
+            )
+            connection.execute(
+                sa.insert(addresses_tbl),
+                [
+                    {
+                        "id": address_id,
+                        "customer_id": customer_id,
+                        "present_address": f"{customer_id} Road, Dhaka",
+                        "permenent_address": f"{customer_id} Road, Dhaka",
+                    }
+                    for address_id, customer_id in zip(address_ids, customer_ids)
+                ],
+            )
+
+    return run
+
+
+@case("place_orders", "orders", items=100, ops=20)
+def order_placement(env: Env) -> Operation:
+    """Orders with three products and their quantities."""
+
+    def run(i: int) -> None:
+        batch = [
+            NewOrder(
+                customer_id=env.rng.randint(1, env.customers),
+                lines=[
+                    OrderLine(product_id, env.rng.randint(1, 5))
+                    for product_id in env.rng.sample(range(1, env.products + 1), 3)
+                ],
+            )
+            for _ in range(100)
+        ]
+        with Session(env.engine) as session:
+            place_orders(session, batch)
+            session.commit()
+
+    return run
+
+
+@case("graph_load", "customers", items=1, ops=300)
+def graph_load(env: Env) -> Operation:
+    """customer -> orders -> products (tags, categories) and quantities."""
+    statement = sa.select(CustomerOrm).options(
+        *CustomerOrm.load_profile("order_history")
+    )
+
+    def run(i: int) -> None:
+        with Session(env.engine) as session:
+            customer_id = env.rng.randint(1, env.customers)
+            session.scalars(
+                statement.where(CustomerOrm.id == customer_id)
+            ).unique().one()
+
+    return run
+
+
+@case("filter_query", "queries", items=1, ops=300)
+def filter_query(env: Env) -> Operation:
+    """Dynamic field:op:value filters over orders, one page of results."""
+    since = (SEED_ANCHOR - timedelta(days=180)).date().isoformat()
+
+    def run(i: int) -> None:
+        first = env.rng.randint(1, max(env.customers - 500, 1))
+        statement = apply_filters(
+            sa.select(OrderOrm),
+            OrderOrm,
+            [
+                f"customer_id:range:{first}..{first + 500}",
+                f"created_at:ge:{since}",
+                "invoice_no:prefix:INV-2025",
+            ],
+        )
+        with Session(env.engine) as session:
+            session.scalars(statement.order_by(OrderOrm.id).limit(50)).all()
+
+    return run
+
+
+@case("customer_full", "customers", items=1_000, ops=20)
+def customer_full(env: Env) -> Operation:
+    """CustomerFull schemas validated from Core rows."""
+
+    def run(i: int) -> None:
+        first = env.rng.randint(1, max(env.customers - 1_000, 1))
+        statement = select_customers_full().where(
+            CustomerOrm.id.between(first, first + 999)
+        )
+        with env.engine.connect() as connection:
+            for _ in iter_customers_full(connection, statement, validate=True):
+                pass
+
+    return run
+
+
+@case("json_import", "products", items=200, ops=20)
+def json_import(env: Env) -> Operation:
+    """data.json shaped product documents, validated and upserted."""
+    with open(DATA_JSON) as f:
+        template = json.load(f)
+    categories = ["fragrances", "skincare", "groceries", "laptops", "lighting"]
+
+    def run(i: int) -> None:
+        batch = []
+        for line in range(200):
+            document = dict(
+                template,
+                id=env.rng.randint(1, 50_000),
+                category=env.rng.choice(categories),
+                tags=env.rng.sample(["new", "sale", "eco", "gift", "bulk"], 2),
+            )
+            batch.append((line, json.dumps(document)))
+        validated = validate_batch(batch)
+        with env.engine.connect() as connection:
+            upsert_products(connection, validated.products, {}, {})
+            connection.commit()
+
+    return run
+
+
+@dataclass
+class Result:
+    name: str
+    unit: str
+    items: int
+    seconds: float
+    throughput: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+
+def run_case(case: Case, env: Env, ops: int, warmup: int) -> Result:
+    operation = case.setup(env)
+    for i in range(warmup):
+        operation(i)
+    latencies = []
+    for i in range(ops):
+        began = time.perf_counter()
+        operation(i)
+        latencies.append(time.perf_counter() - began)
+    latencies.sort()
+    seconds = sum(latencies)
+    items = case.items * ops
+    return Result(
+        name=case.name,
+        unit=case.unit,
+        items=items,
+        seconds=seconds,
+        throughput=items / seconds if seconds else 0.0,
+        p50_ms=percentile(latencies, 50) * 1_000,
+        p95_ms=percentile(latencies, 95) * 1_000,
+        p99_ms=percentile(latencies, 99) * 1_000,
+    )
+
+
+def regressions(
+    results: Sequence[Result], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """Cases slower than ``baseline`` by more than ``threshold`` (0.15 = 15%)."""
+    found = []
+    previous = {entry["name"]: entry for entry in baseline["results"]}
+    for result in results:
+        before = previous.get(result.name)
+        if before is None:
+            continue
+        if result.throughput < before["throughput"] * (1 - threshold):
+            found.append(
+                f"{result.name}: throughput {before['throughput']:,.0f} -> "
+                f"{result.throughput:,.0f} {result.unit}/s"
+            )
+        if result.p95_ms > before["p95_ms"] * (1 + threshold):
+            found.append(
+                f"{result.name}: p95 {before['p95_ms']:.2f} -> {result.p95_ms:.2f} ms"
+            )
+    return found
+
+
+def print_results(results: Sequence[Result]) -> None:
+    print(f"{'case':<24} {'throughput':>18} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for result in results:
+        rate = f"{result.throughput:,.0f} {result.unit}/s"
+        print(
+            f"{result.name:<24} {rate:>18} {result.p50_ms:>9.2f} "
+            f"{result.p95_ms:>9.2f} {result.p99_ms:>9.2f}"
+        )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--customers", type=int, default=20_000)
+    parser.add_argument(
+        "-k",
+        dest="only",
+        action="append",
+        default=[],
+        help="run the cases whose name contains this",
+    )
+    parser.add_argument(
+        "--ops",
+        type=float,
+        default=1.0,
+        help="multiplier of every case's operation count",
+    )
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--save", default=None, help="write the results as JSON")
+    parser.add_argument("--compare", default=None, help="baseline JSON to compare with")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    cases = [c for c in CASES if not args.only or any(k in c.name for k in args.only)]
+    source = seeded_engine(args.customers)
+    with source.connect() as connection:
+        products = connection.scalar(
+            sa.select(sa.func.count()).select_from(sa.table("products"))
+        )
+
+    results = []
+    with scratch_copy(source) as engine:
+        for benchmark in cases:
+            env = Env(engine, args.customers, products or 1, random.Random(args.seed))
+            ops = max(int(benchmark.ops * args.ops), 1)
+            results.append(run_case(benchmark, env, ops, args.warmup))
+    print_results(results)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(
+                {
+                    "customers": args.customers,
+                    "python": platform.python_version(),
+                    "sqlalchemy": sa.__version__,
+                    "results": [asdict(result) for result in results],
+                },
+                f,
+                indent=2,
+            )
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        found = regressions(results, baseline, args.threshold)
+        for line in found:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if found:
+            return 1
+        print(f"no regressions beyond {args.threshold:.0%} against {args.compare}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
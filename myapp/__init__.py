@@ -0,0 +1,68 @@
+"""Data layer of the notebook playground.
+
+Importing ``myapp`` is cheap: the names below are resolved from their module
+on first access, so ``import myapp`` does not load SQLAlchemy, pydantic or
+Faker until something uses them.
+
+    import myapp
+
+    engine = myapp.create_engine()
+    myapp.configure()  # mappers, before forking workers
+"""
+from __future__ import annotations
+
+import importlib
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from myapp.engine import create_engine, pool_metrics
+    from myapp.models import (
+        AddressOrm,
+        Base,
+        CategoryOrm,
+        CustomerOrm,
+        OrderOrm,
+        ProductOrm,
+        QuantityOrm,
+        TagOrm,
+        configure,
+    )
+    from myapp.orders import NewOrder, OrderLine, place_orders
+    from myapp.settings import DatabaseSettings, get_settings
+
+# name -> module it is imported from
+_LAZY = {
+    "create_engine": "myapp.engine",
+    "pool_metrics": "myapp.engine",
+    "AddressOrm": "myapp.models",
+    "Base": "myapp.models",
+    "CategoryOrm": "myapp.models",
+    "CustomerOrm": "myapp.models",
+    "OrderOrm": "myapp.models",
+    "ProductOrm": "myapp.models",
+    "QuantityOrm": "myapp.models",
+    "TagOrm": "myapp.models",
+    "configure": "myapp.models",
+    "NewOrder": "myapp.orders",
+    "OrderLine": "myapp.orders",
+    "place_orders": "myapp.orders",
+    "DatabaseSettings": "myapp.settings",
+    "get_settings": "myapp.settings",
+}
+
+__all__ = sorted(_LAZY)
+
+
+def __getattr__(name: str) -> Any:
+    try:
+        module = _LAZY[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    value = getattr(importlib.import_module(module), name)
+    # Cached on the package, __getattr__ is only called for missing names
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted(set(globals()) | set(_LAZY))
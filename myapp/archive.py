@@ -0,0 +1,359 @@
+"""Time-partitioned archive of old orders.
+
+Orders older than ``MYAPP_DB_ARCHIVE_AFTER_DAYS`` move, with their
+``product_order_assoc`` and quantity rows, out of the hot tables into one set
+of tables per month of ``created_at``:
+
+    orderes_2025_03, product_order_assoc_2025_03, product_order_quantities_2025_03
+
+Each batch of ``batch_size`` orders (oldest first, on
+``ix_orderes_created_at_id``) is copied and deleted in one transaction; the
+orders are read with FOR UPDATE so no line is added to them meanwhile, and a
+batch whose copied and deleted row counts differ is rolled back. An order is
+never split between the hot and the archive tables.
+
+    archive = OrderArchive(engine)
+    archive.run()                                   # until nothing is old enough
+
+    python -m myapp.archive run --days 365 --batch-size 1000
+    python -m myapp.archive months
+
+Reads see the hot tables only, unless asked: the facade unions the hot table
+with the archived months overlapping ``[since, until)``.
+
+    Orders = archive.order_entity(since=datetime(2025, 1, 1, tzinfo=TIMEZONE))
+    session.scalars(
+        sa.select(Orders).where(Orders.customer_id == 42).order_by(Orders.id.desc())
+    )
+
+Relationships of such an order (``quantities``, ``products``) load from the
+hot tables, join ``archive.quantities()`` / ``archive.order_products()``
+instead. Archiving writes no outbox records: the orders themselves did not
+change.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+import time
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from typing import Any, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import aliased
+from sqlalchemy.orm.util import AliasedClass
+
+from myapp.models import OrderOrm, QuantityOrm, now, product_order_assoc_tbl
+
+orders_tbl: sa.Table = OrderOrm.__table__  # type: ignore[assignment]
+quantities_tbl: sa.Table = QuantityOrm.__table__  # type: ignore[assignment]
+
+# Copied parents first, deleted children first
+ARCHIVED = (orders_tbl, product_order_assoc_tbl, quantities_tbl)
+
+# Indexes of the archive tables, by the hot table they copy
+INDEXES: dict[str, tuple[tuple[str, ...], ...]] = {
+    "orderes": (("customer_id", "id"), ("created_at", "id")),
+    "product_order_assoc": (("order_id",),),
+    "product_order_quantities": (("order_id",),),
+}
+
+_ARCHIVE_NAME = re.compile(
+    r"^(orderes|product_order_assoc|product_order_quantities)_(\d{4})_(\d{2})$"
+)
+
+
+def is_archive_table(name: str) -> bool:
+    """Whether ``name`` is a monthly archive table, which alembic ignores."""
+    return _ARCHIVE_NAME.match(name) is not None
+
+
+def include_name(name: Optional[str], type_: str, parent_names: Any) -> bool:
+    """alembic ``include_name`` hook leaving the archive tables to autogenerate
+    and ``python -m myapp.bootstrap check``."""
+    return not (type_ == "table" and name is not None and is_archive_table(name))
+
+
+def month_of(value: datetime) -> date:
+    return date(value.year, value.month, 1)
+
+
+def next_month(month: date) -> date:
+    return date(month.year + month.month // 12, month.month % 12 + 1, 1)
+
+
+def archive_table(table: sa.Table, month: date, metadata: sa.MetaData) -> sa.Table:
+    """Archive table of ``table`` for ``month``: same columns, no identity,
+    no foreign keys (the orders are gone from the hot table)."""
+    name = f"{table.name}_{month:%Y_%m}"
+    if name in metadata.tables:
+        return metadata.tables[name]
+    archived = sa.Table(
+        name,
+        metadata,
+        *(
+            sa.Column(
+                column.name,
+                column.type,
+                primary_key=column.primary_key,
+                nullable=column.nullable,
+                autoincrement=False,
+            )
+            for column in table.c
+        ),
+    )
+    for columns in INDEXES[table.name]:
+        sa.Index(f"ix_{name}_{'_'.join(columns)}", *(archived.c[c] for c in columns))
+    return archived
+
+
+@dataclass
+class ArchiveStats:
+    orders: int = 0
+    order_products: int = 0
+    quantities: int = 0
+    batches: int = 0
+    seconds: float = 0.0
+
+    def add(self, other: ArchiveStats) -> None:
+        self.orders += other.orders
+        self.order_products += other.order_products
+        self.quantities += other.quantities
+        self.batches += other.batches
+        self.seconds += other.seconds
+
+    def summary(self) -> str:
+        rate = self.orders / self.seconds if self.seconds else 0.0
+        return (
+            f"{self.orders} orders ({self.order_products} products, "
+            f"{self.quantities} quantities) in {self.batches} batches, "
+            f"{self.seconds:.2f}s, {rate:.0f} orders/s"
+        )
+
+
+class OrderArchive:
+    def __init__(
+        self,
+        engine: sa.Engine,
+        *,
+        age: Optional[timedelta] = None,
+        batch_size: Optional[int] = None,
+    ) -> None:
+        if age is None or batch_size is None:
+            from myapp.settings import get_settings
+
+            settings = get_settings()
+            if age is None:
+                age = timedelta(days=settings.archive_after_days)
+            if batch_size is None:
+                batch_size = settings.archive_batch_size
+        if batch_size < 1:
+            raise ValueError("batch_size must be positive")
+        self.engine = engine
+        self.age = age
+        self.batch_size = batch_size
+        self.metadata = sa.MetaData()
+        self._months: Optional[list[date]] = None
+
+    def tables(self, month: date) -> tuple[sa.Table, ...]:
+        return tuple(archive_table(table, month, self.metadata) for table in ARCHIVED)
+
+    def months(self) -> list[date]:
+        """Archived months, oldest first; looked up once, ``refresh`` after
+        another process archived."""
+        if self._months is None:
+            names = sa.inspect(self.engine).get_table_names()
+            self._months = sorted(
+                date(int(match[2]), int(match[3]), 1)
+                for match in map(_ARCHIVE_NAME.match, names)
+                if match is not None and match[1] == orders_tbl.name
+            )
+        return self._months
+
+    def refresh(self) -> None:
+        self._months = None
+
+    # Moving
+
+    def archive_batch(self, cutoff: datetime) -> ArchiveStats:
+        """Move the oldest ``batch_size`` orders created before ``cutoff``."""
+        started = time.perf_counter()
+        stats = ArchiveStats()
+        with self.engine.begin() as connection:
+            rows = connection.execute(
+                sa.select(orders_tbl.c.id, orders_tbl.c.created_at)
+                .where(orders_tbl.c.created_at < cutoff)
+                .order_by(orders_tbl.c.created_at, orders_tbl.c.id)
+                .limit(self.batch_size)
+                .with_for_update()
+            ).all()
+            if not rows:
+                return stats
+            by_month: dict[date, list[int]] = {}
+            for id_, created_at in rows:
+                by_month.setdefault(month_of(created_at), []).append(id_)
+            for month, ids in by_month.items():
+                orders, order_products, quantities = self._move(connection, month, ids)
+                stats.orders += orders
+                stats.order_products += order_products
+                stats.quantities += quantities
+        stats.batches = 1
+        stats.seconds = time.perf_counter() - started
+        if self._months is not None:
+            self._months = sorted(set(self._months) | by_month.keys())
+        return stats
+
+    def _move(
+        self, connection: sa.Connection, month: date, ids: list[int]
+    ) -> tuple[int, ...]:
+        """Copy the orders ``ids`` of ``month`` with their lines into the
+        month's tables and delete them; row counts per table."""
+        archived = self.tables(month)
+        self.metadata.create_all(connection, archived, checkfirst=True)
+        copied = []
+        for table, target in zip(ARCHIVED, archived):
+            result = connection.execute(
+                sa.insert(target).from_select(
+                    list(table.c.keys()),
+                    sa.select(table).where(_order_key(table).in_(ids)),
+                )
+            )
+            copied.append(result.rowcount)
+        if copied[0] != len(ids):
+            raise RuntimeError(f"orders of {month:%Y-%m} changed while archiving")
+        for table, count in reversed(list(zip(ARCHIVED, copied))):
+            deleted = connection.execute(
+                sa.delete(table).where(_order_key(table).in_(ids))
+            ).rowcount
+            if deleted != count:
+                raise RuntimeError(
+                    f"{table.name}: copied {count} rows of {month:%Y-%m} but "
+                    f"deleted {deleted}, batch rolled back"
+                )
+        return tuple(copied)
+
+    def run(
+        self, cutoff: Optional[datetime] = None, max_batches: Optional[int] = None
+    ) -> ArchiveStats:
+        """Archive batches until no order is older than the age (or
+        ``cutoff``), or ``max_batches`` ran."""
+        cutoff = cutoff or now() - self.age
+        total = ArchiveStats()
+        while max_batches is None or total.batches < max_batches:
+            stats = self.archive_batch(cutoff)
+            if not stats.batches:
+                break
+            total.add(stats)
+        return total
+
+    # Query facade
+
+    def overlapping(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> list[date]:
+        """Archived months with orders possibly in ``[since, until)``."""
+        return [
+            month
+            for month in self.months()
+            if (since is None or _start(next_month(month), since) > since)
+            and (until is None or _start(month, until) < until)
+        ]
+
+    def _union(
+        self,
+        table: sa.Table,
+        since: Optional[datetime],
+        until: Optional[datetime],
+    ) -> sa.Subquery:
+        hot = sa.select(table)
+        if table is orders_tbl:
+            if since is not None:
+                hot = hot.where(table.c.created_at >= since)
+            if until is not None:
+                hot = hot.where(table.c.created_at < until)
+        selects = [hot]
+        for month in self.overlapping(since, until):
+            archived = archive_table(table, month, self.metadata)
+            select = sa.select(*(archived.c[name] for name in table.c.keys()))
+            if table is orders_tbl:
+                if since is not None:
+                    select = select.where(archived.c.created_at >= since)
+                if until is not None:
+                    select = select.where(archived.c.created_at < until)
+            selects.append(select)
+        if len(selects) == 1:
+            return hot.subquery(table.name)
+        return sa.union_all(*selects).subquery(table.name)
+
+    def orders(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> sa.Subquery:
+        """``orderes`` rows, hot and archived, created in ``[since, until)``."""
+        return self._union(orders_tbl, since, until)
+
+    def order_products(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> sa.Subquery:
+        """``product_order_assoc`` rows, hot and of the archived months
+        overlapping ``[since, until)``; the range only prunes months."""
+        return self._union(product_order_assoc_tbl, since, until)
+
+    def quantities(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> sa.Subquery:
+        """Quantity rows, pruned like ``order_products``."""
+        return self._union(quantities_tbl, since, until)
+
+    def order_entity(
+        self, since: Optional[datetime] = None, until: Optional[datetime] = None
+    ) -> AliasedClass[OrderOrm]:
+        """``OrderOrm`` over ``orders(since, until)``, for ORM queries."""
+        return aliased(OrderOrm, self.orders(since, until), name="orders")
+
+
+def _order_key(table: sa.Table) -> sa.Column[Any]:
+    return table.c.id if table is orders_tbl else table.c.order_id
+
+
+def _start(month: date, like: datetime) -> datetime:
+    """Start of ``month`` comparable with ``like`` (same tzinfo)."""
+    return datetime(month.year, month.month, 1, tzinfo=like.tzinfo)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m myapp.archive", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--url", default=None)
+    commands = parser.add_subparsers(dest="command", required=True)
+    run = commands.add_parser("run", help="archive orders older than --days")
+    run.add_argument("--days", type=int, default=None)
+    run.add_argument("--batch-size", type=int, default=None)
+    run.add_argument("--max-batches", type=int, default=None)
+    commands.add_parser("months", help="list the archived months")
+    args = parser.parse_args(argv)
+
+    from myapp.engine import create_engine
+
+    engine = create_engine(url=args.url) if args.url else create_engine()
+    try:
+        if args.command == "months":
+            archive = OrderArchive(engine)
+            for month in archive.months():
+                print(f"{month:%Y-%m}")
+            return 0
+        archive = OrderArchive(
+            engine,
+            age=timedelta(days=args.days) if args.days else None,
+            batch_size=args.batch_size,
+        )
+        print(archive.run(max_batches=args.max_batches).summary())
+    finally:
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
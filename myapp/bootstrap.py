@@ -0,0 +1,175 @@
+"""Fast database bootstrap from a migrated template.
+
+Running the migrations for every test or tenant database is slow, so the
+schema is built once into a template and cloned from there:
+
+* SQLite: the template is a file, a clone is a copy of it;
+* PostgreSQL: ``CREATE DATABASE <clone> TEMPLATE <template>``.
+
+The template is built by the baseline migration, so a clone is at the
+migration head (``alembic_version`` included) and later revisions apply to it
+as usual.
+
+    python -m myapp.bootstrap template            # build the cached SQLite template
+    python -m myapp.bootstrap clone tenant_42.db  # copy it
+    python -m myapp.bootstrap check               # baseline vs. Base.metadata
+
+``check`` migrates a scratch SQLite database to the head and compares it with
+the models, so a model change without its revision (or the other way round)
+fails it.
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+from typing import Any, Optional, Sequence
+
+import sqlalchemy as sa
+from alembic import command
+from alembic.autogenerate import compare_metadata
+from alembic.config import Config
+from alembic.migration import MigrationContext
+from alembic.script import ScriptDirectory
+
+from myapp.archive import include_name
+from myapp.models import Base
+
+SCRIPT_LOCATION = os.path.join(os.path.dirname(os.path.dirname(__file__)), "alembic")
+
+
+def alembic_config() -> Config:
+    # No ini file: env.py would otherwise reconfigure logging for the process
+    config = Config()
+    config.set_main_option("script_location", SCRIPT_LOCATION)
+    return config
+
+
+def head_revision() -> str:
+    head = ScriptDirectory.from_config(alembic_config()).get_current_head()
+    assert head is not None, "no alembic revisions"
+    return head
+
+
+def migrate(connection: sa.Connection, revision: str = "head") -> None:
+    """Upgrade the database behind ``connection`` to ``revision``."""
+    config = alembic_config()
+    config.attributes["connection"] = connection
+    command.upgrade(config, revision)
+
+
+def template_path(directory: Optional[str] = None) -> str:
+    return os.path.join(
+        directory or tempfile.gettempdir(), f"myapp_template_{head_revision()}.sqlite"
+    )
+
+
+def ensure_template(path: Optional[str] = None) -> str:
+    """SQLite template migrated to the head, built unless it already exists."""
+    path = path or template_path()
+    if os.path.exists(path):
+        return path
+    # Built under a temporary name and renamed, so concurrent builders never
+    # see (or copy) a half migrated file
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, building = tempfile.mkstemp(suffix=".sqlite", dir=directory)
+    os.close(fd)
+    engine = sa.create_engine(f"sqlite:///{building}")
+    try:
+        with engine.begin() as connection:
+            migrate(connection)
+    except BaseException:
+        os.remove(building)
+        raise
+    finally:
+        engine.dispose()
+    os.replace(building, path)
+    return path
+
+
+def clone_sqlite(destination: str, template: Optional[str] = None) -> str:
+    """Copy of the template at ``destination``; returns its URL."""
+    shutil.copyfile(template or ensure_template(), destination)
+    return f"sqlite:///{destination}"
+
+
+def clone_postgresql(engine: sa.Engine, template: str, name: str) -> sa.URL:
+    """New database ``name`` copied from the (migrated, idle) ``template``
+    database on ``engine``'s server; returns its URL."""
+    preparer = engine.dialect.identifier_preparer
+    statement = (
+        f"CREATE DATABASE {preparer.quote(name)} "
+        f"TEMPLATE {preparer.quote(template)}"
+    )
+    # CREATE DATABASE can not run inside a transaction
+    autocommit = engine.execution_options(isolation_level="AUTOCOMMIT")
+    with autocommit.connect() as connection:
+        connection.exec_driver_sql(statement)
+    return engine.url.set(database=name)
+
+
+def schema_drift(
+    connection: sa.Connection, metadata: sa.MetaData = Base.metadata
+) -> list[Any]:
+    """Differences between the database schema and ``metadata``, as
+    reported by alembic's autogenerate; empty when they match."""
+    context = MigrationContext.configure(
+        connection,
+        opts={
+            "compare_type": True,
+            "compare_server_default": False,
+            "include_name": include_name,
+        },
+    )
+    return [diff for diff in compare_metadata(context, metadata) if diff]
+
+
+def check_drift(metadata: sa.MetaData = Base.metadata) -> list[Any]:
+    """Migrate a scratch SQLite database to the head and diff it against
+    ``metadata``."""
+    with tempfile.TemporaryDirectory() as directory:
+        engine = sa.create_engine(f"sqlite:///{os.path.join(directory, 'check.db')}")
+        try:
+            with engine.begin() as connection:
+                migrate(connection)
+            with engine.connect() as connection:
+                return schema_drift(connection, metadata)
+        finally:
+            engine.dispose()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m myapp.bootstrap", description=__doc__.split("\n\n")[0]
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+    template = commands.add_parser("template", help="build the SQLite template")
+    template.add_argument("--path", default=None)
+    clone = commands.add_parser("clone", help="copy the SQLite template")
+    clone.add_argument("destination", nargs="+")
+    clone.add_argument("--template", default=None)
+    commands.add_parser("check", help="fail when the migrations and models drift")
+    args = parser.parse_args(argv)
+
+    if args.command == "template":
+        print(ensure_template(args.path))
+    elif args.command == "clone":
+        source = ensure_template(args.template)
+        for destination in args.destination:
+            print(clone_sqlite(destination, source))
+    else:
+        drift = check_drift()
+        for diff in drift:
+            print(diff, file=sys.stderr)
+        if drift:
+            print(f"{len(drift)} differences between the migrations and the models")
+            return 1
+        print(f"migrations at {head_revision()} match the models")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
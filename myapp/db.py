@@ -0,0 +1,90 @@
+"""Asyncio engine/session factory and async access paths for ``myapp.models``.
+
+Lazy loading can not happen under ``await`` (it raises ``MissingGreenlet``),
+so every access path here loads what it returns through a strict
+``load_profile``: anything outside the profile raises immediately instead of
+failing somewhere down the line.
+
+    engine = create_async_engine("sqlite+aiosqlite:///seed.db")
+    sessions = create_session_factory(engine)
+    async with sessions() as session:
+        customer = await get_customer(session, 42)
+"""
+from __future__ import annotations
+
+from typing import Any, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+)
+from sqlalchemy.ext.asyncio import create_async_engine as _create_async_engine
+
+from myapp.models import Base, CustomerOrm, OrderOrm
+
+DEFAULT_ASYNC_URL = "sqlite+aiosqlite:///seed.db"
+
+
+def create_async_engine(url: str = DEFAULT_ASYNC_URL, **kwargs: Any) -> AsyncEngine:
+    """Async engine for ``url``; ``kwargs`` go to SQLAlchemy unchanged."""
+    return _create_async_engine(url, **kwargs)
+
+
+def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSession]:
+    # Attributes expired by commit would need a lazy load to be read again
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def create_all(engine: AsyncEngine) -> None:
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+
+async def get_customer(
+    session: AsyncSession, customer_id: int
+) -> Optional[CustomerOrm]:
+    """Customer with its address."""
+    statement = (
+        sa.select(CustomerOrm)
+        .where(CustomerOrm.id == customer_id)
+        .options(*CustomerOrm.load_profile("with_addresses", strict=True))
+    )
+    return (await session.scalars(statement)).unique().one_or_none()
+
+
+async def get_customer_order_history(
+    session: AsyncSession, customer_id: int
+) -> Optional[CustomerOrm]:
+    """Customer with address, orders, their products and quantities."""
+    statement = (
+        sa.select(CustomerOrm)
+        .where(CustomerOrm.id == customer_id)
+        .options(*CustomerOrm.load_profile("order_history", strict=True))
+    )
+    return (await session.scalars(statement)).unique().one_or_none()
+
+
+async def get_customer_orders(
+    session: AsyncSession, customer_id: int, limit: int = 10
+) -> Sequence[OrderOrm]:
+    """Latest orders of a customer with their products and quantities."""
+    statement = (
+        sa.select(OrderOrm)
+        .where(OrderOrm.customer_id == customer_id)
+        .order_by(sa.desc(OrderOrm.id))
+        .limit(limit)
+        .options(*OrderOrm.load_profile("detail", strict=True))
+    )
+    return (await session.scalars(statement)).unique().all()
+
+
+async def get_order(session: AsyncSession, order_id: int) -> Optional[OrderOrm]:
+    """Order with customer, products (tags, categories) and quantities."""
+    statement = (
+        sa.select(OrderOrm)
+        .where(OrderOrm.id == order_id)
+        .options(*OrderOrm.load_profile("detail", strict=True))
+    )
+    return (await session.scalars(statement)).unique().one_or_none()
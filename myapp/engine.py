@@ -0,0 +1,258 @@
+"""Engine factory with pool settings from ``DatabaseSettings`` and pool metrics.
+
+    engine = create_engine()                      # settings from the environment
+    engine = create_engine(url="sqlite:///seed.db", pool_size=20)
+    ...
+    print(pool_metrics(engine).summary())
+
+The pool records checkouts, how long each one waited for a connection,
+timeouts and overflow connections, which is what shows a starved pool:
+rising wait percentiles and timeouts while ``in_use`` sits at the limit.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, Optional
+
+import sqlalchemy as sa
+from sqlalchemy.engine.interfaces import DBAPIConnection
+from sqlalchemy.pool import ConnectionPoolEntry, PoolProxiedConnection, QueuePool
+
+from myapp.instrumentation import percentile
+
+if TYPE_CHECKING:
+    # pydantic is only needed once an engine is built from the settings
+    from myapp.settings import DatabaseSettings
+
+# Checkout waits kept for the percentiles
+WAIT_SAMPLES = 10_000
+
+
+@dataclass
+class PoolMetrics:
+    checkouts: int = 0
+    timeouts: int = 0
+    connects: int = 0
+    overflow_events: int = 0
+    peak_in_use: int = 0
+    wait_total: float = 0.0
+    wait_max: float = 0.0
+    waits: deque[float] = field(default_factory=lambda: deque(maxlen=WAIT_SAMPLES))
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def checked_out(self, wait: float, in_use: int) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.waits.append(wait)
+            self.peak_in_use = max(self.peak_in_use, in_use)
+
+    def timed_out(self, wait: float) -> None:
+        with self._lock:
+            self.timeouts += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+
+    def connected(self, overflow: bool) -> None:
+        with self._lock:
+            self.connects += 1
+            self.overflow_events += overflow
+
+    def reset(self) -> None:
+        with self._lock:
+            self.checkouts = self.timeouts = self.connects = 0
+            self.overflow_events = self.peak_in_use = 0
+            self.wait_total = self.wait_max = 0.0
+            self.waits.clear()
+
+    def wait_percentile(self, pct: float) -> float:
+        with self._lock:
+            waits = sorted(self.waits)
+        return percentile(waits, pct)
+
+    def snapshot(self, pool: Optional[sa.Pool] = None) -> dict[str, Any]:
+        """Counters, wait times in milliseconds and, given the pool, its state."""
+        data: dict[str, Any] = {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "connects": self.connects,
+            "overflow_events": self.overflow_events,
+            "peak_in_use": self.peak_in_use,
+            "wait_ms": {
+                "total": self.wait_total * 1_000,
+                "max": self.wait_max * 1_000,
+                **{f"p{pct}": self.wait_percentile(pct) * 1_000 for pct in (50, 95, 99)},
+            },
+        }
+        if isinstance(pool, QueuePool):
+            data.update(
+                size=pool.size(),
+                in_use=pool.checkedout(),
+                idle=pool.checkedin(),
+                overflow=max(pool.overflow(), 0),
+            )
+        return data
+
+    def summary(self, pool: Optional[sa.Pool] = None) -> str:
+        data = self.snapshot(pool)
+        waits = data["wait_ms"]
+        line = (
+            f"{data['checkouts']} checkouts, wait p50 {waits['p50']:.2f} ms "
+            f"p95 {waits['p95']:.2f} ms p99 {waits['p99']:.2f} ms "
+            f"max {waits['max']:.2f} ms, {data['timeouts']} timeouts, "
+            f"{data['overflow_events']} overflow connections, "
+            f"peak {data['peak_in_use']} in use"
+        )
+        if "in_use" in data:
+            line += f" ({data['in_use']}/{data['size']} in use now)"
+        return line
+
+
+class MeteredQueuePool(QueuePool):
+    """``QueuePool`` timing every checkout into ``metrics``."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self) -> PoolProxiedConnection:
+        began = time.perf_counter()
+        try:
+            connection = super().connect()
+        except sa.exc.TimeoutError:
+            self.metrics.timed_out(time.perf_counter() - began)
+            raise
+        self.metrics.checked_out(time.perf_counter() - began, self.checkedout())
+        return connection
+
+    def recreate(self) -> MeteredQueuePool:
+        # dispose() and invalidation swap the pool, the metrics carry over
+        pool = super().recreate()
+        assert isinstance(pool, MeteredQueuePool)
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_metrics(engine: sa.Engine) -> PoolMetrics:
+    pool = engine.pool
+    if not isinstance(pool, MeteredQueuePool):
+        raise ValueError(f"{engine} was not created by myapp.engine.create_engine")
+    return pool.metrics
+
+
+def _is_memory_sqlite(url: sa.URL) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+# Attribute of an Oracle DBAPI connection holding its per-call timeout in ms
+ORACLE_CALL_TIMEOUT = {"cx_oracle": "callTimeout", "oracledb": "call_timeout"}
+
+
+def _set_call_timeout(dbapi_connection: Any, driver: str, timeout_ms: int) -> None:
+    # cx_Oracle connections take no new attributes, a wrong name raises
+    setattr(dbapi_connection, ORACLE_CALL_TIMEOUT[driver], timeout_ms)
+
+
+def _install_statement_timeout(engine: sa.Engine, timeout_ms: int) -> None:
+    backend = engine.url.get_backend_name()
+
+    if backend == "sqlite":
+        # No server side setting: a progress handler aborts the running
+        # statement ("interrupted") once its deadline has passed
+        @sa.event.listens_for(engine, "connect")
+        def _progress(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+            info = record.info
+
+            def handler() -> int:
+                deadline = info.get("statement_deadline")
+                return int(deadline is not None and time.monotonic() > deadline)
+
+            dbapi_connection.set_progress_handler(handler, 1_000)
+
+        @sa.event.listens_for(engine, "before_cursor_execute")
+        def _arm(conn: sa.Connection, *args: Any) -> None:
+            conn.connection.info["statement_deadline"] = (
+                time.monotonic() + timeout_ms / 1_000
+            )
+
+        @sa.event.listens_for(engine, "after_cursor_execute")
+        def _disarm(conn: sa.Connection, *args: Any) -> None:
+            conn.connection.info["statement_deadline"] = None
+
+        return
+
+    settings_sql = {
+        "postgresql": f"SET statement_timeout = {timeout_ms}",
+        "mysql": f"SET SESSION max_execution_time = {timeout_ms}",
+        "mariadb": f"SET SESSION max_statement_time = {timeout_ms / 1_000}",
+    }
+    if backend == "oracle":
+        driver = engine.dialect.driver
+        if driver not in ORACLE_CALL_TIMEOUT:
+            raise ValueError(f"statement timeouts are not supported on {driver}")
+
+        @sa.event.listens_for(engine, "connect")
+        def _call_timeout(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+            _set_call_timeout(dbapi_connection, driver, timeout_ms)
+
+    elif backend in settings_sql:
+
+        @sa.event.listens_for(engine, "connect")
+        def _session_timeout(
+            dbapi_connection: DBAPIConnection, record: ConnectionPoolEntry
+        ) -> None:
+            cursor = dbapi_connection.cursor()
+            try:
+                cursor.execute(settings_sql[backend])
+            finally:
+                cursor.close()
+
+    else:
+        raise ValueError(f"statement timeouts are not supported on {backend}")
+
+
+def create_engine(
+    settings: Optional[DatabaseSettings] = None, **overrides: Any
+) -> sa.Engine:
+    """Engine built from ``settings`` (default: the environment) with
+    ``overrides`` applied, e.g. ``create_engine(url=args.url)``."""
+    if settings is None:
+        from myapp.settings import get_settings
+
+        settings = get_settings()
+    if overrides:
+        settings = settings.copy(update=overrides)
+    url = sa.make_url(settings.url)
+
+    kwargs: dict[str, Any] = {"echo": settings.echo}
+    # An in-memory SQLite database lives in its single connection, so it
+    # keeps SQLAlchemy's default pool and there is nothing to size
+    if not _is_memory_sqlite(url):
+        kwargs.update(
+            poolclass=MeteredQueuePool,
+            pool_size=settings.pool_size,
+            max_overflow=settings.max_overflow,
+            pool_timeout=settings.pool_timeout,
+            pool_recycle=settings.pool_recycle,
+            pool_pre_ping=settings.pool_pre_ping,
+        )
+    engine = sa.create_engine(url, **kwargs)
+
+    if isinstance(engine.pool, MeteredQueuePool):
+
+        @sa.event.listens_for(engine, "connect")
+        def _connected(dbapi_connection: Any, record: ConnectionPoolEntry) -> None:
+            # QueuePool counts a connection as overflow before opening it
+            pool = engine.pool
+            assert isinstance(pool, MeteredQueuePool)
+            pool.metrics.connected(pool.overflow() > 0)
+
+    if settings.statement_timeout_ms is not None:
+        _install_statement_timeout(engine, settings.statement_timeout_ms)
+    return engine
@@ -0,0 +1,284 @@
+"""Constant-memory export of the ``myapp.models`` tables.
+
+Results are streamed with ``stream_results``/``yield_per`` (server side
+cursors where the driver has them) and written batch by batch, so the size of
+a dump is bounded by the disk and not by memory.
+
+Formats:
+
+* ``jsonl``   - one JSON object per row.
+* ``columns`` - one JSON object per batch holding a list per column.
+* ``parquet`` - one row group per batch, needs ``pyarrow``.
+
+    python -m myapp.export --url sqlite:///seed.db order_lines -o lines.jsonl.gz
+"""
+from __future__ import annotations
+
+import argparse
+import datetime
+import decimal
+import gzip
+import json
+import sys
+import time
+from dataclasses import dataclass
+from typing import IO, Any, Callable, Optional, Protocol, Sequence
+
+import sqlalchemy as sa
+
+from myapp.engine import create_engine
+from myapp.models import (
+    Base,
+    CategoryOrm,
+    OrderOrm,
+    ProductOrm,
+    QuantityOrm,
+    TagOrm,
+    product_category_assoc_tbl,
+    product_order_assoc_tbl,
+    product_tag_assoc_tbl,
+)
+
+DEFAULT_BATCH_SIZE = 10_000
+FORMATS = ("jsonl", "columns", "parquet")
+
+
+def _order_lines() -> sa.Select[Any]:
+    return (
+        sa.select(
+            OrderOrm.id.label("order_id"),
+            OrderOrm.invoice_no,
+            OrderOrm.customer_id,
+            OrderOrm.created_at,
+            ProductOrm.id.label("product_id"),
+            ProductOrm.code.label("product_code"),
+            ProductOrm.name.label("product_name"),
+            QuantityOrm.qty,
+        )
+        .join_from(OrderOrm, product_order_assoc_tbl)
+        .join(ProductOrm, ProductOrm.id == product_order_assoc_tbl.c.product_id)
+        .join(
+            QuantityOrm,
+            sa.and_(
+                QuantityOrm.order_id == OrderOrm.id,
+                QuantityOrm.product_id == ProductOrm.id,
+            ),
+            isouter=True,
+        )
+        .order_by(OrderOrm.id, ProductOrm.id)
+    )
+
+
+def _product_tags() -> sa.Select[Any]:
+    return (
+        sa.select(
+            ProductOrm.id.label("product_id"),
+            ProductOrm.code.label("product_code"),
+            TagOrm.id.label("tag_id"),
+            TagOrm.name.label("tag_name"),
+        )
+        .join_from(ProductOrm, product_tag_assoc_tbl)
+        .join(TagOrm, TagOrm.id == product_tag_assoc_tbl.c.tag_id)
+        .order_by(ProductOrm.id, TagOrm.id)
+    )
+
+
+def _product_categories() -> sa.Select[Any]:
+    return (
+        sa.select(
+            ProductOrm.id.label("product_id"),
+            ProductOrm.code.label("product_code"),
+            CategoryOrm.id.label("category_id"),
+            CategoryOrm.title.label("category_title"),
+        )
+        .join_from(ProductOrm, product_category_assoc_tbl)
+        .join(CategoryOrm, CategoryOrm.id == product_category_assoc_tbl.c.category_id)
+        .order_by(ProductOrm.id, CategoryOrm.id)
+    )
+
+
+# Association tables flattened with the rows they link
+VIEWS: dict[str, Callable[[], sa.Select[Any]]] = {
+    "order_lines": _order_lines,
+    "product_tags": _product_tags,
+    "product_categories": _product_categories,
+}
+
+
+def export_names() -> list[str]:
+    return [table.name for table in Base.metadata.sorted_tables] + list(VIEWS)
+
+
+def export_statement(name: str) -> sa.Select[Any]:
+    """Select for a table of ``Base.metadata`` (in pk order) or a named view."""
+    if name in VIEWS:
+        return VIEWS[name]()
+    try:
+        table = Base.metadata.tables[name]
+    except KeyError:
+        raise ValueError(
+            f"unknown export {name!r}, choose one of: {', '.join(export_names())}"
+        ) from None
+    return sa.select(table).order_by(*table.primary_key.columns)
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+class BatchWriter(Protocol):
+    def write(self, keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+class JsonlWriter:
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+        self._encode = json.JSONEncoder(default=_json_default, ensure_ascii=False).encode
+
+    def write(self, keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        encode = self._encode
+        self.stream.writelines(encode(dict(zip(keys, row))) + "\n" for row in rows)
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class ColumnsWriter:
+    def __init__(self, stream: IO[str]) -> None:
+        self.stream = stream
+
+    def write(self, keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        columns = dict(zip(keys, map(list, zip(*rows))))
+        chunk = {"rows": len(rows), "columns": columns}
+        self.stream.write(json.dumps(chunk, default=_json_default) + "\n")
+
+    def close(self) -> None:
+        self.stream.flush()
+
+
+class ParquetWriter:
+    def __init__(self, path: str) -> None:
+        try:
+            import pyarrow  # noqa: F401
+            import pyarrow.parquet  # noqa: F401
+        except ImportError:
+            raise RuntimeError("the parquet format needs pyarrow installed") from None
+        self.path = path
+        self._writer: Any = None
+
+    def write(self, keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        columns = dict(zip(keys, map(list, zip(*rows))))
+        batch = pa.Table.from_pydict(columns)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, batch.schema)
+        self._writer.write_table(batch.cast(self._writer.schema))
+
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def _open_text(path: str) -> IO[str]:
+    if path == "-":
+        return sys.stdout
+    if path.endswith(".gz"):
+        return gzip.open(path, "wt", encoding="utf-8")
+    return open(path, "w", encoding="utf-8")
+
+
+@dataclass
+class ExportStats:
+    name: str
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def export_to(
+    connection: sa.Connection,
+    statement: sa.Select[Any],
+    writer: BatchWriter,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    name: str = "export",
+) -> ExportStats:
+    """Stream ``statement`` into ``writer`` one ``batch_size`` batch at a time."""
+    stats = ExportStats(name)
+    began = time.perf_counter()
+    result = connection.execution_options(
+        stream_results=True, yield_per=batch_size
+    ).execute(statement)
+    keys = list(result.keys())
+    for rows in result.partitions():
+        writer.write(keys, rows)
+        stats.rows += len(rows)
+    writer.close()
+    stats.seconds = time.perf_counter() - began
+    return stats
+
+
+def export(
+    engine: sa.Engine,
+    name: str,
+    path: str,
+    fmt: str = "jsonl",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> ExportStats:
+    """Export a table or view to ``path`` (``-`` for stdout, ``.gz`` to compress)."""
+    statement = export_statement(name)
+    with engine.connect() as connection:
+        if fmt == "parquet":
+            return export_to(
+                connection, statement, ParquetWriter(path), batch_size, name
+            )
+        if fmt not in FORMATS:
+            raise ValueError(f"unknown format {fmt!r}, choose one of {FORMATS}")
+        stream = _open_text(path)
+        try:
+            writer: BatchWriter = (
+                JsonlWriter(stream) if fmt == "jsonl" else ColumnsWriter(stream)
+            )
+            return export_to(connection, statement, writer, batch_size, name)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m myapp.export", description="Stream a table or view to a file."
+    )
+    parser.add_argument("name", help=f"one of: {', '.join(export_names())}")
+    parser.add_argument(
+        "--url", default=None, help="database url (default: MYAPP_DB_URL)"
+    )
+    parser.add_argument("-o", "--output", default="-", help="output path, - for stdout")
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    args = parser.parse_args(argv)
+
+    engine = create_engine(url=args.url) if args.url else create_engine()
+    stats = export(engine, args.name, args.output, args.format, args.batch_size)
+    print(
+        f"{stats.name}: {stats.rows:,} rows in {stats.seconds:.2f}s "
+        f"({stats.rows_per_sec:,.0f} rows/s)",
+        file=sys.stderr,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
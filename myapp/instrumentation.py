@@ -0,0 +1,313 @@
+"""Statement count and latency instrumentation.
+
+A quieter alternative to ``create_engine(..., echo=True)``: the
+``before_cursor_execute``/``after_cursor_execute`` engine events record every
+statement with its duration, a normalized fingerprint and the DBAPI row count.
+
+    with capture(engine) as stats:
+        ...
+    print(stats.to_json())
+    stats.n_plus_one()  # fingerprints repeated within the capture
+"""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Iterator, Optional, Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.engine.interfaces import DBAPICursor, ExecutionContext
+from sqlalchemy.orm import Session, SessionTransaction
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (milliseconds) of the latency histogram buckets
+HISTOGRAM_BUCKETS_MS = (0.1, 0.5, 1, 5, 10, 50, 100, 500, 1_000, 5_000, math.inf)
+DEFAULT_N_PLUS_ONE_THRESHOLD = 5
+
+_FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), "?"),
+    (re.compile(r"\b\d+(?:\.\d+)?\b"), "?"),
+    (re.compile(r"%\(\w+\)s|%s|:\w+|\$\d+"), "?"),
+    (re.compile(r"\(__\[POSTCOMPILE_\w+\]\)"), "(?)"),
+    (re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)"), "(?)"),
+    # insertmanyvalues batches: VALUES (?), (?), ... -> VALUES (?)
+    (re.compile(r"(VALUES\s*\(\?\))(?:\s*,\s*\(\?\))+", re.IGNORECASE), r"\1"),
+    (re.compile(r"\s+"), " "),
+)
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Statement text with literals, bind markers and IN lists collapsed, so
+    executions that only differ by parameters share one fingerprint."""
+    for pattern, replacement in _FINGERPRINT_RULES:
+        statement = pattern.sub(replacement, statement)
+    return statement.strip()
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of already sorted ``values``."""
+    if not values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+@dataclass
+class StatementRecord:
+    fingerprint: str
+    statement: str
+    duration: float
+    # cursor.rowcount: rows affected for DML; -1 for SELECTs on most drivers
+    rowcount: int
+    executemany: bool
+    # Rows fetched from the cursor so far, kept up to date by _CountingCursor
+    rows: int = 0
+
+
+class _CountingCursor:
+    """DBAPI cursor proxy counting the rows the result fetches through it."""
+
+    def __init__(self, cursor: DBAPICursor, record: StatementRecord) -> None:
+        self._cursor = cursor
+        self._record = record
+
+    def fetchone(self) -> Any:
+        row = self._cursor.fetchone()
+        if row is not None:
+            self._record.rows += 1
+        return row
+
+    def fetchmany(self, *args: Any) -> Any:
+        rows = self._cursor.fetchmany(*args)
+        self._record.rows += len(rows)
+        return rows
+
+    def fetchall(self) -> Any:
+        rows = self._cursor.fetchall()
+        self._record.rows += len(rows)
+        return rows
+
+    def __iter__(self) -> Iterator[Any]:
+        for row in self._cursor:
+            self._record.rows += 1
+            yield row
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._cursor, name)
+
+
+@dataclass
+class QueryStats:
+    records: list[StatementRecord] = field(default_factory=list)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def add(self, record: StatementRecord) -> None:
+        with self._lock:
+            self.records.append(record)
+
+    @property
+    def count(self) -> int:
+        return len(self.records)
+
+    @property
+    def total_time(self) -> float:
+        return sum(record.duration for record in self.records)
+
+    def counts(self) -> Counter[str]:
+        return Counter(record.fingerprint for record in self.records)
+
+    def n_plus_one(
+        self, threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD
+    ) -> list[tuple[str, int]]:
+        """SELECT fingerprints executed at least ``threshold`` times."""
+        return [
+            (statement, count)
+            for statement, count in self.counts().most_common()
+            if count >= threshold and statement.lstrip().upper().startswith("SELECT")
+        ]
+
+    def histogram(self) -> dict[str, int]:
+        buckets = {_bucket_label(bound): 0 for bound in HISTOGRAM_BUCKETS_MS}
+        for record in self.records:
+            millis = record.duration * 1_000
+            for bound in HISTOGRAM_BUCKETS_MS:
+                if millis <= bound:
+                    buckets[_bucket_label(bound)] += 1
+                    break
+        return buckets
+
+    def summary(
+        self, n_plus_one_threshold: int = DEFAULT_N_PLUS_ONE_THRESHOLD
+    ) -> dict[str, Any]:
+        grouped: dict[str, list[StatementRecord]] = {}
+        for record in self.records:
+            grouped.setdefault(record.fingerprint, []).append(record)
+
+        statements = []
+        for statement, records in grouped.items():
+            durations = sorted(record.duration * 1_000 for record in records)
+            statements.append(
+                {
+                    "fingerprint": statement,
+                    "count": len(records),
+                    "total_ms": round(sum(durations), 3),
+                    "p50_ms": round(percentile(durations, 50), 3),
+                    "p95_ms": round(percentile(durations, 95), 3),
+                    "max_ms": round(durations[-1], 3),
+                    "rows": sum(record.rows for record in records),
+                    "rowcount": sum(max(record.rowcount, 0) for record in records),
+                }
+            )
+        statements.sort(key=lambda item: item["total_ms"], reverse=True)
+
+        durations = sorted(record.duration * 1_000 for record in self.records)
+        return {
+            "statements": self.count,
+            "total_ms": round(sum(durations), 3),
+            "rows": sum(record.rows for record in self.records),
+            "p50_ms": round(percentile(durations, 50), 3),
+            "p95_ms": round(percentile(durations, 95), 3),
+            "p99_ms": round(percentile(durations, 99), 3),
+            "histogram_ms": self.histogram(),
+            "n_plus_one": [
+                {"fingerprint": statement, "count": count}
+                for statement, count in self.n_plus_one(n_plus_one_threshold)
+            ],
+            "by_fingerprint": statements,
+        }
+
+    def to_json(self, indent: Optional[int] = 2) -> str:
+        return json.dumps(self.summary(), indent=indent)
+
+    def dump(self, path: str) -> None:
+        with open(path, "w") as f:
+            f.write(self.to_json())
+
+
+def _bucket_label(bound: float) -> str:
+    return "+inf" if math.isinf(bound) else f"<={bound:g}"
+
+
+class _Recorder:
+    # Holds the listeners so they can be removed again on exit
+    def __init__(
+        self,
+        stats: QueryStats,
+        connections: Optional[set[int]] = None,
+        count_rows: bool = True,
+    ) -> None:
+        self.stats = stats
+        self.count_rows = count_rows
+        # When set, only statements on these DBAPI connections are recorded
+        self.connections = connections
+
+    def _wanted(self, conn: sa.Connection) -> bool:
+        if self.connections is None:
+            return True
+        return id(conn.connection.dbapi_connection) in self.connections
+
+    def before(
+        self,
+        conn: sa.Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        if self._wanted(conn):
+            conn.info.setdefault("instrumentation_started", []).append(
+                time.perf_counter()
+            )
+
+    def after(
+        self,
+        conn: sa.Connection,
+        cursor: DBAPICursor,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        started = conn.info.get("instrumentation_started")
+        if not started or not self._wanted(conn):
+            return
+        duration = time.perf_counter() - started.pop()
+        record = StatementRecord(
+            fingerprint=fingerprint(statement),
+            statement=statement,
+            duration=duration,
+            rowcount=cursor.rowcount,
+            executemany=executemany,
+        )
+        self.stats.add(record)
+        if self.count_rows and context is not None and cursor.description:
+            # The result is built from context.cursor after this event fires
+            context.cursor = _CountingCursor(cursor, record)  # type: ignore[assignment]
+
+
+@contextmanager
+def capture(
+    target: Union[sa.Engine, sa.Connection, Session],
+    n_plus_one_threshold: Optional[int] = DEFAULT_N_PLUS_ONE_THRESHOLD,
+    count_rows: bool = True,
+) -> Iterator[QueryStats]:
+    """Record the statements executed on ``target`` while the block runs.
+
+    For an engine or connection everything executed through it is recorded.
+    For a session only the connections that session checks out are recorded,
+    so the N+1 detector reports repeats within that one session. A warning is
+    logged on exit for every fingerprint reaching ``n_plus_one_threshold``.
+
+    ``count_rows`` wraps the cursor of every row-returning statement to count
+    the rows actually fetched; turn it off to shave the proxy overhead.
+    """
+    stats = QueryStats()
+    session_events: list[tuple[Any, ...]] = []
+
+    if isinstance(target, Session):
+        connections: Optional[set[int]] = set()
+
+        def track(
+            session: Session, transaction: SessionTransaction, connection: sa.Connection
+        ) -> None:
+            assert connections is not None
+            connections.add(id(connection.connection.dbapi_connection))
+
+        sa.event.listen(target, "after_begin", track)
+        session_events.append((target, "after_begin", track))
+        if target.in_transaction():
+            connections.add(id(target.connection().connection.dbapi_connection))
+        bind: Union[sa.Engine, sa.Connection] = target.get_bind()  # type: ignore[assignment]
+    else:
+        connections = None
+        bind = target
+
+    recorder = _Recorder(stats, connections, count_rows)
+    sa.event.listen(bind, "before_cursor_execute", recorder.before)
+    sa.event.listen(bind, "after_cursor_execute", recorder.after)
+    try:
+        yield stats
+    finally:
+        sa.event.remove(bind, "before_cursor_execute", recorder.before)
+        sa.event.remove(bind, "after_cursor_execute", recorder.after)
+        for event_args in session_events:
+            sa.event.remove(*event_args)
+
+        if n_plus_one_threshold is not None:
+            for statement, count in stats.n_plus_one(n_plus_one_threshold):
+                logger.warning(
+                    "possible N+1: statement executed %d times: %s", count, statement
+                )
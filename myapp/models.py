@@ -1,12 +1,33 @@
 from datetime import datetime
-import pytz
+from functools import lru_cache
 from typing import Optional
+from zoneinfo import ZoneInfo
 import sqlalchemy as sa
 from sqlalchemy.inspection import inspect
-from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
-
+from sqlalchemy.orm import (
+    DeclarativeBase,
+    Mapped,
+    joinedload,
+    mapped_column,
+    raiseload,
+    relationship,
+    selectinload,
+)
+from sqlalchemy.orm.interfaces import ORMOption
 
 MAX_INCREMENT_VALUE = 999999999999999999999999999
+TIMEZONE = ZoneInfo("Asia/Dhaka")
+
+
+def now() -> datetime:
+    return datetime.now(tz=TIMEZONE)
+
+
+@lru_cache(maxsize=None)
+def column_keys(model: type["Base"]) -> tuple[str, ...]:
+    """Attribute names of the mapped columns of `model`, in table order."""
+    return tuple(inspect(model).columns.keys())  # type: ignore[union-attr]
+
 
 # Declare the Declrative base
 class Base(DeclarativeBase):
@@ -15,11 +36,28 @@ class Base(DeclarativeBase):
             f"{self.__class__.__name__!s}("
             + ",".join(
                 str(key) + "=" + f"{vars(self).get(key, None)!r}"
-                for key in inspect(self.__class__).columns.keys()  # type: ignore[union-attr]
+                for key in column_keys(self.__class__)
             )
             + ")"
         )
 
+    @classmethod
+    def load_profile(cls, name: str, strict: bool = False) -> tuple[ORMOption, ...]:
+        """Loader options of a named eager-loading profile, to be used as
+        `sa.select(CustomerOrm).options(*CustomerOrm.load_profile("order_history"))`.
+
+        With `strict=True` every relationship not covered by the profile raises
+        instead of silently lazy-loading.
+        """
+        try:
+            options = load_profiles()[cls][name]
+        except KeyError:
+            known = ", ".join(sorted(load_profiles().get(cls, {}))) or "none"
+            raise ValueError(
+                f"{cls.__name__} has no load profile {name!r} (known: {known})"
+            ) from None
+        return options + (raiseload("*"),) if strict else options
+
 
 # Customer ORM Model of SQLAlchemy
 class CustomerOrm(Base):
@@ -49,7 +87,7 @@ class AddressOrm(Base):
         sa.Identity(start=1, cycle=True, maxvalue=MAX_INCREMENT_VALUE),
         primary_key=True,
     )
-    customer_id: Mapped[int] = mapped_column(sa.ForeignKey("customers.id"))
+    customer_id: Mapped[int] = mapped_column(sa.ForeignKey("customers.id"), index=True)
     present_address: Mapped[str] = mapped_column(sa.String(255), nullable=False)
     permenent_address: Mapped[str] = mapped_column(sa.String(255))
 
@@ -74,6 +112,9 @@ product_tag_assoc_tbl = sa.Table(
     ),
     sa.Column("product_id", sa.ForeignKey("products.id"), nullable=False),
     sa.Column("tag_id", sa.ForeignKey("tags.id"), nullable=False),
+    # Leads with product_id, so it also serves the product -> tags loads
+    sa.UniqueConstraint("product_id", "tag_id", name="uq_product_tag_assoc"),
+    sa.Index("ix_product_tag_assoc_tag_id", "tag_id"),
 )
 
 product_category_assoc_tbl = sa.Table(
@@ -87,6 +128,8 @@ product_category_assoc_tbl = sa.Table(
     ),
     sa.Column("product_id", sa.ForeignKey("products.id"), nullable=False),
     sa.Column("category_id", sa.ForeignKey("categories.id"), nullable=False),
+    sa.UniqueConstraint("product_id", "category_id", name="uq_product_category_assoc"),
+    sa.Index("ix_product_category_assoc_category_id", "category_id"),
 )
 
 product_order_assoc_tbl = sa.Table(
@@ -100,6 +143,9 @@ product_order_assoc_tbl = sa.Table(
     ),
     sa.Column("product_id", sa.ForeignKey("products.id"), nullable=False),
     sa.Column("order_id", sa.ForeignKey("orderes.id"), nullable=False),
+    # Leads with order_id, so it also serves the order -> products loads
+    sa.UniqueConstraint("order_id", "product_id", name="uq_product_order_assoc"),
+    sa.Index("ix_product_order_assoc_product_id", "product_id"),
 )
 
 
@@ -161,6 +207,12 @@ class ProductOrm(Base):
 #  Customer Order Model of SQLAlchemy
 class OrderOrm(Base):
     __tablename__ = "orderes"
+    __table_args__ = (
+        # customer -> orders loads and "last N orders of a customer"
+        sa.Index("ix_orderes_customer_id_id", "customer_id", "id"),
+        # keyset pagination / archiving by (created_at, id)
+        sa.Index("ix_orderes_created_at_id", "created_at", "id"),
+    )
 
     id: Mapped[int] = mapped_column(
         sa.Identity(start=1, maxvalue=MAX_INCREMENT_VALUE, cycle=True), primary_key=True
@@ -171,9 +223,7 @@ class OrderOrm(Base):
         sa.ForeignKey("customers.id"), nullable=False
     )
 
-    created_at: Mapped[datetime] = mapped_column(
-        insert_default=datetime.now(tz=pytz.timezone("Asia/Dhaka")), nullable=False
-    )
+    created_at: Mapped[datetime] = mapped_column(insert_default=now, nullable=False)
 
     products: Mapped[set["ProductOrm"]] = relationship(
         secondary=product_order_assoc_tbl,
@@ -183,10 +233,19 @@ class OrderOrm(Base):
 
     customer: Mapped["CustomerOrm"] = relationship(back_populates="orders")
 
+    quantities: Mapped[list["QuantityOrm"]] = relationship(back_populates="order")
+
 
 # Products Order Quantity Entity
 class QuantityOrm(Base):
     __tablename__ = "product_order_quantities"
+    __table_args__ = (
+        # One quantity per order line; leads with order_id for order lookups
+        sa.UniqueConstraint(
+            "order_id", "product_id", name="uq_product_order_quantities"
+        ),
+        sa.Index("ix_product_order_quantities_product_id", "product_id"),
+    )
 
     id: Mapped[int] = mapped_column(
         sa.Identity(start=1, maxvalue=MAX_INCREMENT_VALUE, cycle=True), primary_key=True
@@ -201,3 +260,104 @@ class QuantityOrm(Base):
     )
 
     product: Mapped["ProductOrm"] = relationship(back_populates="order_qty")
+
+    order: Mapped["OrderOrm"] = relationship(back_populates="quantities")
+
+
+# Next unreserved id per table for the client-side id allocator, see `myapp.idblocks`
+id_blocks_tbl = sa.Table(
+    "id_blocks",
+    Base.metadata,
+    sa.Column("table_name", sa.String(30), primary_key=True),
+    sa.Column("next_id", sa.BigInteger, nullable=False),
+)
+
+
+# Change records written in the flushing transaction, see `myapp.outbox`.
+# Not a cycling Identity: the relay delivers in id order
+outbox_tbl = sa.Table(
+    "outbox",
+    Base.metadata,
+    sa.Column(
+        "id",
+        # INTEGER on SQLite, where only that is an alias of the rowid
+        sa.BigInteger().with_variant(sa.Integer(), "sqlite"),
+        sa.Identity(start=1),
+        primary_key=True,
+    ),
+    sa.Column("table_name", sa.String(30), nullable=False),
+    sa.Column("pk", sa.String(60), nullable=False),
+    sa.Column("op", sa.String(6), nullable=False),
+    # Changed column names of an update, NULL for inserts and deletes
+    sa.Column("columns", sa.JSON),
+    # UTC, backends without time zones (SQLite) keep it without offset
+    sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+    # Never reuse the ids of delivered (deleted) records, consumers dedupe on them
+    sqlite_autoincrement=True,
+)
+
+
+# Named eager-loading profiles, see `Base.load_profile`.
+# Every relationship defaults to lazy="select", so walking the
+# customer -> orders -> products graph emits one SELECT per hop per object.
+# These chains load each level with a single statement instead.
+# Built on first use: a loader option configures all the mappers, which would
+# otherwise happen on import.
+@lru_cache(maxsize=None)
+def load_profiles() -> dict[type[Base], dict[str, tuple[ORMOption, ...]]]:
+    # Not ProductOrm.order_qty: declared one-to-one over a one-to-many, it
+    # would select every quantity of the products to keep one of them
+    product_detail = (
+        selectinload(ProductOrm.tags),
+        selectinload(ProductOrm.categories),
+    )
+
+    return {
+        CustomerOrm: {
+            "with_addresses": (joinedload(CustomerOrm.addresses),),
+            "orders": (
+                joinedload(CustomerOrm.addresses),
+                selectinload(CustomerOrm.orders),
+            ),
+            "order_history": (
+                joinedload(CustomerOrm.addresses),
+                selectinload(CustomerOrm.orders).options(
+                    selectinload(OrderOrm.products).options(*product_detail),
+                    selectinload(OrderOrm.quantities),
+                ),
+            ),
+        },
+        OrderOrm: {
+            "with_customer": (joinedload(OrderOrm.customer),),
+            "detail": (
+                joinedload(OrderOrm.customer).joinedload(CustomerOrm.addresses),
+                selectinload(OrderOrm.products).options(*product_detail),
+                selectinload(OrderOrm.quantities),
+            ),
+        },
+        ProductOrm: {
+            "catalog": (
+                selectinload(ProductOrm.tags),
+                selectinload(ProductOrm.categories),
+            ),
+            "detail": product_detail,
+        },
+        TagOrm: {"products": (selectinload(TagOrm.products),)},
+        CategoryOrm: {"products": (selectinload(CategoryOrm.products),)},
+        QuantityOrm: {
+            "with_product": (
+                joinedload(QuantityOrm.product).options(
+                    selectinload(ProductOrm.tags), selectinload(ProductOrm.categories)
+                ),
+            ),
+        },
+    }
+
+
+def configure() -> None:
+    """Configure the mappers now instead of at the first query or loader option.
+
+    Call it once at startup of a long running process, or before forking
+    workers, so each child does not redo it.
+    """
+    Base.registry.configure()
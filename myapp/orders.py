@@ -0,0 +1,137 @@
+"""Bulk order placement.
+
+Placing an order through the ORM (``OrderOrm`` + ``order.products.add`` +
+one ``QuantityOrm`` per line, as in the notebook) costs several flushes and
+round trips per order. ``place_orders`` writes a whole batch with three
+statements: a multi-row INSERT into ``orderes`` whose generated ids come back
+through RETURNING (batched by SQLAlchemy's "insertmanyvalues"), then one
+executemany each for the ``product_order_assoc`` and quantity rows.
+
+The returned rows are matched to the batch by ``invoice_no``, unique within
+a batch. ``sort_by_parameter_order=True`` would do the matching for us, but
+with the cycling Identity on ``orderes.id`` SQLAlchemy has no sentinel to
+sort on and falls back to one INSERT per row.
+
+    placed = place_orders(session, [
+        NewOrder(customer_id=42, lines=[OrderLine(1, 2), OrderLine(3, 4)]),
+        ...
+    ])
+    placed[0].id
+"""
+from __future__ import annotations
+
+import secrets
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, NamedTuple, Optional, Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from myapp.idblocks import IdAllocator
+from myapp.models import TIMEZONE, OrderOrm, QuantityOrm, product_order_assoc_tbl
+from myapp.outbox import INSERT, record
+from myapp.readmodels import OrderRead
+
+
+class OrderLine(NamedTuple):
+    product_id: int
+    qty: int
+
+
+@dataclass(frozen=True)
+class NewOrder:
+    customer_id: int
+    lines: Sequence[OrderLine]
+    invoice_no: Optional[str] = None
+    created_at: Optional[datetime] = None
+
+    def __post_init__(self) -> None:
+        if not self.lines:
+            raise ValueError(f"order for customer {self.customer_id} has no lines")
+        products = [line.product_id for line in self.lines]
+        if len(set(products)) != len(products):
+            raise ValueError("an order lists each product once, merge the quantities")
+        if any(line.qty < 1 for line in self.lines):
+            raise ValueError("order line quantities must be positive")
+
+
+def invoice_number(created_at: datetime) -> str:
+    return f"INV-{created_at:%Y%m%d}{secrets.randbits(24):06X}"
+
+
+def _insert_orders() -> sa.Insert:
+    table = OrderOrm.__table__
+    return sa.insert(table).returning(*(table.c[key] for key in OrderRead._fields))
+
+
+def place_orders(
+    bind: Union[Session, sa.Connection],
+    batch: Sequence[NewOrder],
+    ids: Optional[IdAllocator] = None,
+    outbox: bool = False,
+) -> list[Any]:
+    """Insert ``batch`` with its lines; returns an ``OrderRead`` per order, in
+    batch order. Runs in the caller's transaction, nothing is committed.
+
+    With ``ids`` the order ids are assigned client-side and the orders go in
+    as a plain executemany, without RETURNING. On SQLite, ``ids.prefetch``
+    them before the transaction writes anything (see ``myapp.idblocks``).
+
+    With ``outbox=True`` an insert record per order goes to ``myapp.outbox``;
+    consumers read the lines with the order.
+    """
+    if not batch:
+        return []
+    now = datetime.now(tz=TIMEZONE)
+    given = [order.invoice_no for order in batch if order.invoice_no]
+    invoices = set(given)
+    if len(invoices) != len(given):
+        raise ValueError("invoice numbers repeat within the batch")
+
+    order_params = []
+    for order in batch:
+        created_at = order.created_at or now
+        invoice_no = order.invoice_no
+        if not invoice_no:
+            invoice_no = invoice_number(created_at)
+            while invoice_no in invoices:
+                invoice_no = invoice_number(created_at)
+            invoices.add(invoice_no)
+        order_params.append(
+            {
+                "customer_id": order.customer_id,
+                "created_at": created_at,
+                "invoice_no": invoice_no,
+            }
+        )
+
+    make = OrderRead._make  # type: ignore[attr-defined]
+    if ids is not None:
+        for params, id_ in zip(order_params, ids.take("orderes", len(batch))):
+            params["id"] = id_
+        bind.execute(sa.insert(OrderOrm.__table__), order_params)
+        placed = [
+            make(params[key] for key in OrderRead._fields) for params in order_params
+        ]
+    else:
+        result = bind.execute(_insert_orders(), order_params)
+        by_invoice = {row.invoice_no: make(row) for row in result}
+        placed = [by_invoice[params["invoice_no"]] for params in order_params]
+
+    lines = [
+        {"order_id": row.id, "product_id": line.product_id, "qty": line.qty}
+        for row, order in zip(placed, batch)
+        for line in order.lines
+    ]
+    bind.execute(
+        sa.insert(product_order_assoc_tbl),
+        [
+            {"order_id": line["order_id"], "product_id": line["product_id"]}
+            for line in lines
+        ],
+    )
+    bind.execute(sa.insert(QuantityOrm.__table__), lines)
+    if outbox:
+        record(bind, OrderOrm.__table__, INSERT, [row.id for row in placed])
+    return placed
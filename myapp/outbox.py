@@ -0,0 +1,332 @@
+"""Transactional outbox of order, quantity and product changes.
+
+Search and analytics learn about changes from the ``outbox`` table instead of
+scanning the tables. Every flush of a tracked model writes one compact record
+per changed row (table, primary key, op, changed columns) into ``outbox``, on
+the connection and in the transaction of the flush: the records commit and
+roll back with the change itself.
+
+    install()                                  # record flushes of every Session
+    relay = Relay(engine, publish)             # publish(changes) -> None
+    relay.drain()                              # or relay.run(stop) in a thread
+    print(relay.metrics.summary())
+
+``Relay`` reads the oldest ``batch_size`` records in id order, hands them to
+``publish`` and deletes them in the same transaction. A failing ``publish``
+rolls the batch back and it is delivered again: delivery is at least once,
+consumers dedupe on ``Change.id`` or are idempotent. Records are read with
+FOR UPDATE, so a second relay on the same database waits instead of
+delivering out of order. With ``myapp.sharding`` the records are written to
+the shard of their row, run a relay per shard.
+
+Order is only kept per row, by ``(table_name, pk)``. Ids are taken when a
+record is inserted, not when its transaction commits: with concurrent writers
+a record can commit after records with higher ids were delivered. It is still
+delivered, just later. The changes of one row are ordered by the row lock
+their transactions take, so their ids follow the commits; consumers apply
+changes per ``(table_name, pk)`` and do not rely on the order across rows.
+``Change.created_at`` is in UTC.
+
+Only the unit of work is seen. Core statements (``place_orders`` without
+``outbox=True``, the seed) and ORM bulk UPDATE/DELETE write no records; call
+``record`` next to them.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Callable, Iterable, NamedTuple, Optional, Sequence, Union
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, UOWTransaction
+
+from myapp.instrumentation import percentile
+from myapp.models import Base, OrderOrm, ProductOrm, QuantityOrm, outbox_tbl
+
+logger = logging.getLogger(__name__)
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+
+DEFAULT_BATCH_SIZE = 500
+# Delivery lags kept for the percentiles
+LAG_SAMPLES = 10_000
+
+# model -> many-to-many collections recorded as changed along with its columns
+TRACKED: dict[type[Base], tuple[str, ...]] = {
+    OrderOrm: ("products",),
+    QuantityOrm: (),
+    ProductOrm: ("tags", "categories"),
+}
+
+
+class Change(NamedTuple):
+    id: int
+    table_name: str
+    pk: str
+    op: str
+    columns: Optional[list[str]]
+    created_at: datetime
+
+
+Publish = Callable[[Sequence[Change]], None]
+
+
+def utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def format_pk(values: Iterable[Any]) -> str:
+    return ",".join(str(value) for value in values)
+
+
+def record(
+    bind: Union[Session, sa.Connection],
+    table: sa.Table,
+    op: str,
+    pks: Iterable[Any],
+    columns: Optional[Sequence[str]] = None,
+) -> int:
+    """Write a record per primary key in ``pks`` (a value, or a tuple of them
+    for composite keys) for a change made outside the unit of work."""
+    created_at = utcnow()
+    rows = [
+        {
+            "table_name": table.name,
+            "pk": format_pk(pk if isinstance(pk, tuple) else (pk,)),
+            "op": op,
+            "columns": list(columns) if columns is not None else None,
+            "created_at": created_at,
+        }
+        for pk in pks
+    ]
+    if rows:
+        bind.execute(sa.insert(outbox_tbl), rows)
+    return len(rows)
+
+
+def _changed(state: Any, collections: tuple[str, ...]) -> list[str]:
+    changed = [
+        prop.columns[0].name
+        for prop in state.mapper.column_attrs
+        if state.attrs[prop.key].history.has_changes()
+    ]
+    changed.extend(key for key in collections if state.attrs[key].history.has_changes())
+    return changed
+
+
+def _after_flush(session: Session, flush_context: UOWTransaction) -> None:
+    created_at = utcnow()
+    # Grouped by connection: a sharded session flushes to several
+    by_connection: dict[sa.Connection, list[dict[str, Any]]] = {}
+    for op, instances in (
+        (INSERT, session.new),
+        (UPDATE, session.dirty),
+        (DELETE, session.deleted),
+    ):
+        for instance in instances:
+            collections = TRACKED.get(type(instance))
+            if collections is None:
+                continue
+            state = sa.inspect(instance)
+            columns = None
+            if op == UPDATE:
+                columns = _changed(state, collections)
+                if not columns:
+                    continue
+            mapper = state.mapper
+            # The identity key is only set once the flush is finalized
+            pk = mapper.primary_key_from_instance(instance)
+            connection = session.connection(
+                bind_arguments={"mapper": mapper, "instance": instance}
+            )
+            by_connection.setdefault(connection, []).append(
+                {
+                    "table_name": mapper.local_table.name,
+                    "pk": format_pk(pk),
+                    "op": op,
+                    "columns": columns,
+                    "created_at": created_at,
+                }
+            )
+    for connection, rows in by_connection.items():
+        connection.execute(sa.insert(outbox_tbl), rows)
+
+
+def install(target: Any = Session) -> None:
+    """Record the flushes of ``target`` sessions (a ``Session`` subclass,
+    ``sessionmaker`` or instance)."""
+    if not sa.event.contains(target, "after_flush", _after_flush):
+        sa.event.listen(target, "after_flush", _after_flush)
+
+
+def uninstall(target: Any = Session) -> None:
+    if sa.event.contains(target, "after_flush", _after_flush):
+        sa.event.remove(target, "after_flush", _after_flush)
+
+
+def _created_at(value: datetime) -> datetime:
+    # SQLite keeps no offset, the value was written in UTC
+    return value if value.tzinfo is not None else value.replace(tzinfo=timezone.utc)
+
+
+@dataclass
+class RelayMetrics:
+    delivered: int = 0
+    batches: int = 0
+    failures: int = 0
+    # Seconds spent in batches, delivered or failed
+    busy: float = 0.0
+    lag_max: float = 0.0
+    lags: deque[float] = field(default_factory=lambda: deque(maxlen=LAG_SAMPLES))
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def batch_delivered(self, lags: Sequence[float], duration: float) -> None:
+        with self._lock:
+            self.delivered += len(lags)
+            self.batches += 1
+            self.busy += duration
+            self.lags.extend(lags)
+            self.lag_max = max(self.lag_max, *lags)
+
+    def batch_failed(self, duration: float) -> None:
+        with self._lock:
+            self.failures += 1
+            self.busy += duration
+
+    def reset(self) -> None:
+        with self._lock:
+            self.delivered = self.batches = self.failures = 0
+            self.busy = self.lag_max = 0.0
+            self.lags.clear()
+
+    @property
+    def throughput(self) -> float:
+        """Records delivered per busy second."""
+        return self.delivered / self.busy if self.busy else 0.0
+
+    def lag_percentile(self, pct: float) -> float:
+        with self._lock:
+            lags = sorted(self.lags)
+        return percentile(lags, pct)
+
+    def snapshot(self) -> dict[str, Any]:
+        """Counters, throughput in records/s and lags (flush to delivery) in
+        milliseconds."""
+        return {
+            "delivered": self.delivered,
+            "batches": self.batches,
+            "failures": self.failures,
+            "throughput": self.throughput,
+            "lag_ms": {
+                "max": self.lag_max * 1_000,
+                **{f"p{pct}": self.lag_percentile(pct) * 1_000 for pct in (50, 95, 99)},
+            },
+        }
+
+    def summary(self) -> str:
+        data = self.snapshot()
+        lags = data["lag_ms"]
+        return (
+            f"{data['delivered']} delivered in {data['batches']} batches "
+            f"({data['throughput']:.0f}/s), lag p50 {lags['p50']:.1f} ms "
+            f"p95 {lags['p95']:.1f} ms p99 {lags['p99']:.1f} ms "
+            f"max {lags['max']:.1f} ms, {data['failures']} failed batches"
+        )
+
+
+class Relay:
+    def __init__(
+        self,
+        engine: sa.Engine,
+        publish: Publish,
+        *,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        metrics: Optional[RelayMetrics] = None,
+    ) -> None:
+        self.engine = engine
+        self.publish = publish
+        self.batch_size = batch_size
+        self.metrics = metrics or RelayMetrics()
+        table = outbox_tbl
+        self._select = (
+            sa.select(*table.c).order_by(table.c.id).limit(batch_size).with_for_update()
+        )
+        self._delete = sa.delete(table).where(
+            table.c.id.in_(sa.bindparam("ids", expanding=True))
+        )
+
+    def drain_once(self) -> int:
+        """Deliver the oldest batch; returns its size, 0 when the outbox is
+        empty. The error of a failing ``publish`` is raised after the
+        rollback, the batch stays for the next call."""
+        started = time.perf_counter()
+        with self.engine.begin() as connection:
+            changes = [
+                Change(*row[:-1], _created_at(row.created_at))
+                for row in connection.execute(self._select)
+            ]
+            if not changes:
+                return 0
+            try:
+                self.publish(changes)
+            except Exception:
+                self.metrics.batch_failed(time.perf_counter() - started)
+                raise
+            connection.execute(self._delete, {"ids": [c.id for c in changes]})
+        delivered_at = utcnow()
+        self.metrics.batch_delivered(
+            [(delivered_at - c.created_at).total_seconds() for c in changes],
+            time.perf_counter() - started,
+        )
+        return len(changes)
+
+    def drain(self, max_batches: Optional[int] = None) -> int:
+        """Deliver batches until the outbox is empty (or ``max_batches``)."""
+        delivered = batches = 0
+        while max_batches is None or batches < max_batches:
+            count = self.drain_once()
+            if not count:
+                break
+            delivered += count
+            batches += 1
+        return delivered
+
+    def run(
+        self,
+        stop: threading.Event,
+        poll_interval: float = 1.0,
+        max_backoff: float = 60.0,
+    ) -> None:
+        """Drain until ``stop`` is set, polling every ``poll_interval`` seconds
+        while the outbox is empty. Failed batches are logged and retried
+        with an exponential backoff of up to ``max_backoff`` seconds."""
+        backoff = poll_interval
+        while not stop.is_set():
+            try:
+                self.drain()
+            except Exception:
+                logger.exception("outbox batch failed, retrying in %.1fs", backoff)
+                stop.wait(backoff)
+                backoff = min(backoff * 2, max_backoff)
+                continue
+            backoff = poll_interval
+            stop.wait(poll_interval)
+
+    def backlog(self) -> tuple[int, float]:
+        """Records waiting and the age in seconds of the oldest of them."""
+        table = outbox_tbl
+        with self.engine.connect() as connection:
+            count, oldest = connection.execute(
+                sa.select(sa.func.count(), sa.func.min(table.c.created_at))
+            ).one()
+        if oldest is None:
+            return 0, 0.0
+        return count, (utcnow() - _created_at(oldest)).total_seconds()
@@ -0,0 +1,213 @@
+"""Keyset (seek) pagination with opaque cursors.
+
+OFFSET pagination reads and throws away every row before the page, so page
+10,000 costs 10,000 pages of work. Here a page continues from the key values
+of the last (or first) row seen:
+
+    WHERE created_at <= :last_created AND
+          (created_at < :last_created OR (created_at = :last_created AND id < :last_id))
+
+which an index on the ordering keys answers with a range scan, whatever the
+depth. The keys must make the ordering total, i.e. end with a unique column.
+
+    page = paginate(session, sa.select(OrderOrm),
+                    order_by=[sa.desc(OrderOrm.created_at), sa.desc(OrderOrm.id)])
+    page = paginate(session, ..., cursor=page.next_cursor)
+"""
+from __future__ import annotations
+
+import base64
+import binascii
+import datetime
+import decimal
+import json
+from dataclasses import dataclass
+from typing import Any, Generic, Optional, Sequence, TypeVar, Union
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+
+T = TypeVar("T")
+
+NEXT = "n"
+PREVIOUS = "p"
+
+
+class CursorError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class SortKey:
+    column: ColumnElement[Any]
+    descending: bool
+
+    @property
+    def key(self) -> str:
+        return self.column.key  # type: ignore[return-value]
+
+    def ordering(self, reverse: bool = False) -> ColumnElement[Any]:
+        descending = self.descending != reverse
+        return sa.desc(self.column) if descending else sa.asc(self.column)
+
+
+def sort_keys(order_by: Sequence[ColumnElement[Any]]) -> list[SortKey]:
+    """``[sa.desc(OrderOrm.created_at), OrderOrm.id]`` -> sort keys."""
+    keys = []
+    for clause in order_by:
+        if hasattr(clause, "__clause_element__"):
+            clause = clause.__clause_element__()
+        if isinstance(clause, UnaryExpression) and clause.modifier in (
+            operators.desc_op,
+            operators.asc_op,
+        ):
+            keys.append(SortKey(clause.element, clause.modifier is operators.desc_op))
+        else:
+            keys.append(SortKey(clause, False))
+    if not keys:
+        raise ValueError("keyset pagination needs at least one ordering key")
+    return keys
+
+
+def _encode_value(value: Any) -> Any:
+    if isinstance(value, datetime.datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"d": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"dec": str(value)}
+    return value
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return datetime.date.fromisoformat(value["d"])
+        if "dec" in value:
+            return decimal.Decimal(value["dec"])
+    return value
+
+
+def encode_cursor(values: Sequence[Any], direction: str = NEXT) -> str:
+    payload = json.dumps([direction, [_encode_value(value) for value in values]])
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> tuple[str, list[Any]]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (ValueError, TypeError, binascii.Error):
+        raise CursorError("malformed pagination cursor") from None
+    if direction not in (NEXT, PREVIOUS) or len(values) != size:
+        raise CursorError("pagination cursor does not match this ordering")
+    return direction, [_decode_value(value) for value in values]
+
+
+def seek_predicate(
+    keys: Sequence[SortKey], values: Sequence[Any], reverse: bool = False
+) -> ColumnElement[bool]:
+    """Rows strictly after ``values`` in the ordering of ``keys``.
+
+    Expanded to OR'ed prefixes rather than a row value comparison so mixed
+    directions work and every dialect (Oracle included) accepts it. The extra
+    bound on the leading key lets the planner range scan its index.
+    """
+
+    def after(key: SortKey, value: Any) -> ColumnElement[bool]:
+        forward = key.descending == reverse
+        return key.column > value if forward else key.column < value
+
+    alternatives = []
+    for position, (key, value) in enumerate(zip(keys, values)):
+        equal = [k.column == v for k, v in zip(keys[:position], values[:position])]
+        alternatives.append(sa.and_(*equal, after(key, value)))
+
+    lead, lead_value = keys[0], values[0]
+    forward = lead.descending == reverse
+    lead_bound = lead.column >= lead_value if forward else lead.column <= lead_value
+    return sa.and_(lead_bound, sa.or_(*alternatives))
+
+
+@dataclass
+class Page(Generic[T]):
+    items: list[T]
+    next_cursor: Optional[str]
+    prev_cursor: Optional[str]
+
+    @property
+    def has_next(self) -> bool:
+        return self.next_cursor is not None
+
+    @property
+    def has_prev(self) -> bool:
+        return self.prev_cursor is not None
+
+
+def _key_values(item: Any, keys: Sequence[SortKey]) -> list[Any]:
+    if isinstance(item, sa.Row):
+        mapping = item._mapping
+        return [
+            mapping[key.column] if key.column in mapping else mapping[key.key]
+            for key in keys
+        ]
+    return [getattr(item, key.key) for key in keys]
+
+
+def _selects_entity(statement: sa.Select[Any]) -> bool:
+    descriptions = statement.column_descriptions
+    return (
+        len(descriptions) == 1
+        and descriptions[0]["entity"] is not None
+        and descriptions[0]["expr"] is descriptions[0]["entity"]
+    )
+
+
+def paginate(
+    bind: Union[Session, sa.Connection],
+    statement: sa.Select[Any],
+    *,
+    order_by: Sequence[ColumnElement[Any]],
+    limit: int = 20,
+    cursor: Optional[str] = None,
+) -> Page[Any]:
+    """One page of ``statement`` ordered by ``order_by``.
+
+    ``statement`` must not carry its own ORDER BY/LIMIT. Selecting a single
+    ORM entity yields instances, anything else yields rows; either way the
+    ordering keys have to be readable from the result.
+    """
+    keys = sort_keys(order_by)
+    direction, values = NEXT, None
+    if cursor is not None:
+        direction, values = decode_cursor(cursor, len(keys))
+    reverse = direction == PREVIOUS
+
+    ordering = (key.ordering(reverse) for key in keys)
+    paged = statement.order_by(*ordering).limit(limit + 1)
+    if values is not None:
+        paged = paged.where(seek_predicate(keys, values, reverse))
+
+    result = bind.execute(paged)
+    items = list(result.scalars()) if _selects_entity(statement) else list(result)
+
+    more = len(items) > limit
+    items = items[:limit]
+    if reverse:
+        items.reverse()
+
+    if not items:
+        return Page(items, None, None)
+    first, last = _key_values(items[0], keys), _key_values(items[-1], keys)
+    # Coming from one side means the page on that side exists
+    has_next = more if not reverse else cursor is not None
+    has_prev = more if reverse else cursor is not None
+    return Page(
+        items,
+        encode_cursor(last, NEXT) if has_next else None,
+        encode_cursor(first, PREVIOUS) if has_prev else None,
+    )
@@ -0,0 +1,326 @@
+"""Streaming import of catalog product documents (``data.json`` shaped).
+
+The feed is read as JSONL in bounded batches, every batch is validated with
+``myapp.schemas.Product`` (optionally in a process pool) and the valid
+products are upserted into ``products`` together with their category and tag
+links using a handful of multi-row statements per batch.
+
+Products are matched on ``code``, derived from the document id as
+``P{id:05d}`` like the seeded and notebook products.
+
+    python -m myapp.product_import feed.jsonl --url sqlite:///seed.db --workers 4
+"""
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import IO, Any, Iterable, Iterator, Optional, Sequence
+
+import pydantic
+import sqlalchemy as sa
+
+from myapp.engine import create_engine
+from myapp.models import (
+    CategoryOrm,
+    ProductOrm,
+    TagOrm,
+    product_category_assoc_tbl,
+    product_tag_assoc_tbl,
+)
+from myapp.schemas import Product
+
+DEFAULT_BATCH_SIZE = 2_000
+MAX_KEPT_ERRORS = 100
+
+# (line number, raw line)
+RawBatch = list[tuple[int, str]]
+
+
+@dataclass
+class Rejected:
+    line: int
+    error: str
+    raw: str
+
+
+@dataclass
+class ValidatedBatch:
+    products: list[dict[str, Any]] = field(default_factory=list)
+    rejected: list[Rejected] = field(default_factory=list)
+
+
+@dataclass
+class ImportStats:
+    good: int = 0
+    bad: int = 0
+    seconds: float = 0.0
+    errors: list[Rejected] = field(default_factory=list)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return (self.good + self.bad) / self.seconds if self.seconds else 0.0
+
+
+def product_code(document_id: int) -> str:
+    return f"P{document_id:05d}"
+
+
+def validate_batch(batch: RawBatch) -> ValidatedBatch:
+    """Parse and validate raw lines; runs in the worker processes."""
+    validated = ValidatedBatch()
+    for line, raw in batch:
+        try:
+            product = Product.parse_raw(raw)
+        except pydantic.ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors()
+            )
+            validated.rejected.append(Rejected(line, error, raw))
+        else:
+            validated.products.append(
+                {
+                    "code": product_code(product.id),
+                    "name": product.title[:80],
+                    "category": product.category[:30],
+                    "tags": sorted({tag[:30] for tag in product.tags}),
+                }
+            )
+    return validated
+
+
+def iter_raw_batches(stream: IO[str], batch_size: int) -> Iterator[RawBatch]:
+    lines = ((number, raw) for number, raw in enumerate(stream, 1) if raw.strip())
+    while batch := list(itertools.islice(lines, batch_size)):
+        yield batch
+
+
+def _read_json_document(path: str) -> RawBatch:
+    # Single document or array, e.g. data.json; only meant for small files
+    with open(path) as f:
+        contents = json.load(f)
+    documents = contents if isinstance(contents, list) else [contents]
+    return [(number, json.dumps(doc)) for number, doc in enumerate(documents, 1)]
+
+
+def iter_validated(
+    batches: Iterable[RawBatch], workers: int = 0
+) -> Iterator[ValidatedBatch]:
+    """Validate batches in order, in ``workers`` processes when > 0.
+
+    Only ``2 * workers`` batches are in flight, which keeps memory bounded.
+    """
+    if workers <= 0:
+        yield from map(validate_batch, batches)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending: deque[Future[ValidatedBatch]] = deque()
+        for batch in batches:
+            pending.append(executor.submit(validate_batch, batch))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _resolve_names(
+    connection: sa.Connection,
+    column: sa.Column[Any],
+    names: set[str],
+    known: dict[str, int],
+) -> None:
+    """Fill ``known`` with ids for ``names``, inserting the missing ones."""
+    missing = names - known.keys()
+    if not missing:
+        return
+    table = column.table
+    id_column = table.c.id
+    lookup = sa.select(column, id_column).where(column.in_(sorted(missing)))
+    known.update(connection.execute(lookup).all())
+
+    new = missing - known.keys()
+    if new:
+        connection.execute(table.insert(), [{column.key: name} for name in new])
+        lookup = sa.select(column, id_column).where(column.in_(sorted(new)))
+        known.update(connection.execute(lookup).all())
+
+
+def _replace_links(
+    connection: sa.Connection,
+    assoc: sa.Table,
+    product_ids: list[int],
+    links: list[dict[str, int]],
+) -> None:
+    connection.execute(sa.delete(assoc).where(assoc.c.product_id.in_(product_ids)))
+    if links:
+        connection.execute(assoc.insert(), links)
+
+
+def upsert_products(
+    connection: sa.Connection,
+    products: list[dict[str, Any]],
+    tag_ids: dict[str, int],
+    category_ids: dict[str, int],
+) -> None:
+    """Upsert a validated batch; ``tag_ids``/``category_ids`` are name caches
+    shared between batches."""
+    # Last document wins when a code repeats within the batch
+    by_code = {product["code"]: product for product in products}
+    products_tbl = ProductOrm.__table__
+
+    _resolve_names(
+        connection,
+        CategoryOrm.__table__.c.title,
+        {product["category"] for product in by_code.values()},
+        category_ids,
+    )
+    _resolve_names(
+        connection,
+        TagOrm.__table__.c.name,
+        {tag for product in by_code.values() for tag in product["tags"]},
+        tag_ids,
+    )
+
+    lookup = sa.select(products_tbl.c.code, products_tbl.c.id).where(
+        products_tbl.c.code.in_(list(by_code))
+    )
+    product_ids: dict[str, int] = dict(connection.execute(lookup).all())
+
+    if product_ids:
+        connection.execute(
+            sa.update(products_tbl)
+            .where(products_tbl.c.id == sa.bindparam("product_id"))
+            .values(name=sa.bindparam("product_name")),
+            [
+                {"product_id": id_, "product_name": by_code[code]["name"]}
+                for code, id_ in product_ids.items()
+            ],
+        )
+
+    new_codes = by_code.keys() - product_ids.keys()
+    if new_codes:
+        connection.execute(
+            products_tbl.insert(),
+            [{"code": code, "name": by_code[code]["name"]} for code in new_codes],
+        )
+        lookup = sa.select(products_tbl.c.code, products_tbl.c.id).where(
+            products_tbl.c.code.in_(sorted(new_codes))
+        )
+        product_ids.update(connection.execute(lookup).all())
+
+    ids = list(product_ids.values())
+    _replace_links(
+        connection,
+        product_category_assoc_tbl,
+        ids,
+        [
+            {
+                "product_id": product_ids[code],
+                "category_id": category_ids[product["category"]],
+            }
+            for code, product in by_code.items()
+        ],
+    )
+    _replace_links(
+        connection,
+        product_tag_assoc_tbl,
+        ids,
+        [
+            {"product_id": product_ids[code], "tag_id": tag_ids[tag]}
+            for code, product in by_code.items()
+            for tag in product["tags"]
+        ],
+    )
+
+
+def import_products(
+    engine: sa.Engine,
+    path: str,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = 0,
+    rejects: Optional[IO[str]] = None,
+) -> ImportStats:
+    """Import a JSONL feed (or a small ``.json`` document) into ``products``.
+
+    Every batch is committed on its own. Rejected lines are counted, the first
+    ``MAX_KEPT_ERRORS`` kept on the stats and all of them written to
+    ``rejects`` as JSONL when given.
+    """
+    stats = ImportStats()
+    began = time.perf_counter()
+    tag_ids: dict[str, int] = {}
+    category_ids: dict[str, int] = {}
+
+    with open(path) as stream, engine.connect() as connection:
+        if path.endswith(".json"):
+            batches: Iterable[RawBatch] = [_read_json_document(path)]
+        else:
+            batches = iter_raw_batches(stream, batch_size)
+
+        for validated in iter_validated(batches, workers):
+            if validated.products:
+                upsert_products(connection, validated.products, tag_ids, category_ids)
+                connection.commit()
+            stats.good += len(validated.products)
+            stats.bad += len(validated.rejected)
+            room = MAX_KEPT_ERRORS - len(stats.errors)
+            stats.errors.extend(validated.rejected[: max(room, 0)])
+            if rejects is not None:
+                for rejected in validated.rejected:
+                    rejects.write(json.dumps(rejected.__dict__) + "\n")
+
+    stats.seconds = time.perf_counter() - began
+    return stats
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m myapp.product_import",
+        description="Import catalog product documents.",
+    )
+    parser.add_argument("path", help="JSONL feed, or a single .json document")
+    parser.add_argument(
+        "--url", default=None, help="database url (default: MYAPP_DB_URL)"
+    )
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help=f"validation processes, 0 validates inline (cpus: {os.cpu_count()})",
+    )
+    parser.add_argument("--rejects", default=None, help="write rejected lines here")
+    args = parser.parse_args(argv)
+
+    rejects = open(args.rejects, "w") if args.rejects else None
+    try:
+        stats = import_products(
+            create_engine(url=args.url) if args.url else create_engine(),
+            args.path,
+            batch_size=args.batch_size,
+            workers=args.workers,
+            rejects=rejects,
+        )
+    finally:
+        if rejects is not None:
+            rejects.close()
+
+    print(
+        f"good: {stats.good:,} bad: {stats.bad:,} in {stats.seconds:.2f}s "
+        f"({stats.rows_per_sec:,.0f} rows/s)"
+    )
+    for rejected in stats.errors[:10]:
+        print(f"  line {rejected.line}: {rejected.error}", file=sys.stderr)
+    return 0 if not stats.bad else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,96 @@
+"""Compact read models for read-only query paths.
+
+Loading ``CustomerOrm`` & co. for a listing pays for instance construction,
+an ``InstanceState``, the identity map and instrumented attribute access per
+row. The read models here are generated named tuples (no ``__dict__``, built
+straight from the Core row tuples), one per mapped class:
+
+    for order in iter_read(connection, OrderRead, sa.select(...).where(...)):
+        order.invoice_no
+
+``statement`` is a select of the model's columns (``read_select``) with any
+WHERE/ORDER BY/LIMIT added; the columns have to stay in field order.
+"""
+from __future__ import annotations
+
+from collections import namedtuple
+from functools import lru_cache
+from typing import Any, Iterator, Optional, Union
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from myapp.models import (
+    AddressOrm,
+    Base,
+    CategoryOrm,
+    CustomerOrm,
+    OrderOrm,
+    ProductOrm,
+    QuantityOrm,
+    TagOrm,
+    column_keys,
+)
+
+DEFAULT_BATCH_SIZE = 10_000
+
+
+class ReadModel(tuple):  # type: ignore[type-arg]
+    """Base of the generated read models; ``model`` is the mapped class."""
+
+    __slots__ = ()
+    model: type[Base]
+    _fields: tuple[str, ...]
+
+
+@lru_cache(maxsize=None)
+def read_model(model: type[Base]) -> type[ReadModel]:
+    """Read model class of ``model``, e.g. ``OrderOrm`` -> ``OrderRead``."""
+    name = model.__name__.removesuffix("Orm") + "Read"
+    fields = namedtuple(name, column_keys(model))  # type: ignore[misc]
+    return type(  # type: ignore[return-value]
+        name,
+        (fields, ReadModel),
+        {"__slots__": (), "__module__": __name__, "model": model},
+    )
+
+
+@lru_cache(maxsize=None)
+def read_select(read: type[ReadModel]) -> sa.Select[Any]:
+    """Select of the model's columns in field order."""
+    return sa.select(*(getattr(read.model, key) for key in read._fields))
+
+
+def iter_read(
+    bind: Union[Session, sa.Connection],
+    read: type[ReadModel],
+    statement: Optional[sa.Select[Any]] = None,
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+) -> Iterator[Any]:
+    """Stream ``statement`` (default: the whole table) as ``read`` tuples."""
+    result = bind.execute(
+        read_select(read) if statement is None else statement,
+        execution_options={"yield_per": batch_size},
+    )
+    make = read._make  # type: ignore[attr-defined]
+    for partition in result.partitions():
+        yield from map(make, partition)
+
+
+def load_read(
+    bind: Union[Session, sa.Connection],
+    read: type[ReadModel],
+    statement: Optional[sa.Select[Any]] = None,
+) -> list[Any]:
+    result = bind.execute(read_select(read) if statement is None else statement)
+    return list(map(read._make, result))  # type: ignore[attr-defined]
+
+
+CustomerRead = read_model(CustomerOrm)
+AddressRead = read_model(AddressOrm)
+TagRead = read_model(TagOrm)
+CategoryRead = read_model(CategoryOrm)
+ProductRead = read_model(ProductOrm)
+OrderRead = read_model(OrderOrm)
+QuantityRead = read_model(QuantityOrm)
@@ -0,0 +1,313 @@
+"""In-process cache of the tag and category reference tables.
+
+Both tables are small and rarely change, so lookups by id or by name/title
+are served from an LRU with a TTL instead of the database:
+
+    install()                      # session events keep the caches fresh
+    warm(engine)                   # load both tables up front
+
+    tags.by_label(session, "red")                  # TagRef(id=3, name='red')
+    product.tags.add(tags.get_or_create(session, "red"))   # no SELECT on a hit
+
+Rows changed through a ``Session`` (unit of work or ORM bulk UPDATE/DELETE)
+are evicted on ``after_flush`` and again on commit/rollback, so nothing read
+inside an uncommitted transaction outlives it. Writes through Core or from
+other processes are only picked up when the TTL expires.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import (
+    Any,
+    Callable,
+    Generic,
+    Hashable,
+    Iterable,
+    NamedTuple,
+    Optional,
+    TypeVar,
+    Union,
+)
+
+import sqlalchemy as sa
+from sqlalchemy.orm import (
+    ORMExecuteState,
+    Session,
+    UOWTransaction,
+    make_transient_to_detached,
+)
+
+from myapp.models import Base, CategoryOrm, TagOrm
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+R = TypeVar("R", bound=tuple[Any, ...])
+
+DEFAULT_MAXSIZE = 4096
+DEFAULT_TTL = 300.0
+
+
+class TagRef(NamedTuple):
+    id: int
+    name: str
+
+
+class CategoryRef(NamedTuple):
+    id: int
+    title: str
+
+
+@dataclass
+class _Pending:
+    """Cache keys written by a session's open transaction."""
+
+    ids: set[int] = field(default_factory=set)
+    labels: set[str] = field(default_factory=set)
+    everything: bool = False
+
+
+class TTLCache(Generic[K, V]):
+    """LRU mapping whose entries also expire ``ttl`` seconds after insertion."""
+
+    def __init__(
+        self,
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = DEFAULT_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.clock = clock
+        self.hits = self.misses = self.evictions = 0
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> Optional[V]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[0] < self.clock():
+                if entry is not None:
+                    del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        with self._lock:
+            self._data[key] = (self.clock() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key: K) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ReferenceCache(Generic[R]):
+    """Cache of ``model`` rows as ``ref_type`` tuples ``(id, label)``, by id
+    and by label. Labels are not unique in the schema; the lowest id wins."""
+
+    def __init__(
+        self,
+        model: type[Base],
+        label: str,
+        ref_type: Callable[..., R],
+        maxsize: int = DEFAULT_MAXSIZE,
+        ttl: float = DEFAULT_TTL,
+    ) -> None:
+        self.model = model
+        self.label = label
+        self.ref_type = ref_type
+        self.by_id_cache: TTLCache[int, R] = TTLCache(maxsize, ttl)
+        self.by_label_cache: TTLCache[str, R] = TTLCache(maxsize, ttl)
+        self._info_key = f"refcache:{model.__tablename__}"
+
+    @property
+    def table(self) -> sa.Table:
+        return self.model.__table__  # type: ignore[return-value]
+
+    def _put(self, ref: R) -> None:
+        self.by_id_cache.put(ref[0], ref)
+        self.by_label_cache.put(ref[1], ref)
+
+    def _select(self) -> sa.Select[Any]:
+        table = self.table
+        return sa.select(table.c.id, table.c[self.label]).order_by(table.c.id.desc())
+
+    def _load(
+        self, bind: Union[Session, sa.Connection], where: sa.ColumnElement[bool]
+    ) -> Optional[R]:
+        refs = [self.ref_type(*row) for row in bind.execute(self._select().where(where))]
+        # Descending ids: the lowest id is put last and owns the label
+        for ref in refs:
+            self._put(ref)
+        return refs[-1] if refs else None
+
+    def warm(self, bind: Union[Session, sa.Connection, sa.Engine]) -> int:
+        """Load the whole table; returns the number of rows cached."""
+        if isinstance(bind, sa.Engine):
+            with bind.connect() as connection:
+                return self.warm(connection)
+        rows = bind.execute(self._select()).all()
+        for row in rows:
+            self._put(self.ref_type(*row))
+        return len(rows)
+
+    def get(self, bind: Union[Session, sa.Connection], id_: int) -> Optional[R]:
+        ref = self.by_id_cache.get(id_)
+        if ref is None:
+            ref = self._load(bind, self.table.c.id == id_)
+        return ref
+
+    def by_label(self, bind: Union[Session, sa.Connection], label: str) -> Optional[R]:
+        ref = self.by_label_cache.get(label)
+        if ref is None:
+            ref = self._load(bind, self.table.c[self.label] == label)
+        return ref
+
+    def detached(self, ref: R) -> Any:
+        """Detached ``model`` instance for ``ref``; its relationships are not
+        loaded and can not be loaded."""
+        instance = self.model(id=ref[0], **{self.label: ref[1]})
+        make_transient_to_detached(instance)
+        return instance
+
+    def instance(self, session: Session, ref: R) -> Any:
+        """``model`` instance for ``ref`` attached to ``session`` without a
+        SELECT, e.g. to append to ``ProductOrm.tags``."""
+        key = session.identity_key(self.model, ref[0])
+        instance = session.identity_map.get(key)
+        if instance is None:
+            instance = self.detached(ref)
+            session.add(instance)
+        return instance
+
+    def get_or_create(self, session: Session, label: str) -> Any:
+        """Persistent instance labelled ``label``, created (and flushed, to
+        get its id) if the table has none."""
+        ref = self.by_label(session, label)
+        if ref is not None:
+            return self.instance(session, ref)
+        instance = self.model(**{self.label: label})
+        session.add(instance)
+        session.flush()
+        return instance
+
+    def invalidate(
+        self, ids: Iterable[int] = (), labels: Iterable[str] = ()
+    ) -> None:
+        for id_ in ids:
+            self.by_id_cache.pop(id_)
+        for label in labels:
+            self.by_label_cache.pop(label)
+
+    def clear(self) -> None:
+        self.by_id_cache.clear()
+        self.by_label_cache.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "size": len(self.by_id_cache),
+            "hits": self.by_id_cache.hits + self.by_label_cache.hits,
+            "misses": self.by_id_cache.misses + self.by_label_cache.misses,
+            "evictions": self.by_id_cache.evictions + self.by_label_cache.evictions,
+        }
+
+    # Session events
+
+    def _pending(self, session: Session) -> _Pending:
+        pending: _Pending = session.info.setdefault(self._info_key, _Pending())
+        return pending
+
+    def _after_flush(self, session: Session, flush_context: UOWTransaction) -> None:
+        ids: set[int] = set()
+        labels: set[str] = set()
+        for instance in (*session.new, *session.dirty, *session.deleted):
+            if not isinstance(instance, self.model):
+                continue
+            state = sa.inspect(instance)
+            if state.key is not None:
+                ids.add(state.key[1][0])
+            history = state.attrs[self.label].history
+            labels.update(
+                value
+                for value in (*history.added, *history.deleted, *history.unchanged)
+                if value is not None
+            )
+        if ids or labels:
+            self.invalidate(ids, labels)
+            pending = self._pending(session)
+            pending.ids.update(ids)
+            pending.labels.update(labels)
+
+    def _do_orm_execute(self, state: ORMExecuteState) -> None:
+        # Bulk UPDATE/DELETE: the affected rows are unknown, drop everything
+        if state.is_update or state.is_delete:
+            entity = state.statement.entity_description  # type: ignore[attr-defined]
+            if entity["table"] is self.table:
+                self.clear()
+                self._pending(state.session).everything = True
+
+    def _after_transaction(self, session: Session, *args: Any) -> None:
+        # Entries cached from inside the transaction may be gone (rollback)
+        # or stale for other sessions until now (commit)
+        pending: Optional[_Pending] = session.info.get(self._info_key)
+        if pending is None:
+            return
+        if pending.everything:
+            self.clear()
+        else:
+            self.invalidate(pending.ids, pending.labels)
+        # A savepoint rollback leaves the outer transaction to track
+        if not session.in_transaction():
+            del session.info[self._info_key]
+
+    def _handlers(self) -> tuple[tuple[str, Callable[..., None]], ...]:
+        return (
+            ("after_flush", self._after_flush),
+            ("do_orm_execute", self._do_orm_execute),
+            ("after_commit", self._after_transaction),
+            ("after_soft_rollback", self._after_transaction),
+        )
+
+    def listen(self, target: Any = Session) -> None:
+        for name, handler in self._handlers():
+            if not sa.event.contains(target, name, handler):
+                sa.event.listen(target, name, handler)
+
+    def remove(self, target: Any = Session) -> None:
+        for name, handler in self._handlers():
+            if sa.event.contains(target, name, handler):
+                sa.event.remove(target, name, handler)
+
+
+tags: ReferenceCache[TagRef] = ReferenceCache(TagOrm, "name", TagRef)
+categories: ReferenceCache[CategoryRef] = ReferenceCache(
+    CategoryOrm, "title", CategoryRef
+)
+CACHES = (tags, categories)
+
+
+def install(target: Any = Session) -> None:
+    """Keep the caches in sync with writes made through ``target`` sessions
+    (a ``Session`` subclass, ``sessionmaker`` or instance)."""
+    for cache in CACHES:
+        cache.listen(target)
+
+
+def warm(bind: Union[Session, sa.Connection, sa.Engine]) -> dict[str, int]:
+    return {cache.table.name: cache.warm(bind) for cache in CACHES}
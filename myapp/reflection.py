@@ -0,0 +1,311 @@
+"""Reflected tables cached on disk.
+
+``sa.Table(..., autoload_with=engine)`` runs the catalog queries on every
+start, which takes seconds on a large schema. ``cached_table`` is its
+drop-in: the reflected ``MetaData`` is pickled into a file keyed by the
+database URL, schema and table names, and reused for as long as the schema
+fingerprint stored with it matches the database's. The fingerprint is one
+cheap catalog query (the table DDL on SQLite, column/constraint/index
+definitions on PostgreSQL, ``last_ddl_time`` on Oracle, ...), so a start costs
+that query instead of a full reflection.
+
+    tbl_order = cached_table(
+        "demo_orders",
+        metadata_obj,
+        sa.Column("order_id", sa.Integer, primary_key=True, key="id"),
+        autoload_with=engine,
+    )
+
+Columns given to ``cached_table`` override the reflected ones, as with
+``autoload_with``. The cache is skipped with ``cache=False`` or
+``MYAPP_DB_REFLECTION_CACHE=false`` and refreshed from the command line:
+
+    python -m myapp.reflection refresh --url oracle+cx_oracle://... demo_orders
+    python -m myapp.reflection clear
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+
+# Pickles are only readable by the SQLAlchemy they were written with
+FORMAT = f"1-{sa.__version__}"
+
+Fingerprint = Callable[[sa.Connection, Sequence[str], Optional[str]], list[Any]]
+
+
+def _sqlite_fingerprint(
+    connection: sa.Connection, tables: Sequence[str], schema: Optional[str]
+) -> list[Any]:
+    master = f"{schema}.sqlite_master" if schema else "sqlite_master"
+    statement = sa.text(
+        f"SELECT type, name, sql FROM {master} "
+        "WHERE tbl_name IN :tables ORDER BY type, name"
+    ).bindparams(sa.bindparam("tables", expanding=True))
+    return list(connection.execute(statement, {"tables": list(tables)}))
+
+
+def _postgresql_fingerprint(
+    connection: sa.Connection, tables: Sequence[str], schema: Optional[str]
+) -> list[Any]:
+    statement = sa.text("""
+        WITH t AS (
+            SELECT c.oid, c.relname FROM pg_class c
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = COALESCE(:schema, current_schema())
+              AND c.relname IN :tables
+        )
+        SELECT t.relname, 'column', a.attnum::text || ' ' || a.attname || ' '
+            || format_type(a.atttypid, a.atttypmod) || ' ' || a.attnotnull::text
+            || ' ' || COALESCE(pg_get_expr(d.adbin, d.adrelid), '')
+        FROM t JOIN pg_attribute a ON a.attrelid = t.oid
+        LEFT JOIN pg_attrdef d ON d.adrelid = t.oid AND d.adnum = a.attnum
+        WHERE a.attnum > 0 AND NOT a.attisdropped
+        UNION ALL
+        SELECT t.relname, 'constraint', o.conname || ' ' || pg_get_constraintdef(o.oid)
+        FROM t JOIN pg_constraint o ON o.conrelid = t.oid
+        UNION ALL
+        SELECT t.relname, 'index', pg_get_indexdef(i.indexrelid)
+        FROM t JOIN pg_index i ON i.indrelid = t.oid
+        UNION ALL
+        SELECT t.relname, 'comment', COALESCE(obj_description(t.oid, 'pg_class'), '')
+        FROM t
+        ORDER BY 1, 2, 3
+        """).bindparams(sa.bindparam("tables", expanding=True))
+    return list(connection.execute(statement, {"schema": schema, "tables": tables}))
+
+
+def _oracle_fingerprint(
+    connection: sa.Connection, tables: Sequence[str], schema: Optional[str]
+) -> list[Any]:
+    # Any DDL on a table (or its indexes and constraints) moves last_ddl_time
+    denormalize = connection.dialect.denormalize_name  # type: ignore[attr-defined]
+    statement = sa.text(
+        "SELECT object_name, TO_CHAR(last_ddl_time, 'YYYY-MM-DD HH24:MI:SS') "
+        "FROM all_objects WHERE object_type = 'TABLE' "
+        "AND owner = COALESCE(:schema, SYS_CONTEXT('USERENV', 'CURRENT_SCHEMA')) "
+        "AND object_name IN :tables ORDER BY object_name"
+    ).bindparams(sa.bindparam("tables", expanding=True))
+    return list(
+        connection.execute(
+            statement,
+            {
+                "schema": denormalize(schema) if schema else None,
+                "tables": [denormalize(name) for name in tables],
+            },
+        )
+    )
+
+
+def _information_schema_fingerprint(
+    connection: sa.Connection, tables: Sequence[str], schema: Optional[str]
+) -> list[Any]:
+    # Columns only: index and constraint changes are not seen here
+    statement = (
+        "SELECT table_schema, table_name, ordinal_position, column_name, "
+        "data_type, is_nullable, column_default "
+        "FROM information_schema.columns WHERE table_name IN :tables"
+    )
+    if schema is not None:
+        statement += " AND table_schema = :schema"
+    elif connection.dialect.name in ("mysql", "mariadb"):
+        statement += " AND table_schema = DATABASE()"
+    query = sa.text(statement + " ORDER BY 1, 2, 3").bindparams(
+        sa.bindparam("tables", expanding=True)
+    )
+    return list(connection.execute(query, {"schema": schema, "tables": tables}))
+
+
+FINGERPRINTS: dict[str, Fingerprint] = {
+    "sqlite": _sqlite_fingerprint,
+    "postgresql": _postgresql_fingerprint,
+    "oracle": _oracle_fingerprint,
+    "mysql": _information_schema_fingerprint,
+    "mariadb": _information_schema_fingerprint,
+    "mssql": _information_schema_fingerprint,
+}
+
+
+def schema_fingerprint(
+    connection: sa.Connection, tables: Sequence[str], schema: Optional[str] = None
+) -> Optional[str]:
+    """Hash of the catalog entries of ``tables``; None when the dialect has
+    no fingerprint query, which disables the cache."""
+    fingerprint = FINGERPRINTS.get(connection.dialect.name)
+    if fingerprint is None:
+        return None
+    rows = fingerprint(connection, sorted(tables), schema)
+    return hashlib.sha1(repr([tuple(row) for row in rows]).encode()).hexdigest()
+
+
+def cache_directory(directory: Optional[str] = None) -> str:
+    if directory:
+        return directory
+    from myapp.settings import get_settings
+
+    configured = get_settings().reflection_cache_dir
+    if configured:
+        return configured
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "myapp", "reflection")
+
+
+def cache_path(
+    url: sa.URL,
+    tables: Sequence[str],
+    schema: Optional[str] = None,
+    directory: Optional[str] = None,
+) -> str:
+    key = "\n".join(
+        [url.render_as_string(hide_password=True), schema or "", *sorted(tables)]
+    )
+    digest = hashlib.sha1(key.encode()).hexdigest()[:16]
+    return os.path.join(
+        cache_directory(directory), f"{url.get_backend_name()}_{digest}.pickle"
+    )
+
+
+def _load(path: str) -> Optional[dict[str, Any]]:
+    try:
+        with open(path, "rb") as f:
+            # Unpickling runs code: the directory is created private (0700),
+            # never point it at a shared one
+            entry: dict[str, Any] = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+        return None
+    return entry if entry.get("format") == FORMAT else None
+
+
+def _store(path: str, entry: dict[str, Any]) -> None:
+    directory = os.path.dirname(path)
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    # Written under a temporary name and renamed, readers never see half a file
+    fd, writing = tempfile.mkstemp(suffix=".pickle", dir=directory)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(writing, path)
+    except BaseException:
+        os.remove(writing)
+        raise
+
+
+def reflect(
+    engine: sa.Engine,
+    tables: Sequence[str],
+    schema: Optional[str] = None,
+    *,
+    cache: Optional[bool] = None,
+    refresh: bool = False,
+    directory: Optional[str] = None,
+) -> sa.MetaData:
+    """``MetaData`` with ``tables`` (and the tables their foreign keys refer
+    to) reflected, from the cache when its fingerprint still matches. The
+    cache entry is keyed by the set of ``tables``.
+
+    ``cache=None`` follows ``MYAPP_DB_REFLECTION_CACHE``; ``refresh=True``
+    reflects and rewrites the cache entry regardless of the fingerprint.
+    """
+    if cache is None:
+        from myapp.settings import get_settings
+
+        cache = get_settings().reflection_cache
+
+    with engine.connect() as connection:
+        fingerprint = schema_fingerprint(connection, tables, schema) if cache else None
+        path = cache_path(engine.url, tables, schema, directory)
+        if fingerprint is not None and not refresh:
+            entry = _load(path)
+            if entry is not None and entry["fingerprint"] == fingerprint:
+                metadata: sa.MetaData = entry["metadata"]
+                return metadata
+
+        metadata = sa.MetaData()
+        metadata.reflect(connection, schema=schema, only=list(tables))
+    if fingerprint is not None:
+        _store(
+            path, {"format": FORMAT, "fingerprint": fingerprint, "metadata": metadata}
+        )
+    return metadata
+
+
+def cached_table(
+    name: str,
+    metadata: sa.MetaData,
+    *columns: sa.Column[Any],
+    autoload_with: sa.Engine,
+    schema: Optional[str] = None,
+    cache: Optional[bool] = None,
+    **kw: Any,
+) -> sa.Table:
+    """``sa.Table(name, metadata, *columns, autoload_with=engine)`` with the
+    reflection served from the cache."""
+    reflected = reflect(autoload_with, [name], schema, cache=cache)
+    key = f"{schema}.{name}" if schema else name
+    table = reflected.tables[key].to_metadata(metadata, schema=schema)
+    if columns or kw:
+        # Same as autoload_with: given columns replace the reflected ones
+        table = sa.Table(
+            name, metadata, *columns, schema=schema, extend_existing=True, **kw
+        )
+    return table
+
+
+def clear(directory: Optional[str] = None) -> int:
+    removed = 0
+    for path in glob.glob(os.path.join(cache_directory(directory), "*.pickle")):
+        os.remove(path)
+        removed += 1
+    return removed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m myapp.reflection", description=__doc__.split("\n\n")[0]
+    )
+    parser.add_argument("--dir", default=None, help="cache directory")
+    commands = parser.add_subparsers(dest="command", required=True)
+    refresh = commands.add_parser("refresh", help="reflect tables into the cache")
+    refresh.add_argument("tables", nargs="+")
+    refresh.add_argument("--url", default=None)
+    refresh.add_argument("--schema", default=None)
+    commands.add_parser("clear", help="delete every cached reflection")
+    args = parser.parse_args(argv)
+
+    if args.command == "clear":
+        print(f"removed {clear(args.dir)} cached reflections")
+        return 0
+
+    from myapp.engine import create_engine
+
+    engine = create_engine(url=args.url) if args.url else create_engine()
+    if engine.dialect.name not in FINGERPRINTS:
+        print(f"{engine.dialect.name} has no schema fingerprint, nothing to cache")
+        return 1
+    try:
+        # One entry per table, the way cached_table looks them up
+        for name in args.tables:
+            reflect(
+                engine,
+                [name],
+                args.schema,
+                cache=True,
+                refresh=True,
+                directory=args.dir,
+            )
+            print(f"{name}: {cache_path(engine.url, [name], args.schema, args.dir)}")
+    finally:
+        engine.dispose()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
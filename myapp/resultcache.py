@@ -0,0 +1,346 @@
+"""Opt-in cache of ``Session.execute`` results.
+
+Statements run with the ``result_cache`` execution option are answered from
+the cache, after SQLAlchemy's dogpile caching example:
+
+    cache = ResultCache(MemoryBackend(max_bytes=64 << 20))
+    cache.listen(Session)
+
+    session.scalars(sa.select(TagOrm).execution_options(result_cache=True))
+    session.scalars(
+        sa.select(OrderOrm)
+        .where(OrderOrm.customer_id == customer_id)
+        .order_by(OrderOrm.id.desc())
+        .limit(10)
+        .execution_options(result_cache=True)
+    )
+
+The key is the statement's cache key with its bound parameters. The value is
+the pickled ``FrozenResult``, eager loads included; ORM objects of a hit are
+merged into the session without a SELECT (``load=False``).
+
+Each entry remembers the tables its SQL read, taken from the compiled
+statements (joined eager loads included) of the query and of the loads run
+while it was filled. Writes made through a ``Session`` (flushes, ORM bulk and Core DML)
+evict the entries of the written tables on ``after_commit``. Until then the
+writing session itself bypasses the cache for those tables. Writes from other
+processes, or through a bare ``Connection``, are not seen: give the backend a
+``ttl``, or ``invalidate`` by hand. Keys do not include the database, use a
+cache (or a ``namespace``) per database.
+
+``MemoryBackend`` is an LRU bounded in bytes of pickled results; another
+store (Redis, memcached) plugs in through ``CacheBackend``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, Optional, Protocol
+
+import sqlalchemy as sa
+from sqlalchemy.engine import Result
+from sqlalchemy.orm import ORMExecuteState, Session, UOWTransaction, loading
+from sqlalchemy.sql.util import find_tables
+from sqlalchemy.util import LRUCache
+
+DEFAULT_MAX_BYTES = 64 << 20
+# Compiled statements kept for building keys
+STATEMENT_CACHE_SIZE = 1_000
+
+OPTION = "result_cache"
+
+
+class CacheBackend(Protocol):
+    def get(self, key: str) -> Optional[bytes]: ...
+
+    def set(self, key: str, value: bytes, tables: frozenset[str]) -> bool:
+        """Store ``value``, read from ``tables``; False when it was not kept
+        (e.g. too large)."""
+        ...
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        """Drop every entry read from any of ``tables``."""
+        ...
+
+    def clear(self) -> None: ...
+
+    def stats(self) -> dict[str, int]: ...
+
+
+class MemoryBackend:
+    """In-process LRU holding at most ``max_bytes`` of values, each expiring
+    ``ttl`` seconds after it was stored (never with None)."""
+
+    def __init__(
+        self,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+        self.size = 0
+        self.evictions = self.invalidations = self.expirations = 0
+        # key -> (expires at, value, tables)
+        self._data: OrderedDict[str, tuple[float, bytes, frozenset[str]]] = (
+            OrderedDict()
+        )
+        self._by_table: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def _drop(self, key: str) -> None:
+        _, value, tables = self._data.pop(key)
+        self.size -= len(value)
+        for table in tables:
+            keys = self._by_table.get(table)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_table[table]
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            if entry[0] < self.clock():
+                self._drop(key)
+                self.expirations += 1
+                return None
+            self._data.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: bytes, tables: frozenset[str]) -> bool:
+        if len(value) > self.max_bytes:
+            return False
+        expires = self.clock() + self.ttl if self.ttl is not None else float("inf")
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (expires, value, tables)
+            self.size += len(value)
+            for table in tables:
+                self._by_table.setdefault(table, set()).add(key)
+            while self.size > self.max_bytes:
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+        return True
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        with self._lock:
+            for table in tables:
+                for key in list(self._by_table.get(table, ())):
+                    self._drop(key)
+                    self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._by_table.clear()
+            self.size = 0
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._data),
+            "bytes": self.size,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "expirations": self.expirations,
+        }
+
+
+def statement_tables(statement: Any) -> frozenset[str]:
+    """Names of the tables ``statement`` reads, subqueries and joins included."""
+    return frozenset(
+        table.name
+        for table in find_tables(statement, include_aliases=True, include_joins=True)
+        if isinstance(table, sa.Table)
+    )
+
+
+def result_tables(result: Result[Any]) -> frozenset[str]:
+    """Tables of the SQL that produced ``result``: the compiled statement, so
+    joined eager loads are included."""
+    # ORM results wrap the cursor result
+    cursor = getattr(result, "raw", None) or result
+    compiled = getattr(getattr(cursor, "context", None), "compiled", None)
+    if compiled is None:
+        return frozenset()
+    compile_state = getattr(compiled, "compile_state", None)
+    statement = getattr(compile_state, "statement", None)
+    return statement_tables(statement if statement is not None else compiled.statement)
+
+
+def written_tables(session: Session) -> set[str]:
+    """Tables the pending flush of ``session`` writes: those of the changed
+    objects and their many-to-many association tables."""
+    tables: set[str] = set()
+    for instance in (*session.new, *session.dirty, *session.deleted):
+        mapper = sa.inspect(instance).mapper
+        tables.update(table.name for table in mapper.tables)
+        tables.update(
+            relationship.secondary.name
+            for relationship in mapper.relationships
+            if isinstance(relationship.secondary, sa.Table)
+        )
+    return tables
+
+
+class ResultCache:
+    def __init__(
+        self, backend: Optional[CacheBackend] = None, *, namespace: str = ""
+    ) -> None:
+        self.backend: CacheBackend = backend or MemoryBackend()
+        self.namespace = namespace
+        self.hits = self.misses = self.stores = self.skipped = 0
+        self._statements = LRUCache(STATEMENT_CACHE_SIZE)
+        # Bumped per table on invalidation: a result read while one of its
+        # tables was invalidated is not stored
+        self._versions: dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._info_key = f"resultcache:{id(self)}"
+
+    def key(self, state: ORMExecuteState) -> Optional[str]:
+        cache_key = state.statement._generate_cache_key()
+        if cache_key is None:
+            return None
+        text = cache_key.to_offline_string(
+            self._statements, state.statement, state.parameters or {}
+        )
+        return hashlib.sha1(f"{self.namespace}\n{text}".encode()).hexdigest()
+
+    def invalidate(self, tables: Iterable[str]) -> None:
+        tables = set(tables)
+        with self._lock:
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+        self.backend.invalidate(tables)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "skipped": self.skipped,
+            **self.backend.stats(),
+        }
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    # Session events
+
+    def _written(self, session: Session) -> set[str]:
+        written: set[str] = session.info.setdefault(self._info_key, set())
+        return written
+
+    def _do_orm_execute(self, state: ORMExecuteState) -> Optional[Result[Any]]:
+        session = state.session
+        if state.is_insert or state.is_update or state.is_delete:
+            table = getattr(state.statement, "table", None)
+            if isinstance(table, sa.Table):
+                self._written(session).add(table.name)
+            return None
+        if not state.is_select:
+            return None
+        # Loads run while a result is being cached (selectin, lazy) add the
+        # tables of their SQL to it
+        collecting: list[set[str]] = session.info.get(f"{self._info_key}:reads", [])
+        # (relationship loads inherit the execution options of their query)
+        if collecting and (
+            state.is_relationship_load or not state.execution_options.get(OPTION)
+        ):
+            result = state.invoke_statement()
+            tables = result_tables(result)
+            for reads in collecting:
+                reads.update(tables)
+            return result
+        if not state.execution_options.get(OPTION) or state.is_relationship_load:
+            return None
+
+        tables = statement_tables(state.statement)
+        key = self.key(state) if tables else None
+        # Uncacheable, or stale for a session that wrote to its tables
+        if key is None or tables & self._written(session):
+            self._count("skipped")
+            return None
+        data = self.backend.get(key)
+        if data is not None:
+            read, frozen = pickle.loads(data)
+            # The entry may have read more tables than the statement names
+            # (joined eager loads)
+            if read & self._written(session):
+                self._count("skipped")
+                return None
+            self._count("hits")
+            if state.is_orm_statement:
+                frozen = loading.merge_frozen_result(
+                    session, state.statement, frozen, load=False
+                )
+            return frozen()
+
+        self._count("misses")
+        with self._lock:
+            versions = dict(self._versions)
+        reads = set(tables)
+        collecting = session.info.setdefault(f"{self._info_key}:reads", [])
+        collecting.append(reads)
+        try:
+            result = state.invoke_statement()
+            reads.update(result_tables(result))
+            frozen = result.freeze()
+        finally:
+            collecting.remove(reads)
+        with self._lock:
+            changed = any(
+                self._versions.get(table, 0) != versions.get(table, 0)
+                for table in reads
+            )
+        entry = (frozenset(reads), frozen)
+        if not changed and self.backend.set(
+            key, pickle.dumps(entry, pickle.HIGHEST_PROTOCOL), entry[0]
+        ):
+            self._count("stores")
+        return frozen()
+
+    def _after_flush(self, session: Session, flush_context: UOWTransaction) -> None:
+        self._written(session).update(written_tables(session))
+
+    def _after_commit(self, session: Session) -> None:
+        written = session.info.pop(self._info_key, None)
+        if written:
+            self.invalidate(written)
+
+    def _after_rollback(self, session: Session, *args: Any) -> None:
+        # A savepoint rollback leaves the outer transaction to commit
+        if not session.in_transaction():
+            session.info.pop(self._info_key, None)
+
+    def _handlers(self) -> tuple[tuple[str, Callable[..., Any]], ...]:
+        return (
+            ("do_orm_execute", self._do_orm_execute),
+            ("after_flush", self._after_flush),
+            ("after_commit", self._after_commit),
+            ("after_soft_rollback", self._after_rollback),
+        )
+
+    def listen(self, target: Any = Session) -> None:
+        """Serve and invalidate the cache for ``target`` sessions (a
+        ``Session`` subclass, ``sessionmaker`` or instance)."""
+        for name, handler in self._handlers():
+            if not sa.event.contains(target, name, handler):
+                sa.event.listen(target, name, handler)
+
+    def remove(self, target: Any = Session) -> None:
+        for name, handler in self._handlers():
+            if sa.event.contains(target, name, handler):
+                sa.event.remove(target, name, handler)
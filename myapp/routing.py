@@ -0,0 +1,206 @@
+"""Session routing reads to replicas and writes to the primary.
+
+``RoutingSession.get_bind`` sends
+
+* flushes, INSERT/UPDATE/DELETE, text statements and ``session.connection()``
+  to the primary;
+* SELECTs with ``with_for_update`` to the primary;
+* every other SELECT (queries, ``session.get``, lazy and eager loads) to one
+  healthy replica, the same one for the whole transaction.
+
+Once a transaction has written, its later reads go to the primary too (read
+your writes), and with ``sticky_seconds`` for that long after the commit, to
+cover the replicas' lag. ``statement.execution_options(use_primary=True)``
+forces a single read onto the primary.
+
+    replicas = ReplicaSet([create_engine(url=url) for url in replica_urls])
+    Sessions = sessionmaker(class_=RoutingSession, primary=engine, replicas=replicas)
+    with Sessions() as session:
+        session.scalars(sa.select(ProductOrm).options(...))  # a replica
+
+A replica is used while its health check passes and its lag (when a lag
+check is given) is at most ``max_lag`` seconds. Both checks run at most every
+``check_interval`` seconds, on the next pick; a disconnect error on a replica
+takes it out until the next check. Without a usable replica reads fall back
+to the primary.
+"""
+from __future__ import annotations
+
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, SessionTransaction
+
+HealthCheck = Callable[[sa.Engine], bool]
+LagCheck = Callable[[sa.Engine], Optional[float]]
+
+DEFAULT_CHECK_INTERVAL = 10.0
+
+
+def ping(engine: sa.Engine) -> bool:
+    try:
+        with engine.connect() as connection:
+            connection.exec_driver_sql("SELECT 1")
+    except sa.exc.DBAPIError:
+        return False
+    return True
+
+
+def postgresql_lag(engine: sa.Engine) -> Optional[float]:
+    """Seconds since the last transaction replayed on a PostgreSQL standby
+    (None on a primary). Idle primaries make this grow too, pair it with a
+    heartbeat table when writes are rare."""
+    with engine.connect() as connection:
+        lag = connection.scalar(
+            sa.text(
+                "SELECT EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())"
+            )
+        )
+    return float(lag) if lag is not None else None
+
+
+@dataclass
+class ReplicaState:
+    engine: sa.Engine
+    healthy: bool = True
+    lag: Optional[float] = None
+    checked_at: float = float("-inf")
+    failures: int = 0
+
+
+class ReplicaSet:
+    def __init__(
+        self,
+        replicas: Sequence[sa.Engine],
+        *,
+        health_check: Optional[HealthCheck] = ping,
+        lag_check: Optional[LagCheck] = None,
+        max_lag: float = 5.0,
+        check_interval: float = DEFAULT_CHECK_INTERVAL,
+    ) -> None:
+        self.states = [ReplicaState(engine) for engine in replicas]
+        self.health_check = health_check
+        self.lag_check = lag_check
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._turn = itertools.count()
+        self._lock = threading.Lock()
+        for state in self.states:
+            sa.event.listen(state.engine, "handle_error", self._on_error)
+
+    def _on_error(self, context: sa.engine.ExceptionContext) -> None:
+        if context.is_disconnect and context.engine is not None:
+            self.mark_down(context.engine)
+
+    def mark_down(self, engine: sa.Engine) -> None:
+        """Stop routing to ``engine`` until its next check passes."""
+        with self._lock:
+            for state in self.states:
+                if state.engine is engine:
+                    state.healthy = False
+                    state.failures += 1
+                    state.checked_at = time.monotonic()
+
+    def check(self, state: ReplicaState) -> None:
+        healthy = self.health_check(state.engine) if self.health_check else True
+        lag = self.lag_check(state.engine) if healthy and self.lag_check else None
+        with self._lock:
+            state.healthy = healthy
+            state.lag = lag
+            state.checked_at = time.monotonic()
+            if not healthy:
+                state.failures += 1
+
+    def usable(self, state: ReplicaState) -> bool:
+        return state.healthy and (state.lag is None or state.lag <= self.max_lag)
+
+    def pick(self) -> Optional[sa.Engine]:
+        """Next usable replica, round robin; None when there is none."""
+        now = time.monotonic()
+        for state in self.states:
+            if now - state.checked_at >= self.check_interval:
+                self.check(state)
+        usable = [state for state in self.states if self.usable(state)]
+        if not usable:
+            return None
+        return usable[next(self._turn) % len(usable)].engine
+
+    def dispose(self) -> None:
+        for state in self.states:
+            sa.event.remove(state.engine, "handle_error", self._on_error)
+            state.engine.dispose()
+
+
+def _writes(clause: Optional[sa.ClauseElement]) -> bool:
+    """Whether ``clause`` has to run on the primary."""
+    if not isinstance(clause, (sa.Select, sa.CompoundSelect)):
+        # DML, text and DDL, and clause=None (flushes, session.connection())
+        return True
+    if clause.get_execution_options().get("use_primary"):
+        return True
+    return isinstance(clause, sa.Select) and clause._for_update_arg is not None
+
+
+class RoutingSession(Session):
+    def __init__(
+        self,
+        primary: sa.Engine,
+        replicas: ReplicaSet,
+        *,
+        sticky_seconds: float = 0.0,
+        **kwargs: Any,
+    ) -> None:
+        # sessionmaker passes bind=None along
+        kwargs["bind"] = primary
+        super().__init__(**kwargs)
+        self.primary = primary
+        self.replicas = replicas
+        self.sticky_seconds = sticky_seconds
+        # Replica of the current transaction, and whether it wrote
+        self._replica: Optional[sa.Engine] = None
+        self._wrote = False
+        self._primary_until = float("-inf")
+        sa.event.listen(self, "after_transaction_end", self._transaction_ended)
+
+    def _transaction_ended(
+        self, session: Session, transaction: SessionTransaction
+    ) -> None:
+        if transaction.parent is not None:
+            return
+        if self._wrote and self.sticky_seconds:
+            self._primary_until = time.monotonic() + self.sticky_seconds
+        self._replica = None
+        self._wrote = False
+
+    def get_bind(
+        self,
+        mapper: Optional[Any] = None,
+        *,
+        clause: Optional[sa.ClauseElement] = None,
+        **kw: Any,
+    ) -> Any:
+        if self._flushing or _writes(clause):
+            self._wrote = True
+            return self.primary
+        if self._wrote or time.monotonic() < self._primary_until:
+            return self.primary
+        if self._replica is None:
+            self._replica = self.replicas.pick() or self.primary
+        return self._replica
+
+
+def create_replica_set(**kwargs: Any) -> ReplicaSet:
+    """``ReplicaSet`` of the ``MYAPP_DB_REPLICA_URLS`` engines, pooled like the
+    primary; ``kwargs`` go to ``ReplicaSet``."""
+    from myapp.engine import create_engine
+    from myapp.settings import get_settings
+
+    settings = get_settings()
+    kwargs.setdefault("max_lag", settings.replica_max_lag)
+    return ReplicaSet(
+        [create_engine(settings, url=url) for url in settings.replica_urls], **kwargs
+    )
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from typing import Tuple
+
+from pydantic import AnyHttpUrl, BaseModel, Field, constr
 
 
 class CustomerBase(BaseModel):
@@ -33,3 +35,33 @@ class CustomerFull(BaseModel):
 
     class Config:
         orm_mode = True
+
+
+title_str = constr(
+    strict=True,
+    min_length=5,
+    max_length=18,
+    strip_whitespace=True,
+    regex=r"^([a-zA-Z]+( [a-zA-Z]+)+)$",
+)
+category_str = constr(strict=True, to_lower=True)
+
+
+# Product document of the catalog feed (see data.json)
+class Product(BaseModel):
+    id: int
+    title: title_str
+    description: str = Field(default=None, max_length=255)
+    price: float
+    discount_percentage: float = Field(default=..., alias="discountPercentage")
+    rating: int = Field(ge=1, le=10)
+    stock: int
+    brand: str
+    category: category_str
+    thumbnail: AnyHttpUrl
+    images: Tuple[AnyHttpUrl, ...]
+    tags: Tuple[str, ...] = ()
+
+    class Config:
+        orm_mode = True
+        allow_population_by_field_name = True
@@ -0,0 +1,521 @@
+"""Columnar bulk seeding for the ``myapp.models`` tables.
+
+Rows are generated chunk by chunk as plain column lists (no pydantic schema or
+ORM instance per row) and written with Core ``insert()`` executemany, table by
+table in the foreign key order of ``Base.metadata``.
+
+Ids are written explicitly. PostgreSQL and Oracle do not advance an identity
+past explicit values, so ``restart_identities`` moves them past ``max(id)``
+once the tables are written; the other backends follow the inserted ids.
+
+    python -m myapp.seed --url sqlite:///seed.db --create-all --customers 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Iterator, Optional, Sequence
+
+import sqlalchemy as sa
+
+from myapp.engine import create_engine
+from myapp.models import TIMEZONE, Base
+
+DEFAULT_CHUNK_SIZE = 5_000
+DEFAULT_POOL_SIZE = 4_096
+
+Columns = dict[str, list[Any]]
+ProgressCallback = Callable[["TableStats"], None]
+
+
+@dataclass(frozen=True)
+class SeedPlan:
+    customers: int = 1_000
+    products: int = 500
+    tags: int = 50
+    categories: int = 20
+    orders_per_customer: int = 2
+    lines_per_order: int = 3
+    tags_per_product: int = 2
+    categories_per_product: int = 1
+    order_window_days: int = 365
+
+    def __post_init__(self) -> None:
+        if self.lines_per_order > self.products:
+            raise ValueError("lines_per_order can not exceed the number of products")
+        if self.tags_per_product > self.tags:
+            raise ValueError("tags_per_product can not exceed the number of tags")
+        if self.categories_per_product > self.categories:
+            raise ValueError(
+                "categories_per_product can not exceed the number of categories"
+            )
+
+    def per_customer(self, table_name: str) -> Optional[int]:
+        """Rows of ``table_name`` generated for every customer, ``None`` if the
+        table is reference data that does not scale with customers."""
+        lines = self.orders_per_customer * self.lines_per_order
+        return {
+            "customers": 1,
+            "addresses": 1,
+            "orderes": self.orders_per_customer,
+            "product_order_assoc": lines,
+            "product_order_quantities": lines,
+        }.get(table_name)
+
+    def rows(self, table_name: str) -> int:
+        scale = self.per_customer(table_name)
+        if scale is not None:
+            return self.customers * scale
+        return {
+            "categories": self.categories,
+            "tags": self.tags,
+            "products": self.products,
+            "product_tag_assoc": self.products * self.tags_per_product,
+            "product_category_assoc": self.products * self.categories_per_product,
+        }.get(table_name, 0)
+
+
+class FakerPool:
+    """Faker output generated once up front and sampled per chunk.
+
+    Calling Faker for every row is what made the notebook generators slow, so
+    each provider is called ``size`` times here and chunks draw from the pool.
+    """
+
+    def __init__(
+        self, seed: int, size: int = DEFAULT_POOL_SIZE, locale: Optional[str] = None
+    ) -> None:
+        # Imported here: Faker takes longer to import than the rest of the CLI
+        from faker import Faker
+
+        fake = Faker(locale)
+        fake.seed_instance(seed)
+
+        self.names = [fake.name()[:30] for _ in range(size)]
+        self.phone_numbers = [fake.phone_number()[:60] for _ in range(size)]
+        self.addresses = [
+            fake.address().replace("\n", ", ")[:255] for _ in range(size)
+        ]
+        self.words = [fake.word() for _ in range(size)]
+
+
+@dataclass
+class SeedContext:
+    plan: SeedPlan
+    pool: FakerPool
+    seed: int
+    anchor: datetime
+    first_ids: dict[str, int] = field(default_factory=dict)
+
+    def rng(self, table_name: str, start: int) -> random.Random:
+        # Keyed by chunk start so the same chunk is identical wherever it is built
+        return random.Random(f"{self.seed}:{table_name}:{start}")
+
+    def first_id(self, table_name: str) -> int:
+        return self.first_ids.get(table_name, 1)
+
+
+ColumnGenerator = Callable[[SeedContext, random.Random, int, int], Columns]
+
+
+def _id_range(ctx: SeedContext, table_name: str, start: int, count: int) -> list[int]:
+    first = ctx.first_id(table_name) + start
+    return list(range(first, first + count))
+
+
+def _customers(ctx: SeedContext, rng: random.Random, start: int, count: int) -> Columns:
+    return {
+        "id": _id_range(ctx, "customers", start, count),
+        "name": rng.choices(ctx.pool.names, k=count),
+        "contact_number": rng.choices(ctx.pool.phone_numbers, k=count),
+        "is_active": [rng.random() < 0.9 for _ in range(count)],
+    }
+
+
+def _addresses(ctx: SeedContext, rng: random.Random, start: int, count: int) -> Columns:
+    return {
+        "id": _id_range(ctx, "addresses", start, count),
+        "customer_id": _id_range(ctx, "customers", start, count),
+        "present_address": rng.choices(ctx.pool.addresses, k=count),
+        "permenent_address": rng.choices(ctx.pool.addresses, k=count),
+    }
+
+
+def _tags(ctx: SeedContext, rng: random.Random, start: int, count: int) -> Columns:
+    ids = _id_range(ctx, "tags", start, count)
+    words = rng.choices(ctx.pool.words, k=count)
+    return {
+        "id": ids,
+        "name": [f"{word}-{id_}"[:30] for word, id_ in zip(words, ids)],
+    }
+
+
+def _categories(
+    ctx: SeedContext, rng: random.Random, start: int, count: int
+) -> Columns:
+    ids = _id_range(ctx, "categories", start, count)
+    words = rng.choices(ctx.pool.words, k=count)
+    return {
+        "id": ids,
+        "title": [f"{word.title()} {id_}"[:30] for word, id_ in zip(words, ids)],
+    }
+
+
+def _products(ctx: SeedContext, rng: random.Random, start: int, count: int) -> Columns:
+    ids = _id_range(ctx, "products", start, count)
+    first_words = rng.choices(ctx.pool.words, k=count)
+    second_words = rng.choices(ctx.pool.words, k=count)
+    return {
+        "id": ids,
+        "code": [f"P{id_:05d}" for id_ in ids],
+        "name": [
+            f"{first} {second}".title()[:80]
+            for first, second in zip(first_words, second_words)
+        ],
+    }
+
+
+def _product_links(
+    start: int, count: int, per_product: int, modulo: int
+) -> tuple[list[int], list[int]]:
+    # Row i links product i // per_product to a distinct target (tag/category)
+    products = [(start + i) // per_product for i in range(count)]
+    targets = [
+        (product * 7 + (start + i) % per_product) % modulo
+        for i, product in enumerate(products)
+    ]
+    return products, targets
+
+
+def _product_tag_assoc(
+    ctx: SeedContext, rng: random.Random, start: int, count: int
+) -> Columns:
+    products, tags = _product_links(
+        start, count, ctx.plan.tags_per_product, ctx.plan.tags
+    )
+    return {
+        "product_id": [ctx.first_id("products") + p for p in products],
+        "tag_id": [ctx.first_id("tags") + t for t in tags],
+    }
+
+
+def _product_category_assoc(
+    ctx: SeedContext, rng: random.Random, start: int, count: int
+) -> Columns:
+    products, categories = _product_links(
+        start, count, ctx.plan.categories_per_product, ctx.plan.categories
+    )
+    return {
+        "product_id": [ctx.first_id("products") + p for p in products],
+        "category_id": [ctx.first_id("categories") + c for c in categories],
+    }
+
+
+def _orders(ctx: SeedContext, rng: random.Random, start: int, count: int) -> Columns:
+    window = ctx.plan.order_window_days * 86_400
+    created_at = [
+        ctx.anchor - timedelta(seconds=rng.randrange(window)) for _ in range(count)
+    ]
+    first_customer = ctx.first_id("customers")
+    return {
+        "id": _id_range(ctx, "orderes", start, count),
+        "invoice_no": [
+            f"INV-{created:%Y%m%d}{rng.getrandbits(24):06X}" for created in created_at
+        ],
+        "customer_id": [
+            first_customer + (start + i) // ctx.plan.orders_per_customer
+            for i in range(count)
+        ],
+        "created_at": created_at,
+    }
+
+
+def _order_lines(ctx: SeedContext, start: int, count: int) -> Columns:
+    # Shared by the association and quantity tables so every quantity row has
+    # a matching product_order_assoc row.
+    per_order = ctx.plan.lines_per_order
+    orders = [(start + i) // per_order for i in range(count)]
+    products = [
+        (order * 31 + (start + i) % per_order) % ctx.plan.products
+        for i, order in enumerate(orders)
+    ]
+    return {
+        "order_id": [ctx.first_id("orderes") + o for o in orders],
+        "product_id": [ctx.first_id("products") + p for p in products],
+    }
+
+
+def _product_order_assoc(
+    ctx: SeedContext, rng: random.Random, start: int, count: int
+) -> Columns:
+    return _order_lines(ctx, start, count)
+
+
+def _product_order_quantities(
+    ctx: SeedContext, rng: random.Random, start: int, count: int
+) -> Columns:
+    columns = _order_lines(ctx, start, count)
+    columns["qty"] = [rng.randint(1, 10) for _ in range(count)]
+    return columns
+
+
+GENERATORS: dict[str, ColumnGenerator] = {
+    "customers": _customers,
+    "addresses": _addresses,
+    "tags": _tags,
+    "categories": _categories,
+    "products": _products,
+    "product_tag_assoc": _product_tag_assoc,
+    "product_category_assoc": _product_category_assoc,
+    "orderes": _orders,
+    "product_order_assoc": _product_order_assoc,
+    "product_order_quantities": _product_order_quantities,
+}
+
+# Tables whose ids are assigned client-side so children can reference them
+# without reading generated keys back.
+EXPLICIT_ID_TABLES = (
+    "customers",
+    "addresses",
+    "tags",
+    "categories",
+    "products",
+    "orderes",
+)
+
+
+@dataclass
+class TableStats:
+    table: str
+    rows: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+@dataclass
+class SeedReport:
+    tables: list[TableStats] = field(default_factory=list)
+    # Wall clock time of the whole run; table timings overlap when parallel
+    elapsed: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(stats.rows for stats in self.tables)
+
+    @property
+    def seconds(self) -> float:
+        return self.elapsed or sum(stats.seconds for stats in self.tables)
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+def seed_tables() -> list[sa.Table]:
+    """Tables of ``Base.metadata`` that have a generator, in FK order."""
+    return [table for table in Base.metadata.sorted_tables if table.name in GENERATORS]
+
+
+def generate_columns(
+    ctx: SeedContext, table_name: str, start: int, count: int
+) -> Columns:
+    return GENERATORS[table_name](ctx, ctx.rng(table_name, start), start, count)
+
+
+def to_rows(columns: Columns) -> list[dict[str, Any]]:
+    keys = list(columns)
+    return [dict(zip(keys, values)) for values in zip(*columns.values())]
+
+
+def chunk_bounds(start: int, stop: int, chunk_size: int) -> Iterator[tuple[int, int]]:
+    for chunk_start in range(start, stop, chunk_size):
+        yield chunk_start, min(chunk_size, stop - chunk_start)
+
+
+def iter_chunks(
+    ctx: SeedContext, table_name: str, start: int, stop: int, chunk_size: int
+) -> Iterator[list[dict[str, Any]]]:
+    for chunk_start, count in chunk_bounds(start, stop, chunk_size):
+        yield to_rows(generate_columns(ctx, table_name, chunk_start, count))
+
+
+def write_rows(
+    connection: sa.Connection,
+    ctx: SeedContext,
+    table: sa.Table,
+    start: int,
+    stop: int,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> TableStats:
+    """Insert rows ``start``..``stop`` of ``table``, committing every chunk."""
+    stats = TableStats(table.name)
+    statement = table.insert()
+    for rows in iter_chunks(ctx, table.name, start, stop, chunk_size):
+        began = time.perf_counter()
+        connection.execute(statement, rows)
+        connection.commit()
+        stats.seconds += time.perf_counter() - began
+        stats.rows += len(rows)
+        if progress is not None:
+            progress(stats)
+    return stats
+
+
+def next_ids(connection: sa.Connection) -> dict[str, int]:
+    """First free id of every table we assign ids for, so seeding can append."""
+    first_ids: dict[str, int] = {}
+    for name in EXPLICIT_ID_TABLES:
+        id_column = Base.metadata.tables[name].c.id
+        current = connection.execute(
+            sa.select(sa.func.coalesce(sa.func.max(id_column), 0))
+        ).scalar_one()
+        first_ids[name] = int(current) + 1
+    return first_ids
+
+
+def identity_restart_sql(
+    dialect: sa.Dialect, table: sa.Table, start: int
+) -> Optional[str]:
+    """Statement restarting the identity of ``table.c.id`` at ``start``; None
+    where inserting explicit ids already moves it."""
+    preparer = dialect.identifier_preparer
+    name, column = preparer.format_table(table), preparer.format_column(table.c.id)
+    if dialect.name == "postgresql":
+        return f"ALTER TABLE {name} ALTER COLUMN {column} RESTART WITH {start}"
+    if dialect.name == "oracle":
+        return (
+            f"ALTER TABLE {name} MODIFY {column} "
+            f"GENERATED BY DEFAULT AS IDENTITY (START WITH {start})"
+        )
+    return None
+
+
+def restart_identities(connection: sa.Connection) -> None:
+    """Restart the identities of the tables seeded with explicit ids after
+    their ``max(id)``, so the next identity-generated row does not collide."""
+    for name, start in next_ids(connection).items():
+        sql = identity_restart_sql(
+            connection.dialect, Base.metadata.tables[name], start
+        )
+        if sql is not None:
+            connection.execute(sa.text(sql))
+    connection.commit()
+
+
+def default_anchor() -> datetime:
+    return datetime.now(tz=TIMEZONE).replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+def seed(
+    engine: sa.Engine,
+    plan: SeedPlan,
+    *,
+    seed: int = 0,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    anchor: Optional[datetime] = None,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> SeedReport:
+    """Seed every table in ``Base.metadata`` that has a generator, in FK order.
+
+    The same ``seed``, ``chunk_size`` and ``anchor`` always give the same rows.
+    """
+    report = SeedReport()
+    began = time.perf_counter()
+    with engine.connect() as connection:
+        ctx = SeedContext(
+            plan=plan,
+            pool=FakerPool(seed, pool_size),
+            seed=seed,
+            anchor=anchor or default_anchor(),
+            first_ids=next_ids(connection),
+        )
+        for table in seed_tables():
+            stop = plan.rows(table.name)
+            if stop:
+                report.tables.append(
+                    write_rows(connection, ctx, table, 0, stop, chunk_size, progress)
+                )
+        restart_identities(connection)
+    report.elapsed = time.perf_counter() - began
+    return report
+
+
+def format_stats(stats: TableStats) -> str:
+    return (
+        f"{stats.table:<26} {stats.rows:>12,} rows {stats.seconds:>9.2f}s "
+        f"{stats.rows_per_sec:>12,.0f} rows/s"
+    )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m myapp.seed", description="Bulk seed the myapp tables."
+    )
+    parser.add_argument(
+        "--url", default=None, help="database url (default: MYAPP_DB_URL)"
+    )
+    parser.add_argument(
+        "--create-all", action="store_true", help="create missing tables first"
+    )
+    parser.add_argument("--customers", type=int, default=SeedPlan.customers)
+    parser.add_argument("--products", type=int, default=SeedPlan.products)
+    parser.add_argument("--tags", type=int, default=SeedPlan.tags)
+    parser.add_argument("--categories", type=int, default=SeedPlan.categories)
+    parser.add_argument(
+        "--orders-per-customer", type=int, default=SeedPlan.orders_per_customer
+    )
+    parser.add_argument("--lines-per-order", type=int, default=SeedPlan.lines_per_order)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--anchor",
+        type=datetime.fromisoformat,
+        default=None,
+        help="newest order timestamp (ISO format), defaults to today",
+    )
+    parser.add_argument("--quiet", action="store_true", help="only print the summary")
+    return parser
+
+
+def plan_from_args(args: argparse.Namespace) -> SeedPlan:
+    return SeedPlan(
+        customers=args.customers,
+        products=args.products,
+        tags=args.tags,
+        categories=args.categories,
+        orders_per_customer=args.orders_per_customer,
+        lines_per_order=args.lines_per_order,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    engine = create_engine(url=args.url) if args.url else create_engine()
+    if args.create_all:
+        Base.metadata.create_all(engine)
+
+    report = seed(
+        engine,
+        plan_from_args(args),
+        seed=args.seed,
+        chunk_size=args.chunk_size,
+        anchor=args.anchor,
+    )
+    if not args.quiet:
+        for stats in report.tables:
+            print(format_stats(stats))
+    print(format_stats(TableStats("total", report.rows, report.seconds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
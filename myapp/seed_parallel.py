@@ -0,0 +1,327 @@
+"""Multi-process variant of ``myapp.seed``.
+
+Faker and the column generators are CPU bound, so the customer id space is
+split into shards that worker processes generate independently. Every worker
+builds its Faker pool from the same seed and every chunk has its own seeded
+``Random``, so the dataset only depends on ``seed``/``chunk_size``/``anchor``
+and not on the number of workers.
+
+Two modes are supported:
+
+* ``stream`` - workers send column batches back to the parent, which writes
+  them over a single connection (the only safe option for SQLite).
+* ``direct`` - reference tables are written by the parent, then every worker
+  writes its customer shard through its own engine.
+
+    python -m myapp.seed_parallel --url sqlite:///seed.db --create-all --workers 8
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Iterator, Optional, Sequence
+
+import sqlalchemy as sa
+
+from myapp.engine import create_engine
+from myapp.models import Base
+from myapp.seed import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_POOL_SIZE,
+    Columns,
+    FakerPool,
+    ProgressCallback,
+    SeedContext,
+    SeedPlan,
+    SeedReport,
+    TableStats,
+    build_parser,
+    chunk_bounds,
+    default_anchor,
+    format_stats,
+    generate_columns,
+    next_ids,
+    plan_from_args,
+    restart_identities,
+    seed_tables,
+    to_rows,
+    write_rows,
+)
+
+# Context of the current worker process, built once by ``_init_worker``
+_worker_ctx: Optional[SeedContext] = None
+
+
+@dataclass(frozen=True)
+class Shard:
+    index: int
+    # Customer index range [start, stop) relative to the first seeded customer
+    start: int
+    stop: int
+
+    def rows(self, plan: SeedPlan, table_name: str) -> tuple[int, int]:
+        scale = plan.per_customer(table_name) or 0
+        return self.start * scale, self.stop * scale
+
+
+def plan_shards(customers: int, shard_size: int, chunk_size: int) -> list[Shard]:
+    """Split ``customers`` into shards aligned to ``chunk_size``.
+
+    Alignment keeps every chunk identical to the chunk the sequential seeder
+    would have produced for the same rows.
+    """
+    shard_size = max(chunk_size, -(-shard_size // chunk_size) * chunk_size)
+    return [
+        Shard(index, start, min(start + shard_size, customers))
+        for index, start in enumerate(range(0, customers, shard_size))
+    ]
+
+
+def _init_worker(
+    plan: SeedPlan,
+    seed: int,
+    anchor: datetime,
+    first_ids: dict[str, int],
+    pool_size: int,
+) -> None:
+    global _worker_ctx
+    _worker_ctx = SeedContext(
+        plan=plan,
+        pool=FakerPool(seed, pool_size),
+        seed=seed,
+        anchor=anchor,
+        first_ids=first_ids,
+    )
+
+
+def _generate_chunk(table_name: str, start: int, count: int) -> Columns:
+    assert _worker_ctx is not None, "worker was not initialised"
+    return generate_columns(_worker_ctx, table_name, start, count)
+
+
+def _write_shard(
+    url: str, shard: Shard, chunk_size: int
+) -> list[TableStats]:
+    assert _worker_ctx is not None, "worker was not initialised"
+    engine = create_engine(url=url, pool_size=1, max_overflow=0)
+    stats = []
+    try:
+        with engine.connect() as connection:
+            for table in seed_tables():
+                if _worker_ctx.plan.per_customer(table.name) is None:
+                    continue
+                start, stop = shard.rows(_worker_ctx.plan, table.name)
+                stats.append(
+                    write_rows(connection, _worker_ctx, table, start, stop, chunk_size)
+                )
+    finally:
+        engine.dispose()
+    return stats
+
+
+def _executor(
+    workers: Optional[int],
+    plan: SeedPlan,
+    seed: int,
+    anchor: datetime,
+    first_ids: dict[str, int],
+    pool_size: int,
+) -> ProcessPoolExecutor:
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count(),
+        initializer=_init_worker,
+        initargs=(plan, seed, anchor, first_ids, pool_size),
+    )
+
+
+def iter_parallel(
+    plan: SeedPlan,
+    *,
+    seed: int = 0,
+    anchor: Optional[datetime] = None,
+    first_ids: Optional[dict[str, int]] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    workers: Optional[int] = None,
+    pool_size: int = DEFAULT_POOL_SIZE,
+) -> Iterator[tuple[str, Columns]]:
+    """Yield ``(table_name, columns)`` batches generated by a process pool.
+
+    Batches come out in FK order and in id order within a table. At most
+    ``2 * workers`` batches are in flight, so memory stays bounded when the
+    consumer is slower than the generators.
+    """
+    workers = workers or os.cpu_count() or 1
+    tasks = (
+        (table.name, start, count)
+        for table in seed_tables()
+        for start, count in chunk_bounds(0, plan.rows(table.name), chunk_size)
+    )
+    with _executor(
+        workers, plan, seed, anchor or default_anchor(), first_ids or {}, pool_size
+    ) as executor:
+        pending: deque[tuple[str, Future[Columns]]] = deque()
+        for table_name, start, count in tasks:
+            pending.append(
+                (table_name, executor.submit(_generate_chunk, table_name, start, count))
+            )
+            if len(pending) >= 2 * workers:
+                name, future = pending.popleft()
+                yield name, future.result()
+        while pending:
+            name, future = pending.popleft()
+            yield name, future.result()
+
+
+def _seed_streamed(
+    engine: sa.Engine,
+    plan: SeedPlan,
+    seed: int,
+    anchor: datetime,
+    chunk_size: int,
+    workers: Optional[int],
+    pool_size: int,
+    progress: Optional[ProgressCallback],
+) -> list[TableStats]:
+    stats: dict[str, TableStats] = {}
+    with engine.connect() as connection:
+        batches = iter_parallel(
+            plan,
+            seed=seed,
+            anchor=anchor,
+            first_ids=next_ids(connection),
+            chunk_size=chunk_size,
+            workers=workers,
+            pool_size=pool_size,
+        )
+        for table_name, columns in batches:
+            table_stats = stats.setdefault(table_name, TableStats(table_name))
+            rows = to_rows(columns)
+            began = time.perf_counter()
+            connection.execute(Base.metadata.tables[table_name].insert(), rows)
+            connection.commit()
+            table_stats.seconds += time.perf_counter() - began
+            table_stats.rows += len(rows)
+            if progress is not None:
+                progress(table_stats)
+    return list(stats.values())
+
+
+def _seed_direct(
+    engine: sa.Engine,
+    plan: SeedPlan,
+    seed: int,
+    anchor: datetime,
+    chunk_size: int,
+    shard_size: int,
+    workers: Optional[int],
+    pool_size: int,
+    progress: Optional[ProgressCallback],
+) -> list[TableStats]:
+    stats: dict[str, TableStats] = {}
+    with engine.connect() as connection:
+        first_ids = next_ids(connection)
+        ctx = SeedContext(plan, FakerPool(seed, pool_size), seed, anchor, first_ids)
+        # Reference data is small and everything else points at it
+        for table in seed_tables():
+            rows = plan.rows(table.name)
+            if plan.per_customer(table.name) is None and rows:
+                stats[table.name] = write_rows(
+                    connection, ctx, table, 0, rows, chunk_size, progress
+                )
+
+    url = engine.url.render_as_string(hide_password=False)
+    with _executor(workers, plan, seed, anchor, first_ids, pool_size) as executor:
+        futures = [
+            executor.submit(_write_shard, url, shard, chunk_size)
+            for shard in plan_shards(plan.customers, shard_size, chunk_size)
+        ]
+        for future in futures:
+            for shard_stats in future.result():
+                table_stats = stats.setdefault(
+                    shard_stats.table, TableStats(shard_stats.table)
+                )
+                table_stats.rows += shard_stats.rows
+                table_stats.seconds += shard_stats.seconds
+                if progress is not None:
+                    progress(table_stats)
+    return list(stats.values())
+
+
+def seed_parallel(
+    engine: sa.Engine,
+    plan: SeedPlan,
+    *,
+    seed: int = 0,
+    mode: str = "stream",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    shard_size: Optional[int] = None,
+    workers: Optional[int] = None,
+    anchor: Optional[datetime] = None,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    progress: Optional[ProgressCallback] = None,
+) -> SeedReport:
+    """Seed ``plan`` with a process pool; same rows as ``myapp.seed.seed``."""
+    anchor = anchor or default_anchor()
+    began = time.perf_counter()
+    if mode == "stream":
+        tables = _seed_streamed(
+            engine, plan, seed, anchor, chunk_size, workers, pool_size, progress
+        )
+    elif mode == "direct":
+        shard_size = shard_size or -(-plan.customers // (workers or os.cpu_count() or 1))
+        tables = _seed_direct(
+            engine,
+            plan,
+            seed,
+            anchor,
+            chunk_size,
+            shard_size,
+            workers,
+            pool_size,
+            progress,
+        )
+    else:
+        raise ValueError(f"unknown seeding mode {mode!r}, use 'stream' or 'direct'")
+    with engine.connect() as connection:
+        restart_identities(connection)
+    return SeedReport(tables, elapsed=time.perf_counter() - began)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = build_parser()
+    parser.prog = "python -m myapp.seed_parallel"
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--mode", choices=("stream", "direct"), default="stream")
+    parser.add_argument(
+        "--shard-size", type=int, default=None, help="customers per shard (direct)"
+    )
+    args = parser.parse_args(argv)
+
+    engine = create_engine(url=args.url) if args.url else create_engine()
+    if args.create_all:
+        Base.metadata.create_all(engine)
+
+    report = seed_parallel(
+        engine,
+        plan_from_args(args),
+        seed=args.seed,
+        mode=args.mode,
+        chunk_size=args.chunk_size,
+        shard_size=args.shard_size,
+        workers=args.workers,
+        anchor=args.anchor,
+    )
+    if not args.quiet:
+        for stats in report.tables:
+            print(format_stats(stats))
+    print(format_stats(TableStats("total", report.rows, report.seconds)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""Serialize customers straight from Core rows instead of ``from_orm``.
+
+``CustomerFull.from_orm`` reads every attribute through the instrumented ORM
+descriptors and lazy loads ``addresses`` per customer. Here a single joined
+select of ``customers`` + ``addresses`` is turned into schema instances
+directly from the row tuples, either validated from plain dicts or, for data
+that came from our own database, through a validation-free construct path.
+
+``CustomerFull`` requires an address: a customer without one raises
+``MissingAddressError``, where ``from_orm`` fails validation.
+"""
+from __future__ import annotations
+
+from typing import Any, Iterable, Iterator, Optional, Sequence, TypeVar, Union
+
+import pydantic
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from myapp.models import AddressOrm, CustomerOrm
+from myapp.schemas import Address, CustomerFull
+
+ModelT = TypeVar("ModelT", bound=pydantic.BaseModel)
+
+CUSTOMER_FIELDS = tuple(name for name in CustomerFull.__fields__ if name != "addresses")
+ADDRESS_FIELDS = tuple(Address.__fields__)
+
+# Positions of the schema fields in the rows of `select_customers_full()`
+_ADDRESS_OFFSET = len(CUSTOMER_FIELDS)
+
+
+class MissingAddressError(ValueError):
+    pass
+
+
+def select_customers_full() -> sa.Select[Any]:
+    """Customers outer joined to their address, columns ordered like the
+    schemas; the address columns are NULL for a customer without one."""
+    return (
+        sa.select(
+            *(getattr(CustomerOrm, name) for name in CUSTOMER_FIELDS),
+            *(
+                getattr(AddressOrm, name).label(f"address_{name}")
+                for name in ADDRESS_FIELDS
+            ),
+        )
+        .outerjoin_from(
+            CustomerOrm, AddressOrm, CustomerOrm.id == AddressOrm.customer_id
+        )
+        .order_by(CustomerOrm.id)
+    )
+
+
+def construct(model: type[ModelT], values: dict[str, Any]) -> ModelT:
+    """``model.construct`` without the per-field default handling.
+
+    Only for values that already satisfy the schema (e.g. read from our own
+    tables) and that provide every field.
+    """
+    instance = model.__new__(model)
+    object.__setattr__(instance, "__dict__", values)
+    object.__setattr__(instance, "__fields_set__", set(values))
+    return instance
+
+
+def row_to_customer_full(row: Sequence[Any], validate: bool = False) -> CustomerFull:
+    customer = dict(zip(CUSTOMER_FIELDS, row[:_ADDRESS_OFFSET]))
+    address = dict(zip(ADDRESS_FIELDS, row[_ADDRESS_OFFSET:]))
+    if address["customer_id"] is None:
+        raise MissingAddressError(f"customer {customer['id']} has no address")
+    if validate:
+        return CustomerFull(**customer, addresses=Address(**address))
+    customer["addresses"] = construct(Address, address)
+    return construct(CustomerFull, customer)
+
+
+def rows_to_customers_full(
+    rows: Iterable[Sequence[Any]], validate: bool = False
+) -> list[CustomerFull]:
+    return [row_to_customer_full(row, validate) for row in rows]
+
+
+def iter_customers_full(
+    bind: Union[sa.Connection, Session],
+    statement: Optional[sa.Select[Any]] = None,
+    *,
+    validate: bool = False,
+    batch_size: int = 1_000,
+) -> Iterator[CustomerFull]:
+    """Stream ``CustomerFull`` objects for ``statement``.
+
+    ``statement`` defaults to ``select_customers_full()`` and may be any
+    refinement of it (extra where/limit); the column order must be kept.
+    """
+    if statement is None:
+        statement = select_customers_full()
+    result = bind.execute(statement.execution_options(yield_per=batch_size))
+    for rows in result.partitions():
+        yield from rows_to_customers_full(rows, validate)
@@ -0,0 +1,57 @@
+"""Deployment settings, read from ``MYAPP_DB_*`` environment variables or ``.env``.
+
+    MYAPP_DB_URL=postgresql+psycopg2://app@db/app
+    MYAPP_DB_POOL_SIZE=20
+    MYAPP_DB_STATEMENT_TIMEOUT_MS=5000
+
+The environment and env file are parsed once per process: ``get_settings``
+caches the result, pass ``env_file`` for another file (e.g. ``.test.env``) and
+``get_settings.cache_clear()`` after changing the environment.
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+from typing import Optional
+
+from pydantic import BaseSettings, Field
+
+
+class DatabaseSettings(BaseSettings):
+    url: str = "sqlite:///seed.db"
+    echo: bool = False
+    # Connections kept open, and extra ones opened under load then closed
+    pool_size: int = Field(default=5, ge=1)
+    max_overflow: int = Field(default=10, ge=0)
+    # Seconds to wait for a connection before giving up
+    pool_timeout: float = Field(default=30.0, gt=0)
+    # Seconds after which a connection is replaced, -1 keeps it forever
+    pool_recycle: int = Field(default=1800, ge=-1)
+    pool_pre_ping: bool = True
+    # None leaves statements to run as long as they take
+    statement_timeout_ms: Optional[int] = Field(default=None, gt=0)
+    # Read replicas for `myapp.routing`, as a JSON list:
+    # MYAPP_DB_REPLICA_URLS='["postgresql+psycopg2://app@replica1/app"]'
+    replica_urls: list[str] = []
+    # Seconds a replica may lag behind the primary and still serve reads
+    replica_max_lag: float = Field(default=5.0, ge=0)
+    # Reflected tables are kept on disk, see `myapp.reflection`
+    reflection_cache: bool = True
+    # None: $XDG_CACHE_HOME/myapp/reflection (~/.cache/myapp/reflection)
+    reflection_cache_dir: Optional[str] = None
+    # Orders older than this move to the monthly archive, see `myapp.archive`
+    archive_after_days: int = Field(default=365, ge=1)
+    # Orders moved per transaction
+    archive_batch_size: int = Field(default=1000, ge=1)
+
+    class Config(BaseSettings.Config):
+        env_prefix = "MYAPP_DB_"
+        env_file = ".env"
+        allow_mutation = False
+
+
+@lru_cache(maxsize=None)
+def get_settings(env_file: Optional[str] = None) -> DatabaseSettings:
+    if env_file is None:
+        return DatabaseSettings()
+    return DatabaseSettings(_env_file=env_file)
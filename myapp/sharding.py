@@ -0,0 +1,547 @@
+"""Customers and their addresses, orders and quantities sharded by customer.
+
+Built on SQLAlchemy's horizontal sharding extension. A shard is a complete
+database with every table of ``Base.metadata``:
+
+* customer data lives on the shard of its customer; the shard is part of
+  every id, shard ``k`` of ``n`` only holds ids ``k, k + n, k + 2n, ...``, so
+  ``id % n`` finds the shard of a customer, address, order or quantity and
+  ids stay unique across shards;
+* products, tags and categories are reference data copied to every shard.
+  Reads go to one shard, DML statements on them run on all of them.
+
+Ids are reserved per table and shard in blocks (``myapp.idblocks``) on a
+separate ``ids_engine`` and assigned before the flush, so new customers are
+spread round robin and their rows follow them.
+
+    shards = ShardSet([sa.create_engine(f"sqlite:///shard{i}.db") for i in range(4)],
+                      ids_engine=sa.create_engine("sqlite:///ids.db"))
+    Sessions = sessionmaker(class_=CustomerShardedSession, shard_set=shards)
+    with Sessions() as session:
+        session.get(CustomerOrm, 42)                                  # one shard
+        session.scalars(sa.select(OrderOrm).where(OrderOrm.customer_id == 42))
+        session.scalars(sa.select(OrderOrm).where(OrderOrm.created_at >= since))
+
+A SELECT whose WHERE clause requires one of the shard keys (``customer_id``,
+``order_id`` or a sharded ``id``) to equal a value or be IN a list runs on
+those shards only; any other runs on every shard in parallel. Their rows are
+merged in the order of the ORDER BY expressions (compared in Python, NULLs
+placed as the dialect does), then OFFSET and LIMIT apply to the merged rows;
+each shard returns at most OFFSET + LIMIT rows. ORDER BY takes expressions,
+not label names, and without one the shards' rows follow each other. Lazy
+loads stay on the shard of the object they load from: ``product.orders``
+only sees the orders on the product's shard.
+
+New or changed reference objects are rejected by the flush, as the unit of
+work writes to one shard; so are changes to their tag and category
+collections. Only ``product.orders``, the other side of ``order.products``,
+may change. Use ``session.execute(sa.update(ProductOrm)...)`` or
+``session.execute(sa.insert(ProductOrm.__table__), rows)`` instead (the ORM
+bulk insert of ``sa.insert(ProductOrm)`` does not support sharding), or
+``copy_reference`` for a new shard.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Iterator, NamedTuple, Optional, Sequence
+
+import sqlalchemy as sa
+from sqlalchemy.ext.horizontal_shard import ShardedSession
+from sqlalchemy.orm import Mapper, ORMExecuteState, Session, UOWTransaction
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import _label_reference, _textual_label_reference
+from sqlalchemy.sql.util import find_tables
+
+from myapp.idblocks import DEFAULT_BLOCK_SIZE, IdAllocator
+from myapp.models import (
+    AddressOrm,
+    Base,
+    CategoryOrm,
+    CustomerOrm,
+    OrderOrm,
+    ProductOrm,
+    QuantityOrm,
+    TagOrm,
+    id_blocks_tbl,
+    product_category_assoc_tbl,
+    product_order_assoc_tbl,
+    product_tag_assoc_tbl,
+)
+
+# Table -> columns holding a sharded id, any of them gives the shard
+SHARD_KEYS: dict[str, tuple[str, ...]] = {
+    CustomerOrm.__tablename__: ("id",),
+    AddressOrm.__tablename__: ("id", "customer_id"),
+    OrderOrm.__tablename__: ("id", "customer_id"),
+    QuantityOrm.__tablename__: ("id", "order_id"),
+    product_order_assoc_tbl.name: ("order_id",),
+}
+
+REFERENCE_TABLES = (
+    ProductOrm.__table__,
+    TagOrm.__table__,
+    CategoryOrm.__table__,
+    product_tag_assoc_tbl,
+    product_category_assoc_tbl,
+)
+REFERENCE_MAPPERS = (ProductOrm, TagOrm, CategoryOrm)
+
+# Collections of reference objects a flush may change: they follow
+# ``order.products`` and write sharded rows (product_order_assoc)
+SHARDED_COLLECTIONS: dict[type[Base], tuple[str, ...]] = {ProductOrm: ("orders",)}
+
+# Dialects sorting NULL after every value in ascending order
+NULLS_LAST_DIALECTS = frozenset({"postgresql", "oracle"})
+
+
+class _ShardLocalIds(IdAllocator):
+    """Blocks of shard-local numbers, kept as ``<table>@<shard>`` rows."""
+
+    def __init__(self, shard_set: ShardSet, block_size: int) -> None:
+        super().__init__(shard_set.ids_engine, block_size)
+        self.shard_set = shard_set
+
+    def _start(self, connection: sa.Connection, table_name: str) -> int:
+        # Continue after the rows the shard already holds
+        table, shard = table_name.rsplit("@", 1)
+        highest = sa.select(sa.func.max(sa.column("id"))).select_from(sa.table(table))
+        with self.shard_set.engines[int(shard)].connect() as shard_connection:
+            return (shard_connection.scalar(highest) or 0) // len(self.shard_set) + 1
+
+
+class ShardSet:
+    def __init__(
+        self,
+        engines: Sequence[sa.Engine],
+        ids_engine: sa.Engine,
+        *,
+        block_size: int = DEFAULT_BLOCK_SIZE,
+        parallel: bool = True,
+    ) -> None:
+        if not engines:
+            raise ValueError("a ShardSet needs at least one shard")
+        self.engines = dict(enumerate(engines))
+        self.ids_engine = ids_engine
+        self.ids = _ShardLocalIds(self, block_size)
+        self._next_customer_shard = itertools.count()
+        self._next_reference_shard = itertools.count()
+        self.executor = (
+            ThreadPoolExecutor(len(engines), thread_name_prefix="shard")
+            if parallel and len(engines) > 1
+            else None
+        )
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def shard_of(self, sharded_id: int) -> int:
+        return sharded_id % len(self)
+
+    def take(self, shard: int, table_name: str, count: int) -> list[int]:
+        """``count`` fresh ids of ``table_name`` on ``shard``."""
+        n = len(self)
+        return [
+            local * n + shard for local in self.ids.take(f"{table_name}@{shard}", count)
+        ]
+
+    def new_customer_shard(self) -> int:
+        return next(self._next_customer_shard) % len(self)
+
+    def reference_shard(self) -> int:
+        # Reference reads are spread over the shards, every copy is the same
+        return next(self._next_reference_shard) % len(self)
+
+    def create_all(self, metadata: sa.MetaData = Base.metadata) -> None:
+        for engine in self.engines.values():
+            metadata.create_all(engine)
+        id_blocks_tbl.create(self.ids_engine, checkfirst=True)
+
+    def dispose(self) -> None:
+        if self.executor is not None:
+            self.executor.shutdown()
+        for engine in (*self.engines.values(), self.ids_engine):
+            engine.dispose()
+
+    # Choosers of ShardedSession
+
+    def shard_chooser(
+        self,
+        mapper: Mapper[Any],
+        instance: Any,
+        clause: Optional[Any] = None,
+        **kw: Any,
+    ) -> int:
+        if mapper.class_ in REFERENCE_MAPPERS:
+            return self.reference_shard()
+        if instance is not None and instance.id is not None:
+            return self.shard_of(instance.id)
+        raise ValueError(
+            f"no shard for {mapper.class_.__name__} without an id, "
+            "pass shard_id in bind_arguments"
+        )
+
+    def identity_chooser(
+        self,
+        mapper: Mapper[Any],
+        primary_key: Sequence[Any],
+        *,
+        lazy_loaded_from: Optional[Any],
+        **kw: Any,
+    ) -> list[int]:
+        if mapper.class_ in REFERENCE_MAPPERS:
+            if lazy_loaded_from is not None:
+                return [lazy_loaded_from.identity_token]
+            return [self.reference_shard()]
+        return [self.shard_of(primary_key[0])]
+
+    def execute_chooser(self, orm_context: ORMExecuteState) -> Iterable[int]:
+        if orm_context.is_select and orm_context.lazy_loaded_from is not None:
+            return [orm_context.lazy_loaded_from.identity_token]
+        statement = orm_context.statement
+        tables = {table.name for table in find_tables(statement, include_crud=True)}
+        if not tables & SHARD_KEYS.keys():
+            if orm_context.is_select:
+                return [self.reference_shard()]
+            # DML on reference data keeps every copy the same
+            return list(self.engines)
+        if orm_context.is_insert:
+            return [self._insert_shard(orm_context)]
+        parameters = orm_context.parameters
+        shards = self._where_shards(
+            statement, parameters if isinstance(parameters, dict) else {}
+        )
+        return sorted(shards) if shards is not None else list(self.engines)
+
+    def _where_shards(
+        self, statement: Any, parameters: dict[str, Any]
+    ) -> Optional[set[int]]:
+        """Shards the AND-ed criteria of ``statement`` limit it to; None when
+        they do not name a shard key."""
+        shards: Optional[set[int]] = None
+        for criterion in getattr(statement, "_where_criteria", ()):
+            values = _key_values(criterion, parameters)
+            if values is None:
+                continue
+            found = {self.shard_of(value) for value in values}
+            shards = found if shards is None else shards & found
+        return shards
+
+    def _insert_shard(self, orm_context: ORMExecuteState) -> int:
+        parameters = orm_context.parameters
+        rows = parameters if isinstance(parameters, list) else [parameters or {}]
+        shards = set()
+        for row in rows:
+            key = next(
+                (row[k] for k in ("id", "customer_id", "order_id") if k in row), None
+            )
+            if key is None:
+                raise ValueError("sharded rows are inserted with their id or parent id")
+            shards.add(self.shard_of(key))
+        if len(shards) != 1:
+            raise ValueError("insert the rows of one shard per statement")
+        return shards.pop()
+
+    # Flush
+
+    def assign_ids(self, session: Session) -> None:
+        """Give new sharded objects in ``session`` their id, hence their shard:
+        customers round robin, then their rows on the customer's shard."""
+        for obj in itertools.chain(session.new, session.dirty, session.deleted):
+            if isinstance(obj, REFERENCE_MAPPERS) and (
+                obj not in session.dirty or not _order_side_only(obj)
+            ):
+                raise ValueError(
+                    f"{type(obj).__name__} is replicated reference data, "
+                    "change it with DML statements that run on every shard"
+                )
+        new = [obj for obj in session.new if getattr(obj, "id", None) is None]
+        # Parents first, so their children can follow them
+        for step in ((CustomerOrm,), (AddressOrm, OrderOrm), (QuantityOrm,)):
+            pending: defaultdict[tuple[str, int], list[Any]] = defaultdict(list)
+            for obj in new:
+                if not isinstance(obj, step):
+                    continue
+                if isinstance(obj, CustomerOrm):
+                    shard = self.new_customer_shard()
+                else:
+                    parent = _parent_id(obj)
+                    if parent is None:
+                        raise ValueError(f"new {type(obj).__name__} without its parent")
+                    shard = self.shard_of(parent)
+                pending[(obj.__tablename__, shard)].append(obj)
+            for (table_name, shard), objects in pending.items():
+                for obj, id_ in zip(
+                    objects, self.take(shard, table_name, len(objects))
+                ):
+                    obj.id = id_
+
+
+def _order_side_only(obj: Any) -> bool:
+    """Whether the changes of reference object ``obj`` are all in its
+    sharded collections (``product.orders``)."""
+    allowed = SHARDED_COLLECTIONS.get(type(obj), ())
+    return all(
+        attr.key in allowed
+        for attr in sa.inspect(obj).attrs
+        if attr.history.has_changes()
+    )
+
+
+def _parent_id(obj: Any) -> Optional[int]:
+    if isinstance(obj, QuantityOrm):
+        return obj.order_id or (obj.order.id if obj.order is not None else None)
+    return obj.customer_id or (obj.customer.id if obj.customer is not None else None)
+
+
+def _key_values(criterion: Any, parameters: dict[str, Any]) -> Optional[list[int]]:
+    """Values of ``<shard key> = value`` or ``<shard key> IN (...)``; None
+    for any other criterion, or a value only known at execution."""
+    if not isinstance(criterion, sa.BinaryExpression):
+        return None
+    column, value = criterion.left, criterion.right
+    if not isinstance(column, sa.Column) or not isinstance(value, sa.BindParameter):
+        return None
+    table = column.table.name if isinstance(column.table, sa.Table) else None
+    if column.name not in SHARD_KEYS.get(table or "", ()):
+        return None
+    # Values given at execution (e.g. refreshing a primary key) win
+    given = parameters.get(value.key, value.effective_value)
+    if given is None:
+        return None
+    if criterion.operator is operators.eq:
+        return [given]
+    if criterion.operator is operators.in_op:
+        return list(given)
+    return None
+
+
+class CustomerShardedSession(ShardedSession):
+    def __init__(self, shard_set: ShardSet, **kwargs: Any) -> None:
+        super().__init__(
+            shards=shard_set.engines,
+            shard_chooser=shard_set.shard_chooser,
+            identity_chooser=shard_set.identity_chooser,
+            execute_chooser=shard_set.execute_chooser,
+            **kwargs,
+        )
+        self.shard_set = shard_set
+        # Shards written by the current flush
+        self._flush_shards: set[int] = set()
+        sa.event.listen(self, "before_flush", self._before_flush)
+        # Ahead of ShardedSession's own handler, which runs shards one by one
+        sa.event.listen(self, "do_orm_execute", self._fan_out, retval=True, insert=True)
+
+    def _before_flush(
+        self, session: Session, flush_context: UOWTransaction, instances: Any
+    ) -> None:
+        self.shard_set.assign_ids(session)
+        changed = [
+            obj
+            for obj in itertools.chain(session.new, session.dirty, session.deleted)
+            if not isinstance(obj, REFERENCE_MAPPERS)
+        ]
+        self._flush_shards = {self.shard_set.shard_of(obj.id) for obj in changed}
+        if len(self._flush_shards) > 1 and any(
+            isinstance(obj, OrderOrm)
+            and (
+                obj in session.deleted
+                or sa.inspect(obj).attrs.products.history.has_changes()
+            )
+            for obj in changed
+        ):
+            raise ValueError(
+                "order products of several shards change in one flush, "
+                "flush them one shard (e.g. one customer) at a time"
+            )
+
+    def get_bind(
+        self,
+        mapper: Optional[Any] = None,
+        *,
+        shard_id: Optional[Any] = None,
+        instance: Optional[Any] = None,
+        clause: Optional[sa.ClauseElement] = None,
+        **kw: Any,
+    ) -> Any:
+        # The flush writes many-to-many rows (order.products) without naming
+        # an instance, they go to the one shard of the flush
+        if shard_id is None and instance is None and self._flushing:
+            shard_id = next(iter(self._flush_shards), None)
+        return super().get_bind(
+            mapper, shard_id=shard_id, instance=instance, clause=clause, **kw
+        )
+
+    def _fan_out(self, orm_context: ORMExecuteState) -> Optional[sa.Result[Any]]:
+        """Run a SELECT spanning several shards on all of them (at once with
+        the executor), merging their rows in the statement's order."""
+        executor = self.shard_set.executor
+        if (
+            not orm_context.is_select
+            or "shard_id" in orm_context.bind_arguments
+            or orm_context.load_options._identity_token is not None
+            or orm_context.load_options._yield_per
+            or orm_context.local_execution_options.get("yield_per")
+        ):
+            return None
+        shards = list(self.execute_chooser(orm_context))
+        if len(shards) < 2:
+            return None
+
+        statement = orm_context.statement
+        terms = _sort_terms(statement)
+        limit = offset = None
+        if isinstance(statement, sa.Select):
+            if statement._fetch_clause is not None:
+                raise ValueError("a SELECT on several shards takes LIMIT, not FETCH")
+            limit, offset = statement._limit, statement._offset
+        ordered = bool(terms) or limit is not None or bool(offset)
+        if ordered:
+            # Every shard returns its first OFFSET + LIMIT rows, sort keys last
+            statement = statement.offset(None)
+            if limit is not None:
+                statement = statement.limit((offset or 0) + limit)
+            statement = statement.add_columns(
+                *(
+                    term.expression.label(f"_shard_sort_{index}")
+                    for index, term in enumerate(terms)
+                )
+            )
+
+        # The session is not thread safe: flush and open the shard connections
+        # here, the threads only execute. Rows become objects in this thread
+        # as the merged result is read.
+        if orm_context.load_options._autoflush:
+            self._autoflush()
+        for shard in shards:
+            self.connection(bind_arguments={"shard_id": shard})
+        execution_options = {**orm_context.local_execution_options, "autoflush": False}
+
+        def run(shard: int) -> sa.Result[Any]:
+            return self.execute(
+                statement,
+                orm_context.parameters,
+                execution_options={**execution_options, "identity_token": shard},
+                bind_arguments={**orm_context.bind_arguments, "shard_id": shard},
+            )
+
+        results = list((executor.map if executor is not None else map)(run, shards))
+        if not ordered:
+            return results[0].merge(*results[1:])
+
+        # Joined eager loads of collections repeat the parent rows
+        frozen = [
+            (result.unique() if result._unique_filter_state else result).freeze()
+            for result in results
+        ]
+        width = len(frozen[0].metadata.keys) - len(terms)
+        rows = _merged(
+            [shard.data for shard in frozen],
+            terms,
+            width,
+            nulls_last=self.shard_set.engines[shards[0]].dialect.name
+            in NULLS_LAST_DIALECTS,
+        )
+        start = offset or 0
+        stop = start + limit if limit is not None else None
+        merged = frozen[0].with_new_rows(list(itertools.islice(rows, start, stop)))()
+        return merged.columns(*range(width)) if terms else merged
+
+
+class _SortTerm(NamedTuple):
+    expression: sa.ColumnElement[Any]
+    descending: bool
+    # None: where the dialect puts them
+    nulls_first: Optional[bool]
+
+
+_SORT_MODIFIERS = {
+    operators.asc_op: {},
+    operators.desc_op: {"descending": True},
+    operators.nulls_first_op: {"nulls_first": True},
+    operators.nulls_last_op: {"nulls_first": False},
+}
+
+
+def _sort_terms(statement: Any) -> list[_SortTerm]:
+    terms = []
+    for clause in getattr(statement, "_order_by_clauses", ()):
+        found: dict[str, Any] = {"descending": False, "nulls_first": None}
+        while (
+            isinstance(clause, sa.UnaryExpression)
+            and clause.modifier in _SORT_MODIFIERS
+        ):
+            found.update(_SORT_MODIFIERS[clause.modifier])
+            clause = clause.element
+        if isinstance(
+            clause, (_label_reference, _textual_label_reference)
+        ) or not isinstance(clause, sa.ColumnElement):
+            raise ValueError(
+                "a SELECT on several shards is ordered by expressions, not names"
+            )
+        terms.append(_SortTerm(clause, **found))
+    return terms
+
+
+class _Descending:
+    """Sort key inverting the order of ``value``."""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, _Descending) and self.value == other.value
+
+    def __lt__(self, other: _Descending) -> bool:
+        return bool(other.value < self.value)
+
+
+def _merged(
+    shard_rows: Sequence[Sequence[Sequence[Any]]],
+    terms: Sequence[_SortTerm],
+    width: int,
+    *,
+    nulls_last: bool,
+) -> Iterator[Sequence[Any]]:
+    """The sorted rows of every shard in one order; the sort keys are the
+    columns after ``width``."""
+    # Rank of NULL against the values (1), before any descending inversion
+    null_ranks = [
+        (
+            2
+            if (
+                nulls_last
+                if term.nulls_first is None
+                else term.nulls_first == term.descending
+            )
+            else 0
+        )
+        for term in terms
+    ]
+
+    def key(row: Sequence[Any]) -> tuple[Any, ...]:
+        keys: list[Any] = []
+        for index, term in enumerate(terms):
+            value = row[width + index]
+            ranked = (null_ranks[index], 0) if value is None else (1, value)
+            keys.append(_Descending(ranked) if term.descending else ranked)
+        return tuple(keys)
+
+    if not terms:
+        return itertools.chain(*shard_rows)
+    return heapq.merge(*shard_rows, key=key)
+
+
+def copy_reference(source: sa.Engine, target: sa.Engine) -> None:
+    """Copy the reference tables of ``source`` into the empty ones of ``target``,
+    e.g. for a new shard."""
+    with source.connect() as reading, target.begin() as writing:
+        for table in REFERENCE_TABLES:
+            rows = [row._asdict() for row in reading.execute(sa.select(table))]
+            if rows:
+                writing.execute(sa.insert(table), rows)
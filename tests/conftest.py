@@ -0,0 +1,36 @@
+"""Fixtures shared by the tests: a small seeded SQLite database."""
+
+from __future__ import annotations
+
+import shutil
+from datetime import datetime
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import sqlalchemy as sa
+
+from myapp.models import TIMEZONE, Base
+from myapp.seed import SeedPlan, seed
+
+PLAN = SeedPlan(customers=50, products=40, tags=8, categories=4)
+
+
+@pytest.fixture(scope="session")
+def seeded_path(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    path = tmp_path_factory.mktemp("seeded") / "seed.sqlite"
+    engine = sa.create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    seed(engine, PLAN, seed=0, anchor=datetime(2026, 1, 1, tzinfo=TIMEZONE))
+    engine.dispose()
+    return path
+
+
+@pytest.fixture
+def engine(seeded_path: Path, tmp_path: Path) -> Iterator[sa.Engine]:
+    """Engine on a copy of the seeded database, free to write to."""
+    copy = tmp_path / "db.sqlite"
+    shutil.copyfile(seeded_path, copy)
+    engine = sa.create_engine(f"sqlite:///{copy}")
+    yield engine
+    engine.dispose()
@@ -0,0 +1,18 @@
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from myapp.bootstrap import check_drift
+from myapp.models import Base
+
+
+def test_migrations_match_the_models() -> None:
+    assert check_drift() == []
+
+
+def test_drift_is_reported() -> None:
+    metadata = sa.MetaData()
+    for table in Base.metadata.tables.values():
+        table.to_metadata(metadata)
+    sa.Table("not_migrated", metadata, sa.Column("id", sa.Integer, primary_key=True))
+    assert [diff[0] for diff in check_drift(metadata)] == ["add_table"]
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import asyncio
+
+import sqlalchemy as sa
+
+from myapp.db import (
+    create_async_engine,
+    create_session_factory,
+    get_customer_order_history,
+    get_order,
+)
+from myapp.models import CustomerOrm, OrderOrm, ProductOrm
+
+
+def touch_order(order: OrderOrm) -> None:
+    for product in order.products:
+        touch_product(product)
+    assert [quantity.qty for quantity in order.quantities]
+
+
+def touch_product(product: ProductOrm) -> None:
+    assert [tag.name for tag in product.tags]
+    assert [category.title for category in product.categories]
+
+
+def test_profiles_load_everything_before_the_session_closes(
+    engine: sa.Engine,
+) -> None:
+    with engine.connect() as connection:
+        customer_id, order_id = connection.execute(
+            sa.select(OrderOrm.customer_id, OrderOrm.id).limit(1)
+        ).one()
+
+    async def load() -> tuple[CustomerOrm, OrderOrm]:
+        async_engine = create_async_engine(f"sqlite+aiosqlite:///{engine.url.database}")
+        try:
+            async with create_session_factory(async_engine)() as session:
+                customer = await get_customer_order_history(session, customer_id)
+                order = await get_order(session, order_id)
+        finally:
+            await async_engine.dispose()
+        assert customer is not None and order is not None
+        # Still under the event loop, where a lazy load raises MissingGreenlet
+        assert customer.addresses is not None
+        assert customer.orders
+        for customer_order in customer.orders:
+            touch_order(customer_order)
+        assert order.customer.addresses is not None
+        touch_order(order)
+        return customer, order
+
+    customer, order = asyncio.run(load())
+    assert order in customer.orders
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import pytest
+
+from myapp.engine import _set_call_timeout
+
+
+class CxOracleConnection:
+    # Like cx_Oracle's connection type: no attributes besides its own
+    __slots__ = ("callTimeout",)
+
+
+class OracledbConnection:
+    __slots__ = ("call_timeout",)
+
+
+def test_call_timeout_of_cx_oracle() -> None:
+    connection = CxOracleConnection()
+    _set_call_timeout(connection, "cx_oracle", 1_500)
+    assert connection.callTimeout == 1_500
+
+
+def test_call_timeout_of_oracledb() -> None:
+    connection = OracledbConnection()
+    _set_call_timeout(connection, "oracledb", 1_500)
+    assert connection.call_timeout == 1_500
+
+
+def test_call_timeout_name_is_checked() -> None:
+    with pytest.raises(AttributeError):
+        _set_call_timeout(OracledbConnection(), "cx_oracle", 1_500)
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+import decimal
+
+import pytest
+import sqlalchemy as sa
+
+from myapp.filters import FilterError, compile_filter, parse_filter
+
+prices = sa.Table(
+    "prices",
+    sa.MetaData(),
+    sa.Column("id", sa.Integer, primary_key=True),
+    sa.Column("amount", sa.Numeric(10, 2)),
+)
+
+
+@pytest.mark.parametrize(
+    "expression",
+    ["amount:abc", "amount:in:1,x", "amount:range:1..x", "id:gt:abc"],
+)
+def test_invalid_values_raise_filter_error(expression: str) -> None:
+    with pytest.raises(FilterError, match="invalid value for"):
+        compile_filter(prices, parse_filter(expression))
+
+
+def test_decimal_values_are_coerced() -> None:
+    predicate = compile_filter(prices, parse_filter("amount:ge:9.99"))
+    assert predicate.right.value == decimal.Decimal("9.99")  # type: ignore[attr-defined]
@@ -0,0 +1,51 @@
+from __future__ import annotations
+
+import multiprocessing
+import random
+from typing import Any
+
+import sqlalchemy as sa
+
+from myapp.idblocks import IdAllocator
+from myapp.models import CustomerOrm
+
+PROCESSES = 4
+TAKES = 30
+
+
+def take_ids(url: str, seed: int, start: Any, results: Any) -> None:
+    engine = sa.create_engine(url)
+    ids = IdAllocator(engine, block_size=7)
+    rng = random.Random(seed)
+    # Every process makes the first reservation at once
+    start.wait()
+    taken = []
+    for _ in range(TAKES):
+        taken.extend(ids.take(CustomerOrm.__tablename__, rng.randint(1, 5)))
+    engine.dispose()
+    results.put(taken)
+
+
+def test_processes_take_distinct_ids_after_the_rows(engine: sa.Engine) -> None:
+    with engine.connect() as connection:
+        highest = connection.scalar(sa.select(sa.func.max(CustomerOrm.id)))
+    assert highest
+
+    context = multiprocessing.get_context("spawn")
+    start = context.Barrier(PROCESSES)
+    results = context.Queue()
+    processes = [
+        context.Process(target=take_ids, args=(str(engine.url), seed, start, results))
+        for seed in range(PROCESSES)
+    ]
+    for process in processes:
+        process.start()
+    taken = [results.get(timeout=60) for _ in processes]
+    for process in processes:
+        process.join(timeout=60)
+        assert process.exitcode == 0
+
+    ids = [id_ for process_ids in taken for id_ in process_ids]
+    assert len(ids) == len(set(ids))
+    assert min(ids) == highest + 1
+    assert all(process_ids == sorted(process_ids) for process_ids in taken)
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import warnings
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from myapp.instrumentation import capture
+from myapp.models import (
+    Base,
+    CategoryOrm,
+    CustomerOrm,
+    OrderOrm,
+    ProductOrm,
+    QuantityOrm,
+    TagOrm,
+    load_profiles,
+)
+
+# Statements loading up to 10 objects with each profile: one per selectin hop
+STATEMENTS: dict[tuple[type[Base], str], int] = {
+    (CustomerOrm, "with_addresses"): 1,
+    (CustomerOrm, "orders"): 2,
+    # orders, products, tags, categories, quantities
+    (CustomerOrm, "order_history"): 6,
+    (OrderOrm, "with_customer"): 1,
+    (OrderOrm, "detail"): 5,
+    (ProductOrm, "catalog"): 3,
+    (ProductOrm, "detail"): 3,
+    (TagOrm, "products"): 2,
+    (CategoryOrm, "products"): 2,
+    (QuantityOrm, "with_product"): 3,
+}
+
+
+def test_every_profile_is_counted() -> None:
+    assert {
+        (model, name)
+        for model, profiles in load_profiles().items()
+        for name in profiles
+    } == STATEMENTS.keys()
+
+
+@pytest.mark.parametrize(
+    "model, name, expected",
+    [(model, name, count) for (model, name), count in STATEMENTS.items()],
+    ids=[f"{model.__name__}.{name}" for model, name in STATEMENTS],
+)
+def test_profile_statements(
+    engine: sa.Engine, model: type[Base], name: str, expected: int
+) -> None:
+    with Session(engine) as session, warnings.catch_warnings():
+        warnings.simplefilter("error", sa.exc.SAWarning)
+        with capture(session, n_plus_one_threshold=None) as stats:
+            objects = (
+                session.scalars(
+                    sa.select(model)
+                    .order_by(model.id)  # type: ignore[attr-defined]
+                    .limit(10)
+                    .options(*model.load_profile(name, strict=True))
+                )
+                .unique()
+                .all()
+            )
+    assert objects
+    assert stats.count == expected
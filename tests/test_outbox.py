@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from datetime import timezone
+
+import sqlalchemy as sa
+from sqlalchemy.orm import Session
+
+from myapp import outbox
+from myapp.models import CustomerOrm, OrderOrm, outbox_tbl
+from myapp.outbox import Change, Relay
+
+
+def test_records_are_delivered_with_utc_times(engine: sa.Engine) -> None:
+    with Session(engine) as session:
+        outbox.install(session)
+        customer = session.get_one(CustomerOrm, 1)
+        order = OrderOrm(invoice_no="I1", customer=customer)
+        session.add(order)
+        session.commit()
+        order.invoice_no = "I2"
+        session.commit()
+        order_id = order.id
+
+    delivered: list[Change] = []
+    relay = Relay(engine, delivered.extend)
+    assert relay.backlog()[0] == 2
+    assert 0 <= relay.backlog()[1] < 60
+    assert relay.drain() == 2
+
+    assert [(c.table_name, c.pk, c.op, c.columns) for c in delivered] == [
+        ("orderes", str(order_id), outbox.INSERT, None),
+        ("orderes", str(order_id), outbox.UPDATE, ["invoice_no"]),
+    ]
+    assert all(c.created_at.tzinfo is timezone.utc for c in delivered)
+    assert 0 <= relay.metrics.lag_max < 60
+    with engine.connect() as connection:
+        assert not connection.scalar(sa.select(sa.func.count()).select_from(outbox_tbl))
+
+
+def test_ids_of_delivered_records_are_not_reused(engine: sa.Engine) -> None:
+    orders = OrderOrm.__table__
+    delivered: list[Change] = []
+    relay = Relay(engine, delivered.extend)
+    with engine.begin() as connection:
+        outbox.record(connection, orders, outbox.INSERT, [1, 2, 3])
+    assert relay.drain() == 3
+    with engine.begin() as connection:
+        outbox.record(connection, orders, outbox.UPDATE, [1], ["invoice_no"])
+    assert relay.drain() == 1
+
+    ids = [change.id for change in delivered]
+    assert len(ids) == len(set(ids)) == 4
+    assert ids == sorted(ids)
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from typing import Iterator
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, selectinload
+
+from myapp.instrumentation import capture
+from myapp.models import CustomerOrm, OrderOrm, ProductOrm, TagOrm
+from myapp.resultcache import MemoryBackend, ResultCache
+
+
+@pytest.fixture
+def cache() -> Iterator[ResultCache]:
+    cache = ResultCache(MemoryBackend())
+    cache.listen(Session)
+    yield cache
+    cache.remove(Session)
+
+
+def orders_with_customer(customer_id: int) -> sa.Select[tuple[OrderOrm]]:
+    return (
+        sa.select(OrderOrm)
+        .where(OrderOrm.customer_id == customer_id)
+        .options(*OrderOrm.load_profile("with_customer"))
+        .execution_options(result_cache=True)
+    )
+
+
+def test_repeated_query_is_served_from_cache(
+    engine: sa.Engine, cache: ResultCache
+) -> None:
+    statement = sa.select(TagOrm).execution_options(result_cache=True)
+    with Session(engine) as session:
+        first = [tag.name for tag in session.scalars(statement)]
+    with Session(engine) as session, capture(session) as stats:
+        again = [tag.name for tag in session.scalars(statement)]
+    assert again == first
+    assert stats.count == 0
+    assert cache.stats()["hits"] == 1
+
+
+def test_joined_eager_load_tables_invalidate(
+    engine: sa.Engine, cache: ResultCache
+) -> None:
+    with Session(engine) as session:
+        orders = session.scalars(orders_with_customer(5)).all()
+        assert orders and orders[0].customer.name != "NEW"
+
+    with Session(engine) as session:
+        session.get_one(CustomerOrm, 5).name = "NEW"
+        session.commit()
+
+    with Session(engine) as session, capture(session) as stats:
+        orders = session.scalars(orders_with_customer(5)).all()
+        assert {order.customer.name for order in orders} == {"NEW"}
+    assert stats.count == 1
+
+
+def test_writing_session_bypasses_joined_tables(
+    engine: sa.Engine, cache: ResultCache
+) -> None:
+    with Session(engine) as session:
+        session.scalars(orders_with_customer(5)).all()
+
+    with Session(engine) as session:
+        session.get_one(CustomerOrm, 5).name = "NEW"
+        session.flush()
+        orders = session.scalars(orders_with_customer(5)).all()
+        assert {order.customer.name for order in orders} == {"NEW"}
+        session.rollback()
+    assert cache.stats()["skipped"] == 1
+
+
+def test_selectin_load_tables_invalidate(engine: sa.Engine, cache: ResultCache) -> None:
+    statement = (
+        sa.select(OrderOrm)
+        .where(OrderOrm.customer_id == 5)
+        .options(selectinload(OrderOrm.products))
+        .execution_options(result_cache=True)
+    )
+    with Session(engine) as session:
+        assert session.scalars(statement).all()
+
+    with Session(engine) as session:
+        session.execute(sa.update(ProductOrm).values(name="NEW"))
+        session.commit()
+
+    with Session(engine) as session:
+        orders = session.scalars(statement).all()
+        assert {product.name for o in orders for product in o.products} == {"NEW"}
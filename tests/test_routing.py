@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, sessionmaker
+
+from myapp.models import Base, TagOrm
+from myapp.routing import ReplicaSet, RoutingSession
+
+REPLICAS = ("replica0", "replica1")
+
+# Tag 1 is named after the database holding it: reads show where they ran
+which = sa.select(TagOrm.name).where(TagOrm.id == 1)
+
+
+def make_engine(path: Path, name: str) -> sa.Engine:
+    engine = sa.create_engine(f"sqlite:///{path / f'{name}.db'}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(sa.insert(TagOrm.__table__), {"id": 1, "name": name})
+    return engine
+
+
+@pytest.fixture
+def primary(tmp_path: Path) -> Iterator[sa.Engine]:
+    engine = make_engine(tmp_path, "primary")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def replicas(tmp_path: Path) -> Iterator[ReplicaSet]:
+    replica_set = ReplicaSet([make_engine(tmp_path, name) for name in REPLICAS])
+    yield replica_set
+    replica_set.dispose()
+
+
+@pytest.fixture
+def sessions(primary: sa.Engine, replicas: ReplicaSet) -> sessionmaker[Session]:
+    return sessionmaker(class_=RoutingSession, primary=primary, replicas=replicas)
+
+
+def names(engine: sa.Engine) -> list[str]:
+    with engine.connect() as connection:
+        return list(connection.scalars(sa.select(TagOrm.name).order_by(TagOrm.id)))
+
+
+def test_reads_go_to_one_replica_per_transaction(
+    sessions: sessionmaker[Session],
+) -> None:
+    used = []
+    with sessions() as session:
+        for _ in range(2):
+            name = session.scalar(which)
+            assert name in REPLICAS
+            # Loads stay on the transaction's replica
+            assert session.get_one(TagOrm, 1).name == name
+            assert session.scalar(which) == name
+            used.append(name)
+            session.commit()
+    assert sorted(used) == list(REPLICAS)
+
+
+def test_writes_and_flushes_go_to_the_primary(
+    sessions: sessionmaker[Session], primary: sa.Engine, replicas: ReplicaSet
+) -> None:
+    with sessions() as session:
+        session.add(TagOrm(id=2, name="flushed"))
+        session.flush()
+        session.execute(sa.update(TagOrm).where(TagOrm.id == 1).values(name="updated"))
+        session.commit()
+    assert names(primary) == ["updated", "flushed"]
+    for state in replicas.states:
+        assert names(state.engine) in [[name] for name in REPLICAS]
+
+
+def test_reads_after_a_write_stay_on_the_primary(
+    sessions: sessionmaker[Session],
+) -> None:
+    with sessions() as session:
+        assert session.scalar(which) in REPLICAS
+        session.add(TagOrm(id=2, name="new"))
+        session.flush()
+        assert session.scalar(which) == "primary"
+        assert session.scalar(sa.select(TagOrm.name).where(TagOrm.id == 2)) == "new"
+        session.commit()
+        # A new transaction reads from the replicas again
+        assert session.scalar(which) in REPLICAS
+
+
+def test_locking_and_forced_reads_go_to_the_primary(
+    sessions: sessionmaker[Session],
+) -> None:
+    with sessions() as session:
+        assert session.scalar(which.with_for_update()) == "primary"
+    with sessions() as session:
+        assert session.scalar(which.execution_options(use_primary=True)) == "primary"
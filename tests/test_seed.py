@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.dialects import oracle, postgresql, sqlite
+
+from myapp.models import CustomerOrm, OrderOrm
+from myapp.seed import identity_restart_sql
+
+orders_tbl: sa.Table = OrderOrm.__table__  # type: ignore[assignment]
+
+
+@pytest.mark.parametrize(
+    "dialect, expected",
+    [
+        (
+            postgresql.dialect(),
+            "ALTER TABLE orderes ALTER COLUMN id RESTART WITH 42",
+        ),
+        (
+            oracle.dialect(),
+            "ALTER TABLE orderes MODIFY id "
+            "GENERATED BY DEFAULT AS IDENTITY (START WITH 42)",
+        ),
+        (sqlite.dialect(), None),
+    ],
+    ids=["postgresql", "oracle", "sqlite"],
+)
+def test_identity_restart_sql(dialect: sa.Dialect, expected: Optional[str]) -> None:
+    assert identity_restart_sql(dialect, orders_tbl, 42) == expected
+
+
+def test_identity_continues_after_seeded_ids(engine: sa.Engine) -> None:
+    customers = CustomerOrm.__table__
+    with engine.begin() as connection:
+        highest = connection.scalar(sa.select(sa.func.max(customers.c.id)))
+        inserted = connection.execute(
+            sa.insert(customers)
+            .values(name="new", contact_number="1")
+            .returning(customers.c.id)
+        ).scalar_one()
+    assert inserted == highest + 1
@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import pytest
+import sqlalchemy as sa
+
+from myapp.models import CustomerOrm
+from myapp.serializers import (
+    MissingAddressError,
+    iter_customers_full,
+    select_customers_full,
+)
+
+
+@pytest.mark.parametrize("validate", [True, False], ids=["validated", "construct"])
+def test_every_customer_is_serialized(engine: sa.Engine, validate: bool) -> None:
+    with engine.connect() as connection:
+        customers = connection.scalars(
+            sa.select(CustomerOrm.id).order_by(CustomerOrm.id)
+        ).all()
+        items = list(iter_customers_full(connection, validate=validate))
+    assert [item.id for item in items] == customers
+    assert all(item.addresses.customer_id == item.id for item in items)
+
+
+@pytest.mark.parametrize("validate", [True, False], ids=["validated", "construct"])
+def test_customer_without_address_raises(engine: sa.Engine, validate: bool) -> None:
+    customers = CustomerOrm.__table__
+    with engine.begin() as connection:
+        lonely = connection.execute(
+            sa.insert(customers)
+            .values(name="lonely", contact_number="1")
+            .returning(customers.c.id)
+        ).scalar_one()
+    with engine.connect() as connection:
+        statement = select_customers_full().where(CustomerOrm.id == lonely)
+        with pytest.raises(MissingAddressError, match=f"customer {lonely} "):
+            list(iter_customers_full(connection, statement, validate=validate))
@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+import sqlalchemy as sa
+from sqlalchemy.orm import Session, joinedload, sessionmaker
+
+from myapp.models import (
+    Base,
+    CategoryOrm,
+    CustomerOrm,
+    OrderOrm,
+    ProductOrm,
+    TagOrm,
+    product_category_assoc_tbl,
+    product_order_assoc_tbl,
+    product_tag_assoc_tbl,
+)
+from myapp.sharding import CustomerShardedSession, ShardSet, copy_reference
+
+SHARDS = 3
+
+
+@pytest.fixture
+def shards(tmp_path: Path, request: pytest.FixtureRequest) -> Iterator[ShardSet]:
+    shard_set = ShardSet(
+        [sa.create_engine(f"sqlite:///{tmp_path / f's{i}.db'}") for i in range(SHARDS)],
+        sa.create_engine(f"sqlite:///{tmp_path / 'ids.db'}"),
+        block_size=10,
+        parallel=getattr(request, "param", True),
+    )
+    shard_set.create_all()
+    with shard_set.engines[0].begin() as connection:
+        connection.execute(
+            sa.insert(ProductOrm.__table__),
+            [{"id": i, "code": f"P{i}", "name": f"p{i}"} for i in range(1, 6)],
+        )
+        connection.execute(sa.insert(TagOrm.__table__), [{"id": 1, "name": "new"}])
+        connection.execute(
+            sa.insert(CategoryOrm.__table__), [{"id": 1, "title": "all"}]
+        )
+    for shard in range(1, SHARDS):
+        copy_reference(shard_set.engines[0], shard_set.engines[shard])
+    yield shard_set
+    shard_set.dispose()
+
+
+@pytest.fixture
+def sessions(shards: ShardSet) -> sessionmaker[Session]:
+    return sessionmaker(class_=CustomerShardedSession, shard_set=shards)
+
+
+def counts(shards: ShardSet, table: sa.Table) -> list[int]:
+    counted = []
+    for engine in shards.engines.values():
+        with engine.connect() as connection:
+            counted.append(
+                connection.scalar(sa.select(sa.func.count()).select_from(table)) or 0
+            )
+    return counted
+
+
+def test_order_products_follow_the_order(
+    shards: ShardSet, sessions: sessionmaker[Session]
+) -> None:
+    with sessions() as session:
+        customer = CustomerOrm(name="c", contact_number="1")
+        order = OrderOrm(invoice_no="I1", customer=customer)
+        order.products.add(session.get_one(ProductOrm, 1))
+        session.add(order)
+        session.commit()
+        shard = shards.shard_of(customer.id)
+    assert counts(shards, product_order_assoc_tbl) == [
+        int(index == shard) for index in range(SHARDS)
+    ]
+
+
+@pytest.mark.parametrize(
+    "collection, model, table",
+    [
+        ("tags", TagOrm, product_tag_assoc_tbl),
+        ("categories", CategoryOrm, product_category_assoc_tbl),
+    ],
+)
+def test_reference_collections_are_rejected(
+    shards: ShardSet,
+    sessions: sessionmaker[Session],
+    collection: str,
+    model: type[Base],
+    table: sa.Table,
+) -> None:
+    with sessions() as session:
+        product = session.get_one(ProductOrm, 1)
+        getattr(product, collection).add(session.get_one(model, 1))
+        with pytest.raises(ValueError, match="replicated reference data"):
+            session.flush()
+    assert counts(shards, table) == [0] * SHARDS
+
+
+@pytest.fixture
+def orders(sessions: sessionmaker[Session]) -> list[tuple[int, str]]:
+    """(id, invoice_no) of 3 orders of each of 6 customers, on every shard."""
+    with sessions() as session:
+        for c in range(6):
+            customer = CustomerOrm(name=f"c{c}", contact_number=str(c))
+            for o in range(3):
+                session.add(
+                    OrderOrm(invoice_no=f"I{(c * 7 + o * 5) % 10}", customer=customer)
+                )
+        session.commit()
+        return [
+            (order.id, order.invoice_no)
+            for order in session.scalars(sa.select(OrderOrm))
+        ]
+
+
+@pytest.mark.parametrize(
+    "shards", [True, False], indirect=True, ids=["parallel", "serial"]
+)
+def test_fan_out_keeps_order_and_limit(
+    sessions: sessionmaker[Session], orders: list[tuple[int, str]]
+) -> None:
+    newest = sorted(orders, reverse=True)
+    by_invoice = sorted(orders, key=lambda order: (order[1], -order[0]))
+    with sessions() as session:
+        query = sa.select(OrderOrm.id, OrderOrm.invoice_no)
+        assert (
+            session.execute(query.order_by(OrderOrm.id.desc()).limit(4)).all()
+            == newest[:4]
+        )
+        assert (
+            session.execute(query.order_by(OrderOrm.id.desc()).offset(2).limit(5)).all()
+            == newest[2:7]
+        )
+        assert (
+            session.execute(
+                query.order_by(OrderOrm.invoice_no, OrderOrm.id.desc())
+            ).all()
+            == by_invoice
+        )
+        assert len(session.execute(query.offset(15)).all()) == 3
+        assert session.scalars(
+            sa.select(OrderOrm).order_by(OrderOrm.id.desc()).limit(3)
+        ).all() == [session.get(OrderOrm, id_) for id_, _ in newest[:3]]
+
+
+def test_fan_out_places_nulls_as_the_dialect(
+    sessions: sessionmaker[Session], orders: list[tuple[int, str]]
+) -> None:
+    invoice = sa.func.nullif(OrderOrm.invoice_no, "I0")
+    with sessions() as session:
+        # SQLite sorts NULL first
+        ascending = session.scalars(
+            sa.select(invoice).order_by(invoice, OrderOrm.id)
+        ).all()
+        assert ascending == sorted(
+            ascending, key=lambda value: (value is not None, value)
+        )
+        assert ascending[0] is None
+        last = session.scalars(
+            sa.select(invoice).order_by(invoice.desc().nulls_first()).limit(2)
+        ).all()
+        assert last == [None, None]
+
+
+def test_fan_out_limits_parents_of_joined_collections(
+    sessions: sessionmaker[Session], orders: list[tuple[int, str]]
+) -> None:
+    with sessions() as session:
+        customers = (
+            session.scalars(
+                sa.select(CustomerOrm)
+                .options(joinedload(CustomerOrm.orders))
+                .order_by(CustomerOrm.id)
+                .limit(4)
+            )
+            .unique()
+            .all()
+        )
+        assert [customer.name for customer in customers] == ["c0", "c1", "c2", "c3"]
+        assert all(len(customer.orders) == 3 for customer in customers)
+
+
+def test_fan_out_refuses_ordering_by_name(sessions: sessionmaker[Session]) -> None:
+    with sessions() as session:
+        with pytest.raises(ValueError, match="ordered by expressions"):
+            session.execute(sa.select(OrderOrm.id).order_by(sa.desc("id")))